@@ -0,0 +1,39 @@
+"""
+Multi-get for ``/batch/`` endpoints.
+
+``?ids=3,1,2`` names up to ``MAX_BATCH_IDS`` objects. Views load them with a
+fixed number of ``pk__in`` queries however many ids are asked for, and answer
+in the order the ids were given. Ids that do not exist or that the viewer may
+not see are listed under ``missing`` rather than failing the whole batch.
+"""
+from rest_framework.exceptions import ValidationError
+
+
+IDS_PARAM = 'ids'
+MAX_BATCH_IDS = 200
+
+
+def batch_ids(request):
+    """The distinct ids in ``?ids=``, in the order given."""
+    ids = []
+    for part in request.query_params.get(IDS_PARAM, '').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if not part.isdigit():
+            raise ValidationError({IDS_PARAM: 'A comma-separated list of integer ids is required.'})
+        ids.append(int(part))
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        raise ValidationError({IDS_PARAM: 'At least one id is required.'})
+    if len(ids) > MAX_BATCH_IDS:
+        raise ValidationError({IDS_PARAM: f'At most {MAX_BATCH_IDS} ids may be requested at once.'})
+    return ids
+
+
+def batch_response(ids, found):
+    """Response body for ``ids`` given ``found``, a mapping of id to rendered object."""
+    return {
+        'results': [found[pk] for pk in ids if pk in found],
+        'missing': [pk for pk in ids if pk not in found],
+    }
@@ -0,0 +1,91 @@
+"""
+Conditional GET for list and detail endpoints.
+
+Every cacheable response belongs to one or more *scopes* (``'posts:feed'``,
+``'posts:42'``, ``'groups'``, ...). Each scope has a version token in the
+shared cache: the time, in nanoseconds, of the last write that touched it.
+Writes call ``bump_versions()`` once their transaction commits. A GET builds
+its ``ETag`` from those versions alone, so a client revalidating an unchanged
+resource gets ``304 Not Modified`` after a single cache lookup, before the
+view runs its query or serializer. There is no ``Last-Modified``: second
+resolution would hide writes made within the same second. A per-process cache
+would miss bumps made by other processes, so validators are only issued with
+``CONDITIONAL_GET`` (on by default when ``REDIS_URL`` is set). Versions expire
+after ``VERSION_TIMEOUT``; a scope whose version is gone simply gets a new one,
+which costs its readers one full response.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response, patch_cache_control
+
+
+# Far longer than any client keeps a validator around, so expiry only drops
+# versions of scopes nobody reads any more.
+VERSION_TIMEOUT = 7 * 24 * 60 * 60
+
+
+def _version_key(scope):
+    return f'versions:{scope}'
+
+
+def scope_versions(scopes):
+    """Current version of each scope; scopes never written get one now."""
+    keys = [_version_key(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in found}
+    if missing:
+        # add() keeps a version another process may have set meanwhile.
+        for key, version in missing.items():
+            cache.add(key, version, VERSION_TIMEOUT)
+        found.update(cache.get_many(list(missing)))
+    return [found[key] for key in keys]
+
+
+def bump_versions(*scopes):
+    """Mark ``scopes`` as changed once the current transaction commits."""
+    def bump():
+        version = time.time_ns()
+        cache.set_many({_version_key(scope): version for scope in scopes}, VERSION_TIMEOUT)
+    transaction.on_commit(bump)
+
+
+class ConditionalGetMixin:
+    """
+    Answer ``If-None-Match`` from scope versions.
+
+    Views list their scopes in ``get_version_scopes()``; it runs after
+    authentication and may enforce access rules itself. The ETag also covers
+    the viewer and the full query string, since responses differ by both.
+    """
+
+    def get_version_scopes(self):
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        versions = scope_versions(self.get_version_scopes())
+        self.scope_versions = versions
+        newest = max(versions)
+        validators = settings.CONDITIONAL_GET and self._can_validate(newest)
+        if validators:
+            fingerprint = f'{request.user.pk}|{request.get_full_path()}|{versions}'
+            etag = '"%s"' % hashlib.md5(fingerprint.encode()).hexdigest()
+            not_modified = get_conditional_response(request, etag=etag)
+            if not_modified is not None:
+                return not_modified
+
+        response = super().get(request, *args, **kwargs)
+        if validators and response.status_code == 200:
+            response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def _can_validate(self, newest):
+        # A replica may not have replayed a write bumped moments ago; tagging
+        # its answer with the new version would let a client keep stale data.
+        if getattr(self, '_replica_context', None) is None:
+            return True
+        return time.time_ns() - newest > settings.REPLICA_PIN_SECONDS * 1_000_000_000
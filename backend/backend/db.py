@@ -0,0 +1,29 @@
+import time
+
+from django.db import connections
+
+
+def pool_stats():
+    """Return psycopg pool statistics for every alias that uses a connection pool."""
+    stats = {}
+    for alias in connections:
+        pool = getattr(connections[alias], 'pool', None)
+        if pool is not None:
+            stats[alias] = pool.get_stats()
+    return stats
+
+
+def check_databases():
+    """Run ``SELECT 1`` on every alias and report the round-trip time in milliseconds."""
+    results = {}
+    for alias in connections:
+        started = time.perf_counter()
+        try:
+            with connections[alias].cursor() as cursor:
+                cursor.execute('SELECT 1')
+                cursor.fetchone()
+        except Exception as exc:
+            results[alias] = {'ok': False, 'error': exc.__class__.__name__}
+            continue
+        results[alias] = {'ok': True, 'latencyMs': round((time.perf_counter() - started) * 1000, 2)}
+    return results
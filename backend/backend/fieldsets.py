@@ -0,0 +1,143 @@
+"""
+Sparse fieldsets and normalized responses for read endpoints.
+
+``?fields=id,content,author.username`` limits a response to the listed
+fields; dotted names reach into nested serializers, and naming a nested
+field bare keeps all of its fields. Serializers may declare
+``Meta.expandable_fields``: heavy fields that are sent by default, but left
+out as soon as a client asks for a sparse response unless it also names them
+in ``?expand=``.
+
+``?normalize=users`` sends every referenced user once, in ``includes.users``
+keyed by id, and replaces each occurrence with the id. A feed page of fifty
+posts by five people then carries five author objects instead of fifty plus
+one per comment.
+
+Both only apply to safe methods: a write always validates and echoes the
+full serializer.
+"""
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+NORMALIZE_PARAM = 'normalize'
+
+
+def _param_names(request, param):
+    value = request.query_params.get(param)
+    if value is None:
+        return None
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+def _below(names, path):
+    """First segment of every name nested under ``path``."""
+    if not path:
+        return {name.split('.', 1)[0] for name in names}
+    prefix = path + '.'
+    return {name[len(prefix):].split('.', 1)[0] for name in names if name.startswith(prefix)}
+
+
+def sparse_selection(request, path, field_names, expandable=()):
+    """Names of the fields to render at ``path``, or ``None`` to render them all."""
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    fields = _param_names(request, FIELDS_PARAM)
+    expand = _param_names(request, EXPAND_PARAM)
+    if fields is None and expand is None:
+        return None
+
+    expanded = _below(expand or (), path)
+    listed = _below(fields or (), path)
+    if listed:
+        return listed | expanded
+    return {name for name in field_names if name not in expandable or name in expanded}
+
+
+def wants_field(request, serializer_class, name):
+    """Whether the top level of ``serializer_class`` will render ``name``; lets views skip prefetches."""
+    meta = serializer_class.Meta
+    keep = sparse_selection(request, '', meta.fields, getattr(meta, 'expandable_fields', ()))
+    return name in meta.fields and (keep is None or name in keep)
+
+
+class SparseFieldsetMixin:
+    """Drop the fields a request did not ask for, at whatever depth the serializer is nested."""
+
+    def get_fields(self):
+        fields = super().get_fields()
+        keep = sparse_selection(
+            self.context.get('request'),
+            self._field_path(),
+            fields,
+            getattr(self.Meta, 'expandable_fields', ()),
+        )
+        if keep is None:
+            return fields
+        return {name: field for name, field in fields.items() if name in keep}
+
+    def _field_path(self):
+        names = []
+        node = self
+        while node.parent is not None:
+            if node.field_name:
+                names.append(node.field_name)
+            node = node.parent
+        return '.'.join(reversed(names))
+
+
+class IncludableMixin:
+    """
+    Serialize each instance once into ``includes[include_as]`` and render its
+    id in place, when the view has asked for that kind to be normalized.
+    """
+
+    include_as = 'users'
+
+    def to_representation(self, instance):
+        includes = self.context.get('includes')
+        if not includes or self.include_as not in includes:
+            return super().to_representation(instance)
+        bucket = includes[self.include_as]
+        if instance.pk not in bucket:
+            bucket[instance.pk] = super().to_representation(instance)
+        return instance.pk
+
+
+class NormalizedResponseMixin:
+    """Collect ``IncludableMixin`` output for ``?normalize=`` and attach it to the response."""
+
+    normalizable = ('users',)
+
+    def get_includes(self):
+        if not hasattr(self, '_includes'):
+            self._includes = None
+            kinds = None
+            if self.request.method in SAFE_METHODS:
+                kinds = _param_names(self.request, NORMALIZE_PARAM)
+            if kinds:
+                unknown = kinds - set(self.normalizable)
+                if unknown:
+                    raise ValidationError({
+                        NORMALIZE_PARAM: f'Supported values: {", ".join(self.normalizable)}.'
+                    })
+                self._includes = {kind: {} for kind in sorted(kinds)}
+        return self._includes
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        includes = self.get_includes()
+        if includes is not None:
+            context['includes'] = includes
+        return context
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        includes = getattr(self, '_includes', None)
+        if includes is not None and response.status_code == 200:
+            if isinstance(response.data, list):
+                response.data = {'results': response.data, 'includes': includes}
+            elif isinstance(response.data, dict):
+                response.data['includes'] = includes
+        return super().finalize_response(request, response, *args, **kwargs)
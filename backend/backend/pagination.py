@@ -0,0 +1,132 @@
+import base64
+import json
+from functools import reduce
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Forward-only cursor pagination over a unique column tuple.
+
+    The cursor is the ordering key of the last row served, so fetching page N
+    is an index seek past that key rather than an OFFSET over N pages of rows.
+    ``ordering`` must end in a unique column (normally ``id``); prefix a
+    column with ``-`` to walk it in descending order.
+    """
+
+    cursor_query_param = 'cursor'
+    page_size = 50
+    ordering = ('id',)
+    invalid_cursor_message = 'Invalid cursor.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        position = self.decode_cursor(request)
+        queryset = queryset.order_by(*self.ordering)
+        if position is not None:
+            self.check_values(position, queryset.model)
+            queryset = queryset.filter(self.seek(position))
+
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def seek(self, position):
+        """``(a, b, c) > (x, y, z)`` spelled so the leading column bounds the index scan."""
+        fields = [
+            (field.lstrip('-'), 'lt' if field.startswith('-') else 'gt', value)
+            for field, value in zip(self.ordering, position)
+        ]
+        branches = []
+        for index, (field, lookup, value) in enumerate(fields):
+            equal = {name: val for name, _, val in fields[:index]}
+            branches.append(Q(**equal, **{f'{field}__{lookup}': value}))
+        first_field, first_lookup, first_value = fields[0]
+        bound = Q(**{f'{first_field}__{first_lookup[0]}te': first_value})
+        return bound & reduce(lambda a, b: a | b, branches)
+
+    def get_position(self, row):
+        return [getattr(row, field.lstrip('-')) for field in self.ordering]
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            position = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+        except (TypeError, ValueError, UnicodeEncodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not self.is_valid_position(position):
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+    def is_valid_position(self, position):
+        return isinstance(position, list) and len(position) == len(self.ordering)
+
+    def check_values(self, position, model):
+        """Raise ``NotFound`` unless each value of ``position`` fits its ordering column on ``model``."""
+        for field_name, value in zip(self.ordering, position):
+            try:
+                field = model._meta.get_field(field_name.lstrip('-'))
+            except FieldDoesNotExist:
+                field = None
+            if not _fits(field, value):
+                raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, position):
+        encoded = base64.urlsafe_b64encode(json.dumps(position, default=str).encode()).decode('ascii')
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            encoded,
+        )
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(self.get_position(self.page[-1]))
+
+    def get_paginated_data(self, data):
+        return {
+            'next': self.get_next_link(),
+            'results': data,
+        }
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+def _fits(field, value):
+    if isinstance(value, bool):
+        return False
+    if field is not None and field.is_relation:
+        field = field.target_field
+    if isinstance(field, models.DateTimeField):
+        return isinstance(value, str) and parse_datetime(value) is not None
+    if isinstance(field, (models.IntegerField, models.AutoField)):
+        return isinstance(value, int)
+    if isinstance(field, models.FloatField):
+        return isinstance(value, (int, float))
+    if isinstance(field, (models.CharField, models.TextField)):
+        return isinstance(value, str)
+    # Columns this check does not know (annotations, say) take any scalar.
+    return isinstance(value, (str, int, float))
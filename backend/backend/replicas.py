@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+
+from .db_routers import replica_configured, use_replica
+
+
+def _pin_key(user_id):
+    return f'db:pin-primary:{user_id}'
+
+
+def pin_to_primary(user_id):
+    """Serve ``user_id``'s reads from the primary until replicas have caught up with their write."""
+    cache.set(_pin_key(user_id), 1, timeout=settings.REPLICA_PIN_SECONDS)
+
+
+def is_pinned_to_primary(user_id):
+    return cache.get(_pin_key(user_id)) is not None
+
+
+class ReplicaStickinessMiddleware:
+    """Pin the author of every successful write to the primary for a short window."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            user = getattr(request, 'user', None)
+            if user is not None and user.is_authenticated and replica_configured():
+                pin_to_primary(user.pk)
+        return response
+
+
+class ReplicaReadMixin:
+    """
+    Opt a view into replica reads: safe requests run inside ``use_replica()``
+    unless the viewer is pinned to the primary by a recent write.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._replica_context = None
+        if request.method in SAFE_METHODS and replica_configured():
+            user = request.user
+            if not (user and user.is_authenticated and is_pinned_to_primary(user.pk)):
+                self._replica_context = use_replica()
+                self._replica_context.__enter__()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        context = getattr(self, '_replica_context', None)
+        if context is not None:
+            self._replica_context = None
+            context.__exit__(None, None, None)
+        return super().finalize_response(request, response, *args, **kwargs)
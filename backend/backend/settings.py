@@ -46,11 +46,16 @@ INSTALLED_APPS = [
     'notifications.apps.NotificationsConfig',
     'users.apps.UsersConfig',
     'groups.apps.GroupsConfig',
+    'tags.apps.TagsConfig',
+    'outbox.apps.OutboxConfig',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'backend.compression.CompressionMiddleware',
+    'backend.throttling.DatabaseLatencyMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    'backend.replicas.ReplicaStickinessMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -82,6 +87,36 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+def env_bool(name, default=False):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+# Connection reuse. With POSTGRES_POOL enabled every worker process keeps a
+# psycopg connection pool (Django's persistent connections must then be off);
+# otherwise connections are kept open for POSTGRES_CONN_MAX_AGE seconds.
+POSTGRES_POOL = env_bool('POSTGRES_POOL', False)
+
+DATABASE_OPTIONS = {}
+if POSTGRES_POOL:
+    from psycopg_pool import ConnectionPool
+
+    DATABASE_OPTIONS['pool'] = {
+        'min_size': env_int('POSTGRES_POOL_MIN_SIZE', 2),
+        'max_size': env_int('POSTGRES_POOL_MAX_SIZE', 10),
+        'timeout': env_int('POSTGRES_POOL_TIMEOUT', 10),
+        'max_idle': env_int('POSTGRES_POOL_MAX_IDLE', 300),
+        'max_lifetime': env_int('POSTGRES_POOL_MAX_LIFETIME', 3600),
+        # Validate a connection before handing it out of the pool.
+        'check': ConnectionPool.check_connection,
+    }
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
@@ -90,8 +125,80 @@ DATABASES = {
         'PASSWORD': os.environ.get('POSTGRES_PASSWORD', 'poll_password'),
         'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
         'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+        'CONN_MAX_AGE': 0 if POSTGRES_POOL else env_int('POSTGRES_CONN_MAX_AGE', 60),
+        'CONN_HEALTH_CHECKS': env_bool('POSTGRES_CONN_HEALTH_CHECKS', True),
+        'OPTIONS': DATABASE_OPTIONS,
+    }
+}
+
+# Optional streaming replica, used only for reads that explicitly opt in
+# (see backend.db_routers).
+if os.environ.get('POSTGRES_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.environ['POSTGRES_REPLICA_HOST'],
+        'PORT': os.environ.get('POSTGRES_REPLICA_PORT', DATABASES['default']['PORT']),
+        'OPTIONS': {**DATABASE_OPTIONS},
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['backend.db_routers.PrimaryReplicaRouter']
+
+# After a write, the author's reads stay on the primary for this many seconds
+# so they never see a replica that has not replayed their change yet.
+REPLICA_PIN_SECONDS = env_int('REPLICA_PIN_SECONDS', 10)
+
+
+# Cache
+# Shared between worker processes when REDIS_URL is set; otherwise per process.
+
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
     }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Caches that writes invalidate (friend list pages, profile headers) are only
+# used when every worker process shares the cache; a per-process cache would
+# keep serving what another process has already invalidated.
+SHARED_CACHE = env_bool('SHARED_CACHE', bool(os.environ.get('REDIS_URL')))
+
+# Password hashing
+# Profiles trade login CPU cost against brute-force resistance; existing
+# hashes are upgraded or downgraded transparently on the next login.
+
+PASSWORD_HASHER_PROFILES = {
+    'strong': 1_000_000,   # Django 5.2 default
+    'balanced': 600_000,   # OWASP minimum for PBKDF2-SHA256
+    'development': 10_000,  # local development and tests only
 }
+PASSWORD_PBKDF2_ITERATIONS = env_int(
+    'PASSWORD_PBKDF2_ITERATIONS',
+    PASSWORD_HASHER_PROFILES[os.environ.get('PASSWORD_HASHER_PROFILE', 'strong')],
+)
+
+PASSWORD_HASHERS = [
+    'users.hashers.TunedPBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+# Logins verify passwords on a bounded thread pool: at most
+# PASSWORD_CHECK_WORKERS hashes run at once, PASSWORD_CHECK_QUEUE more may
+# wait, and anything beyond that is answered with 429.
+PASSWORD_CHECK_WORKERS = env_int('PASSWORD_CHECK_WORKERS', os.cpu_count() or 1)
+PASSWORD_CHECK_QUEUE = env_int('PASSWORD_CHECK_QUEUE', 32)
+PASSWORD_CHECK_TIMEOUT = env_int('PASSWORD_CHECK_TIMEOUT', 10)
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -129,6 +236,23 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+MEDIA_URL = 'media/'
+MEDIA_ROOT = Path(os.environ.get('MEDIA_ROOT', BASE_DIR / 'media'))
+
+# Threads that decode uploaded profile pictures into their renditions.
+IMAGE_WORKERS = env_int('IMAGE_WORKERS', 2)
+
+# Post attachments are uploaded in chunks of at most UPLOAD_CHUNK_MAX_SIZE
+# bytes, assembled in UPLOAD_PARTIAL_DIR and only then moved to storage.
+UPLOAD_PARTIAL_DIR = Path(os.environ.get('UPLOAD_PARTIAL_DIR', BASE_DIR / 'uploads'))
+UPLOAD_CHUNK_MAX_SIZE = env_int('UPLOAD_CHUNK_MAX_SIZE', 8 * 1024 * 1024)
+ATTACHMENT_MAX_SIZE = env_int('ATTACHMENT_MAX_SIZE', 512 * 1024 * 1024)
+ATTACHMENT_CONTENT_TYPES = ('image/', 'video/')
+POST_MAX_ATTACHMENTS = 10
+
+# Trending tags are the most used ones among those used this recently.
+TRENDING_TAGS_WINDOW_HOURS = env_int('TRENDING_TAGS_WINDOW_HOURS', 24)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -136,10 +260,51 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
-    )
+        "users.authentication.StatelessJWTAuthentication",
+    ),
+    "DEFAULT_THROTTLE_CLASSES": (
+        "backend.throttling.TokenBucketThrottle",
+    ),
 }
 
+# Writes to views with a throttle_scope draw from a per-user token bucket:
+# `burst` requests at once, refilled at `rate` per second. Buckets live in the
+# shared cache when it is Redis, otherwise in each worker process.
+THROTTLE_BACKEND = os.environ.get('THROTTLE_BACKEND', 'cache' if os.environ.get('REDIS_URL') else 'local')
+THROTTLE_POLICIES = {
+    'likes': {'rate': 1, 'burst': 30},
+    'comments': {'rate': 0.2, 'burst': 10},
+    'friend_requests': {'rate': 0.05, 'burst': 20},
+}
+
+# Throttled writes are shed with 429 once the average query on the primary
+# takes longer than ADMISSION_LATENCY_MS (all of them at twice that).
+ADMISSION_LATENCY_MS = env_int('ADMISSION_LATENCY_MS', 200)
+ADMISSION_RETRY_AFTER = env_int('ADMISSION_RETRY_AFTER', 2)
+
+# Conditional GETs (backend.conditional) answer 304 from version stamps in the
+# default cache. Every worker process must see every bump for that to be
+# correct, so they are on by default only with the shared Redis cache.
+CONDITIONAL_GET = env_bool('CONDITIONAL_GET', bool(os.environ.get('REDIS_URL')))
+
+# Identical concurrent feed reads share one computation (backend.singleflight);
+# the result is then reused for this many milliseconds, until a write bumps
+# the feed's version.
+FEED_COALESCE_TTL_MS = env_int('FEED_COALESCE_TTL_MS', 2000)
+
+# Side effects of writes (profile stats, group activity) are recorded in the
+# outbox with the write and applied by `manage.py process_outbox` on
+# OUTBOX_WORKERS threads. 'inline' applies them in the web process right after
+# each request commits instead, for setups that run no worker. Applied events
+# are kept OUTBOX_RETENTION_HOURS as a record of which keys were processed.
+OUTBOX_DISPATCH = os.environ.get('OUTBOX_DISPATCH', 'worker')
+OUTBOX_WORKERS = env_int('OUTBOX_WORKERS', 4)
+OUTBOX_RETENTION_HOURS = env_int('OUTBOX_RETENTION_HOURS', 24)
+
+# Seconds a worker process may reuse a loaded User for request.user before
+# reading it again. Saving a user evicts it from the local process at once.
+USER_CACHE_TTL = env_int('USER_CACHE_TTL', 30)
+
 AUTH_USER_MODEL = 'users.User'
 
 CORS_ALLOWED_ORIGINS = [
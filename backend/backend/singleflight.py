@@ -0,0 +1,171 @@
+"""
+Request coalescing for hot, identical reads.
+
+When many clients ask for the same thing at once (everyone in a group opening
+its feed after a new post), ``SingleFlight.do()`` lets the first caller for a
+key compute the result while the others wait for it and share it, so the
+query and serialization run once per burst instead of once per request. A
+result is then kept for ``ttl`` seconds, so the tail of the burst that arrives
+just after the computation finished is answered from memory as well.
+
+Threads (WSGI workers) coordinate through a lock and an event per key;
+coroutines (ASGI) use ``do_async()``, which shares a future per event loop.
+Both count calls, executions and shared results for the metrics endpoint.
+Shared results must not be mutated by their receivers.
+"""
+import asyncio
+import threading
+import time
+import weakref
+from collections import Counter
+
+
+# A follower stops waiting for a stuck leader after this many seconds and computes the result itself.
+WAIT_TIMEOUT = 10
+MAX_RESULTS = 1000
+
+_MISS = object()
+_groups = {}
+_groups_lock = threading.Lock()
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._async_calls = weakref.WeakKeyDictionary()
+        self._results = {}
+        self._stats = Counter()
+        with _groups_lock:
+            _groups[name] = self
+
+    def do(self, key, fn, ttl=0):
+        """Return ``fn()``, shared with every concurrent caller passing the same ``key``."""
+        with self._lock:
+            value = self._begin(key)
+            if value is not _MISS:
+                return value
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self._stats['shared'] += 1
+
+        if not leader:
+            if not call.done.wait(WAIT_TIMEOUT):
+                with self._lock:
+                    self._stats['timeouts'] += 1
+                return fn()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = fn()
+        except Exception as exc:
+            call.error = exc
+            raise
+        finally:
+            self._finish(key, call.error is None, call.value, ttl, lambda: self._calls.pop(key, None))
+            call.done.set()
+        return call.value
+
+    async def do_async(self, key, fn, ttl=0):
+        """Await ``fn()``, shared with every concurrent coroutine on this event loop passing the same ``key``."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            value = self._begin(key)
+            if value is not _MISS:
+                return value
+            calls = self._async_calls.setdefault(loop, {})
+            future = calls.get(key)
+            if future is not None:
+                self._stats['shared'] += 1
+
+        if future is not None:
+            # Shielded so a follower that is cancelled does not cancel the leader's work.
+            return await asyncio.shield(future)
+
+        future = calls[key] = loop.create_future()
+        succeeded = False
+        value = None
+        try:
+            value = await fn()
+            succeeded = True
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            # Mark it retrieved; there may be no follower to do so.
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+        finally:
+            self._finish(key, succeeded, value, ttl, lambda: calls.pop(key, None))
+        return value
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._stats)
+        calls = counts.get('calls', 0)
+        executions = counts.get('executions', 0)
+        return {
+            'calls': calls,
+            'executions': executions,
+            'shared': counts.get('shared', 0),
+            'cached': counts.get('cached', 0),
+            'timeouts': counts.get('timeouts', 0),
+            # Requests served per computation; 1.0 means nothing was collapsed.
+            'collapseRatio': round(calls / executions, 2) if executions else None,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+            self._stats.clear()
+
+    def _begin(self, key):
+        """Count a call and return its remembered result, if fresh. Holds the lock."""
+        self._stats['calls'] += 1
+        entry = self._results.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self._stats['cached'] += 1
+            return entry[1]
+        return _MISS
+
+    def _finish(self, key, succeeded, value, ttl, release):
+        with self._lock:
+            self._stats['executions'] += 1
+            release()
+            if succeeded and ttl > 0:
+                now = time.monotonic()
+                if len(self._results) >= MAX_RESULTS:
+                    self._results = {k: entry for k, entry in self._results.items() if entry[0] > now}
+                    if len(self._results) >= MAX_RESULTS:
+                        self._results.clear()
+                self._results[key] = (now + ttl, value)
+
+
+def singleflight_stats():
+    with _groups_lock:
+        groups = dict(_groups)
+    return {name: group.stats() for name, group in sorted(groups.items())}
+
+
+def reset_singleflight():
+    """Forget every remembered result and statistic (tests use this)."""
+    with _groups_lock:
+        groups = list(_groups.values())
+    for group in groups:
+        group.clear()
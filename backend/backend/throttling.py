@@ -0,0 +1,223 @@
+"""
+Rate limiting and admission control for hot write endpoints.
+
+Views opt in with ``throttle_scope``; ``THROTTLE_POLICIES`` gives each scope a
+token bucket of ``burst`` tokens refilled at ``rate`` per second, one bucket
+per user and scope. Buckets are tracked as the time they will next be full
+(GCRA): one number per bucket, and a request is admitted when taking a token
+would not push that time more than ``burst`` tokens into the future.
+
+``THROTTLE_BACKEND`` picks where buckets live: ``local`` keeps them in the
+worker process, ``cache`` in the shared cache so every worker sees one
+bucket. Before any of that, admission control sheds throttled writes with
+429 while the primary is slow, judged by an average of recent query times
+that fades while no queries run.
+"""
+import math
+import random
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import BaseThrottle
+
+
+MAX_LOCAL_BUCKETS = 100_000
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def _record(scope, outcome):
+    with _stats_lock:
+        _stats[(scope, outcome)] += 1
+
+
+class LocalBucketStore:
+    """
+    Buckets in this process. Reads and writes are single dict operations, so
+    there is no lock on the request path; two threads racing on one bucket may
+    both be admitted, which costs at most one extra token per thread.
+    """
+
+    def __init__(self):
+        self._full_at = {}
+
+    def take(self, key, rate, burst):
+        """Take a token; returns 0 if admitted, else the seconds until one is free."""
+        interval = 1 / rate
+        now = time.monotonic()
+        full_at = max(self._full_at.get(key, now), now) + interval
+        if full_at - now > burst * interval:
+            return full_at - now - burst * interval
+        if len(self._full_at) >= MAX_LOCAL_BUCKETS:
+            self._prune(now)
+        self._full_at[key] = full_at
+        return 0
+
+    def _prune(self, now):
+        # A bucket that has refilled completely is the same as no bucket.
+        for key, full_at in list(self._full_at.items()):
+            if full_at <= now:
+                self._full_at.pop(key, None)
+
+    def clear(self):
+        self._full_at.clear()
+
+
+class CacheBucketStore:
+    """
+    Buckets in the shared cache, kept in microseconds so that taking a token
+    is one atomic ``incr`` (``INCRBY`` on Redis) rather than a read and a write.
+    """
+
+    def take(self, key, rate, burst):
+        interval = math.ceil(1_000_000 / rate)
+        capacity = burst * interval
+        now = time.time_ns() // 1000
+        timeout = math.ceil(capacity / 1_000_000) + 1
+        key = f'throttle:{key}'
+
+        try:
+            full_at = cache.incr(key, interval)
+        except ValueError:
+            if cache.add(key, now + interval, timeout):
+                return 0
+            full_at = cache.incr(key, interval)
+
+        if full_at - interval < now:
+            # The bucket had refilled; restart it from now.
+            cache.set(key, now + interval, timeout)
+            return 0
+        if full_at - now > capacity:
+            cache.decr(key, interval)
+            return (full_at - now - capacity) / 1_000_000
+        cache.touch(key, timeout)
+        return 0
+
+
+_local_store = LocalBucketStore()
+_cache_store = CacheBucketStore()
+
+
+def get_bucket_store():
+    return _cache_store if settings.THROTTLE_BACKEND == 'cache' else _local_store
+
+
+class DatabaseLatency:
+    """
+    Exponentially weighted moving average of query time on the primary, in
+    milliseconds. Between samples the average also halves every
+    ``half_life`` seconds: shed writes run no queries, so a slow burst
+    followed by silence must not keep shedding for good.
+    """
+
+    def __init__(self, alpha=0.1, half_life=5.0):
+        self.alpha = alpha
+        self.half_life = half_life
+        self.value = 0.0
+
+    @property
+    def value(self):
+        idle = time.monotonic() - self._sampled_at
+        return self._value * 0.5 ** (idle / self.half_life)
+
+    @value.setter
+    def value(self, value):
+        self._value = value
+        self._sampled_at = time.monotonic()
+
+    def observe(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            sample = (time.perf_counter() - started) * 1000
+            # A lost update under contention only drops one sample.
+            self.value += self.alpha * (sample - self.value)
+
+    def reset(self):
+        self.value = 0.0
+
+
+db_latency = DatabaseLatency()
+
+
+class DatabaseLatencyMiddleware:
+    """Time every query a request runs on the primary and feed ``db_latency``."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with connections['default'].execute_wrapper(db_latency.observe):
+            return self.get_response(request)
+
+
+def should_shed():
+    """
+    Refuse a share of throttled writes while queries are slow: none at
+    ``ADMISSION_LATENCY_MS``, rising linearly to all of them at twice that.
+    Shedding gradually keeps the latency from swinging between the extremes.
+    """
+    threshold = settings.ADMISSION_LATENCY_MS
+    overload = (db_latency.value - threshold) / threshold
+    return overload > 0 and random.random() < overload
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Throttle writes to views with a ``throttle_scope`` listed in
+    ``THROTTLE_POLICIES``. Writes shed by admission control are refused before
+    they take a token, so a client retrying after the overload is not also
+    rate limited for it.
+    """
+
+    def allow_request(self, request, view):
+        if request.method in SAFE_METHODS:
+            return True
+        scope = getattr(view, 'throttle_scope', None)
+        policy = settings.THROTTLE_POLICIES.get(scope)
+        if policy is None:
+            return True
+
+        if should_shed():
+            _record(scope, 'shed')
+            self.wait_seconds = settings.ADMISSION_RETRY_AFTER
+            return False
+
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+        self.wait_seconds = get_bucket_store().take(f'{scope}:{ident}', policy['rate'], policy['burst'])
+        _record(scope, 'throttled' if self.wait_seconds else 'allowed')
+        return not self.wait_seconds
+
+    def wait(self):
+        return self.wait_seconds
+
+
+def throttle_stats():
+    with _stats_lock:
+        counts = dict(_stats)
+    scopes = {}
+    for (scope, outcome), count in counts.items():
+        scopes.setdefault(scope, {'allowed': 0, 'throttled': 0, 'shed': 0})[outcome] = count
+    return {
+        'backend': settings.THROTTLE_BACKEND,
+        'dbLatencyMs': round(db_latency.value, 2),
+        'scopes': scopes,
+    }
+
+
+def reset_throttling():
+    """Forget every local bucket, statistic and latency sample (tests use this)."""
+    _local_store.clear()
+    db_latency.reset()
+    with _stats_lock:
+        _stats.clear()
@@ -14,13 +14,22 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
+from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
+from .views import HealthView, MetricsView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('api/ops/health/', HealthView.as_view(), name='ops-health'),
+    path('api/ops/metrics/', MetricsView.as_view(), name='ops-metrics'),
     path('api/', include('users.urls')),
     path('api/', include('posts.urls')),
     path('api/', include('friends.urls')),
     path('api/', include('groups.urls')),
+    path('api/', include('tags.urls')),
 ]
+
+urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
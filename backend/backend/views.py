@@ -0,0 +1,36 @@
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from outbox.worker import outbox_stats
+from .db import check_databases, pool_stats
+from .singleflight import singleflight_stats
+from .throttling import throttle_stats
+
+
+class HealthView(APIView):
+    permission_classes = [permissions.AllowAny]
+    authentication_classes = []
+
+    def get(self, request, *args, **kwargs):
+        databases = check_databases()
+        healthy = all(result['ok'] for result in databases.values())
+        return Response(
+            {'databases': databases},
+            status=status.HTTP_200_OK if healthy else status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+
+
+class MetricsView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response(
+            {
+                'databasePools': pool_stats(),
+                'throttling': throttle_stats(),
+                'singleFlight': singleflight_stats(),
+                'outbox': outbox_stats(),
+            },
+            status=status.HTTP_200_OK,
+        )
@@ -0,0 +1,35 @@
+"""
+Per-user cache of friend list pages.
+
+Every cached page key embeds the owner's current list version, so bumping the
+version on a friendship change retires all of that user's pages at once.
+Pages are only cached with ``SHARED_CACHE``, so every process sees the bump.
+"""
+import time
+
+from django.core.cache import cache
+
+
+PAGE_TIMEOUT = 300
+
+
+def _version_key(user_id):
+    return f'friends:list-version:{user_id}'
+
+
+def friend_list_version(user_id):
+    version = cache.get(_version_key(user_id))
+    if version is None:
+        version = time.time_ns()
+        cache.add(_version_key(user_id), version, timeout=None)
+        version = cache.get(_version_key(user_id), version)
+    return version
+
+
+def friend_list_page_key(user_id, cursor):
+    return f'friends:list:{user_id}:{friend_list_version(user_id)}:{cursor or ""}'
+
+
+def invalidate_friend_lists(*user_ids):
+    version = time.time_ns()
+    cache.set_many({_version_key(user_id): version for user_id in user_ids}, timeout=None)
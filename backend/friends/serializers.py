@@ -1,6 +1,7 @@
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
 
+from users.fields import ProfilePictureField
 from .models import FriendRequest
 
 
@@ -10,7 +11,7 @@ User = get_user_model()
 class UserSummarySerializer(serializers.ModelSerializer):
     firstName = serializers.CharField(source='first_name', read_only=True)
     lastName = serializers.CharField(source='last_name', read_only=True)
-    profilePicture = serializers.ImageField(source='profile_picture', read_only=True)
+    profilePicture = ProfilePictureField(read_only=True)
 
     class Meta:
         model = User
@@ -26,7 +27,7 @@ class UserSummarySerializer(serializers.ModelSerializer):
 class FriendSearchResultSerializer(serializers.ModelSerializer):
     firstName = serializers.CharField(source='first_name', read_only=True)
     lastName = serializers.CharField(source='last_name', read_only=True)
-    profilePicture = serializers.ImageField(source='profile_picture', read_only=True)
+    profilePicture = ProfilePictureField(read_only=True)
     relationshipStatus = serializers.SerializerMethodField()
 
     class Meta:
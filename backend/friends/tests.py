@@ -1,9 +1,14 @@
+from unittest.mock import patch
+
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 
 from .models import FriendRequest
+from .views import FriendListPagination
 
 User = get_user_model()
 
@@ -169,3 +174,64 @@ class FriendRequestListViewTests(APITestCase):
         request_data = response.data[0]
         self.assertEqual(request_data['receiver']['username'], 'karl')
         self.assertEqual(request_data['status'], FriendRequest.Status.PENDING)
+
+
+class FriendListViewTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='alice',
+            email='alice@example.com',
+            password='password123',
+        )
+        for name in ['dave', 'bob', 'carol']:
+            friend = User.objects.create_user(
+                username=name,
+                email=f'{name}@example.com',
+                password='password123',
+            )
+            self.user.add_friend(friend)
+        self.pending = User.objects.create_user(
+            username='erin',
+            email='erin@example.com',
+            password='password123',
+        )
+        self.friend_request = FriendRequest.objects.create(sender=self.pending, receiver=self.user)
+
+        self.url = reverse('friends:friend-list')
+        self.client.force_authenticate(self.user)
+
+    @patch.object(FriendListPagination, 'page_size', 2)
+    def test_pages_follow_username_order(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['username'] for item in response.data['results']], ['bob', 'carol'])
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual([item['username'] for item in response.data['results']], ['dave'])
+        self.assertIsNone(response.data['next'])
+
+    def test_pages_are_not_cached_without_a_shared_cache(self):
+        self.assertEqual(len(self.client.get(self.url).data['results']), 3)
+        # Another process befriended them; this one never saw the invalidation.
+        self.user.friends.add(self.pending)
+        self.assertEqual(len(self.client.get(self.url).data['results']), 4)
+
+    @override_settings(SHARED_CACHE=True)
+    def test_accepting_request_updates_counts_and_cached_list(self):
+        self.assertEqual(len(self.client.get(self.url).data['results']), 3)
+
+        respond_url = reverse('friends:friend-request-respond', args=[self.friend_request.pk])
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(respond_url, {'action': 'accept'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.post(respond_url, {'action': 'accept'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.user.refresh_from_db()
+        self.pending.refresh_from_db()
+        self.assertEqual(self.user.friends_count, 4)
+        self.assertEqual(self.pending.friends_count, 1)
+        self.assertEqual(len(self.client.get(self.url).data['results']), 4)
@@ -1,11 +1,18 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db.models import Q
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
 from django.shortcuts import get_object_or_404
 from rest_framework import generics, permissions, status
 from rest_framework.exceptions import PermissionDenied
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from backend.pagination import KeysetPagination
+from backend.db_routers import replica_configured
+from backend.replicas import ReplicaReadMixin, pin_to_primary
+from .cache import PAGE_TIMEOUT, friend_list_page_key
 from .models import FriendRequest
 from .serializers import (
     FriendRequestCreateSerializer,
@@ -18,7 +25,12 @@ from .serializers import (
 User = get_user_model()
 
 
-class FriendSearchView(generics.ListAPIView):
+def _friend_ids(user):
+    # Query the friendship table directly so request.user never has to be loaded.
+    return User.friends.through.objects.filter(from_user_id=user.pk).values_list('to_user_id', flat=True)
+
+
+class FriendSearchView(ReplicaReadMixin, generics.ListAPIView):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = FriendSearchResultSerializer
 
@@ -34,7 +46,7 @@ class FriendSearchView(generics.ListAPIView):
                 | Q(last_name__icontains=query)
             )
         else:
-            queryset = queryset.exclude(pk__in=user.friends.values_list('pk', flat=True))
+            queryset = queryset.exclude(pk__in=_friend_ids(user))
 
         queryset = queryset.order_by('username')
 
@@ -48,7 +60,7 @@ class FriendSearchView(generics.ListAPIView):
         user = self.request.user
         context.update(
             {
-                'friends_ids': set(user.friends.values_list('id', flat=True)),
+                'friends_ids': set(_friend_ids(user)),
                 'outgoing_pending_ids': set(
                     FriendRequest.objects.filter(
                         sender=user,
@@ -66,16 +78,42 @@ class FriendSearchView(generics.ListAPIView):
         return context
 
 
-class FriendListView(generics.ListAPIView):
+class FriendListPagination(KeysetPagination):
+    ordering = ('username', 'id')
+    page_size = 50
+
+
+class FriendListView(ReplicaReadMixin, generics.ListAPIView):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = UserSummarySerializer
+    pagination_class = FriendListPagination
 
     def get_queryset(self):
-        return self.request.user.friends.all().order_by('username')
+        # A semi-join lets the planner walk the (username, id) covering index
+        # and stop after one page instead of sorting the whole friend list.
+        friendship = User.friends.through.objects.filter(
+            from_user_id=self.request.user.pk,
+            to_user_id=OuterRef('pk'),
+        )
+        return User.objects.filter(Exists(friendship)).only(
+            'id', 'username', 'first_name', 'last_name', 'profile_picture', 'profile_picture_thumb',
+        )
+
+    def list(self, request, *args, **kwargs):
+        if not settings.SHARED_CACHE:
+            return super().list(request, *args, **kwargs)
+        key = friend_list_page_key(request.user.pk, request.query_params.get('cursor'))
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+        response = super().list(request, *args, **kwargs)
+        cache.set(key, response.data, PAGE_TIMEOUT)
+        return response
 
 
 class FriendRequestListCreateView(generics.ListCreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = 'friend_requests'
 
     def get_queryset(self):
         direction = self.request.query_params.get('direction', 'incoming')
@@ -131,9 +169,11 @@ class FriendRequestDetailView(generics.RetrieveDestroyAPIView):
 class FriendRequestRespondView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
+    @transaction.atomic
     def post(self, request, pk):
+        # Lock the request so two concurrent accepts cannot both befriend and count.
         friend_request = get_object_or_404(
-            FriendRequest.objects.select_related('sender', 'receiver'),
+            FriendRequest.objects.select_for_update(of=('self',)).select_related('sender', 'receiver'),
             pk=pk,
         )
         if friend_request.receiver != request.user:
@@ -149,7 +189,10 @@ class FriendRequestRespondView(APIView):
         action = serializer.validated_data['action']
         if action == 'accept':
             friend_request.mark_accepted()
-            request.user.friends.add(friend_request.sender)
+            friend_request.receiver.add_friend(friend_request.sender)
+            if replica_configured():
+                # The sender's next friend list page is cached, so it must not come from a lagging replica.
+                pin_to_primary(friend_request.sender_id)
         else:
             friend_request.mark_rejected()
 
@@ -1,13 +1,20 @@
 from django.contrib import admin
 
+from users.deletion import schedule_group_deletion
 from .models import Group, GroupMembership
 
 
 @admin.register(Group)
 class GroupAdmin(admin.ModelAdmin):
-    list_display = ('id', 'name', 'owner', 'created_at')
+    list_display = ('id', 'name', 'owner', 'created_at', 'deleted_at')
     search_fields = ('name', 'owner__username')
     list_filter = ('created_at',)
+    actions = ['schedule_deletion']
+
+    @admin.action(description='Remove and delete in the background')
+    def schedule_deletion(self, request, queryset):
+        for group in queryset:
+            schedule_group_deletion(group)
 
 
 @admin.register(GroupMembership)
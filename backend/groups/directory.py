@@ -0,0 +1,156 @@
+"""
+Denormalized data behind the group directory.
+
+``Group.members_count`` and ``Group.last_post_at`` back the "members" and
+"activity" sorts. ``GroupFriendCount`` records, for each user, how many of
+their friends belong to each group, and backs the "groups your friends are
+in" sort without joining friendships to memberships per request. Membership,
+friendship and group post writes keep all three current through the
+functions below; ``rebuild_directory()`` recomputes them from scratch.
+"""
+from collections import Counter, defaultdict
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from backend.conditional import bump_versions
+from posts.models import Post
+from .membership import invalidate_member_groups
+from .models import Group, GroupFriendCount, GroupMembership
+from .scopes import GROUPS
+
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def record_joins(group_id, user_ids):
+    """``user_ids`` have just become members of ``group_id``."""
+    _record_membership(group_id, user_ids, 1)
+
+
+def record_leaves(group_id, user_ids):
+    """``user_ids`` have just stopped being members of ``group_id``."""
+    _record_membership(group_id, user_ids, -1)
+
+
+def _record_membership(group_id, user_ids, sign):
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+    Group.objects.filter(pk=group_id).update(
+        members_count=Greatest(F('members_count') + sign * len(user_ids), 0)
+    )
+    # Each friend of a member counts them once in this group.
+    friendships = get_user_model().friends.through.objects.filter(from_user_id__in=user_ids)
+    friends = Counter(friendships.values_list('to_user_id', flat=True))
+    _adjust_friend_counts(group_id, {user_id: sign * n for user_id, n in friends.items()})
+    invalidate_member_groups(*user_ids)
+    bump_versions(GROUPS)
+
+
+def record_friendship(user_id, friend_id):
+    """Two users have just become friends: each now has a friend in the other's groups."""
+    memberships = GroupMembership.objects.filter(user_id__in=[user_id, friend_id])
+    for member_id, group_id in memberships.values_list('user_id', 'group_id'):
+        friend = friend_id if member_id == user_id else user_id
+        _adjust_friend_counts(group_id, {friend: 1})
+    bump_versions(GROUPS)
+
+
+def record_group_posts(posts):
+    """Move ``last_post_at`` forward for the groups ``posts`` were written in."""
+    latest = {}
+    for post in posts:
+        if post.group_id and (post.group_id not in latest or post.created_at > latest[post.group_id]):
+            latest[post.group_id] = post.created_at
+    for group_id, created_at in latest.items():
+        advance_last_post(group_id, created_at)
+
+
+def advance_last_post(group_id, created_at):
+    """A post written at ``created_at`` appeared in ``group_id``."""
+    if Group.objects.filter(pk=group_id, last_post_at__lt=created_at).update(last_post_at=created_at):
+        bump_versions(GROUPS)
+
+
+def _adjust_friend_counts(group_id, deltas):
+    """Move each ``deltas[user_id]`` onto that user's count for ``group_id``; rows at zero are removed."""
+    deltas = {user_id: delta for user_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    rows = GroupFriendCount.objects.filter(group_id=group_id)
+    existing = set(rows.filter(user_id__in=deltas).values_list('user_id', flat=True))
+
+    # Almost every delta is +1 or -1, so this is one UPDATE per distinct value.
+    by_delta = defaultdict(list)
+    for user_id in existing:
+        by_delta[deltas[user_id]].append(user_id)
+    for delta, users in by_delta.items():
+        rows.filter(user_id__in=users).update(friends_count=Greatest(F('friends_count') + delta, 0))
+    if any(delta < 0 for delta in by_delta):
+        rows.filter(user_id__in=existing, friends_count=0).delete()
+
+    GroupFriendCount.objects.bulk_create(
+        [
+            GroupFriendCount(user_id=user_id, group_id=group_id, friends_count=delta)
+            for user_id, delta in deltas.items()
+            if user_id not in existing and delta > 0
+        ],
+        ignore_conflicts=True,
+        batch_size=DEFAULT_BATCH_SIZE,
+    )
+
+
+def rebuild_directory(batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Recompute member counts and last post times with one UPDATE each, and
+    friend counts in batches of users. Returns the number of groups and of
+    friend count rows written.
+    """
+    members = (
+        GroupMembership.objects.filter(group_id=OuterRef('pk'))
+        .order_by()
+        .values('group_id')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    newest = (
+        Post.objects.filter(group_id=OuterRef('pk'))
+        .order_by()
+        .values('group_id')
+        .annotate(newest=Max('created_at'))
+        .values('newest')
+    )
+    groups = Group.objects.update(
+        members_count=Coalesce(Subquery(members), 0),
+        last_post_at=Coalesce(Subquery(newest), F('created_at')),
+    )
+
+    Friendship = get_user_model().friends.through
+    users = get_user_model().objects.order_by('pk').values_list('pk', flat=True)
+    written = 0
+    last_id = 0
+    while True:
+        batch = list(users.filter(pk__gt=last_id)[:batch_size])
+        if not batch:
+            break
+        last_id = batch[-1]
+        counts = (
+            Friendship.objects.filter(from_user_id__in=batch, to_user__group_memberships__isnull=False)
+            .order_by()
+            .values_list('from_user_id', 'to_user__group_memberships__group_id')
+            .annotate(total=Count('pk'))
+        )
+        with transaction.atomic():
+            GroupFriendCount.objects.filter(user_id__in=batch).delete()
+            created = GroupFriendCount.objects.bulk_create(
+                [
+                    GroupFriendCount(user_id=user_id, group_id=group_id, friends_count=total)
+                    for user_id, group_id, total in counts
+                ],
+                batch_size=batch_size,
+            )
+        written += len(created)
+    return groups, written
@@ -0,0 +1,12 @@
+"""Group directory columns moved by outbox events (see posts.events)."""
+from django.utils.dateparse import parse_datetime
+
+from outbox.events import subscribe
+from posts.events import POST_CREATED
+from .directory import advance_last_post
+
+
+@subscribe(POST_CREATED)
+def record_group_post(payload):
+    if payload['group'] is not None:
+        advance_last_post(payload['group'], parse_datetime(payload['createdAt']))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from groups.directory import DEFAULT_BATCH_SIZE, rebuild_directory
+
+
+class Command(BaseCommand):
+    help = 'Recompute the member counts, last post times and friend counts behind the group directory'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Number of users whose friend counts are recomputed per batch',
+        )
+
+    def handle(self, *args, **options):
+        groups, written = rebuild_directory(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'✓ Rebuilt {groups} groups and {written} friend counts'))
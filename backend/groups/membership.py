@@ -0,0 +1,39 @@
+"""
+Per-user cache of group memberships.
+
+Group listings mark and filter the groups the viewer belongs to. The ids of a
+user's active groups are kept in the shared cache; anything that adds or
+removes a membership calls ``invalidate_member_groups()`` for the users
+involved. Access to posts is never decided from this cache: it is checked
+against ``GroupMembership`` in the query that loads them.
+"""
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import GroupMembership
+
+
+MEMBER_GROUPS_TIMEOUT = 300
+
+
+def _member_groups_key(user_id):
+    return f'groups:member-of:{user_id}'
+
+
+def member_group_ids(user_id):
+    """Ids of the active groups ``user_id`` belongs to, as a frozenset."""
+    key = _member_groups_key(user_id)
+    group_ids = cache.get(key)
+    if group_ids is None:
+        group_ids = frozenset(
+            GroupMembership.objects.filter(user_id=user_id, group__deleted_at__isnull=True)
+            .values_list('group_id', flat=True)
+        )
+        cache.set(key, group_ids, MEMBER_GROUPS_TIMEOUT)
+    return group_ids
+
+
+def invalidate_member_groups(*user_ids):
+    """Forget the cached groups of ``user_ids`` once the current transaction commits."""
+    keys = [_member_groups_key(user_id) for user_id in user_ids]
+    transaction.on_commit(lambda: cache.delete_many(keys))
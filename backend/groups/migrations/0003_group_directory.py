@@ -0,0 +1,109 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:42
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, F, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_group_directory(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    Group = apps.get_model('groups', 'Group')
+    GroupMembership = apps.get_model('groups', 'GroupMembership')
+    GroupFriendCount = apps.get_model('groups', 'GroupFriendCount')
+    Post = apps.get_model('posts', 'Post')
+
+    members = (
+        GroupMembership.objects.filter(group_id=OuterRef('pk'))
+        .order_by()
+        .values('group_id')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    newest = (
+        Post.objects.filter(group_id=OuterRef('pk'))
+        .order_by()
+        .values('group_id')
+        .annotate(newest=Max('created_at'))
+        .values('newest')
+    )
+    Group.objects.update(
+        members_count=Coalesce(Subquery(members), 0),
+        last_post_at=Coalesce(Subquery(newest), F('created_at')),
+    )
+
+    counts = (
+        User.friends.through.objects.filter(to_user__group_memberships__isnull=False)
+        .order_by()
+        .values_list('from_user_id', 'to_user__group_memberships__group_id')
+        .annotate(total=Count('pk'))
+    )
+    GroupFriendCount.objects.bulk_create(
+        (
+            GroupFriendCount(user_id=user_id, group_id=group_id, friends_count=total)
+            for user_id, group_id, total in counts.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('groups', '0002_group_deleted_at'),
+        ('posts', '0009_post_author_timeline_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupFriendCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('friends_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='group',
+            name='last_post_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='group',
+            name='members_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='group',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['-created_at', '-id'], name='groups_group_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='group',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['-members_count', '-id'], name='groups_group_members_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='group',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['-last_post_at', '-id'], name='groups_group_activity_idx'),
+        ),
+        migrations.AddField(
+            model_name='groupfriendcount',
+            name='group',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='friend_counts', to='groups.group'),
+        ),
+        migrations.AddField(
+            model_name='groupfriendcount',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='group_friend_counts', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='groupfriendcount',
+            index=models.Index(fields=['user', '-friends_count', '-group'], name='groups_friendcount_rank_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='groupfriendcount',
+            constraint=models.UniqueConstraint(fields=('user', 'group'), name='unique_group_friend_count'),
+        ),
+        migrations.RunPython(backfill_group_directory, migrations.RunPython.noop),
+    ]
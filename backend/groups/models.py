@@ -3,6 +3,11 @@ from django.db import models
 from django.utils import timezone
 
 
+class GroupQuerySet(models.QuerySet):
+    def active(self):
+        return self.filter(deleted_at__isnull=True)
+
+
 class Group(models.Model):
     name = models.CharField(max_length=255, unique=True)
     description = models.TextField(blank=True)
@@ -18,9 +23,36 @@ class Group(models.Model):
         related_name='member_groups',
         blank=True,
     )
+    # Set when the group is scheduled for deletion; rows are purged in the background.
+    deleted_at = models.DateTimeField(blank=True, null=True)
+
+    # Denormalized for the directory sorts; maintained by groups.directory.
+    members_count = models.PositiveIntegerField(default=0)
+    # Time of the newest post, or of creation until the first post.
+    last_post_at = models.DateTimeField(default=timezone.now)
+
+    objects = GroupQuerySet.as_manager()
 
     class Meta:
         ordering = ['name']
+        # One index per directory sort, over active groups only.
+        indexes = [
+            models.Index(
+                fields=['-created_at', '-id'],
+                condition=models.Q(deleted_at__isnull=True),
+                name='groups_group_recent_idx',
+            ),
+            models.Index(
+                fields=['-members_count', '-id'],
+                condition=models.Q(deleted_at__isnull=True),
+                name='groups_group_members_idx',
+            ),
+            models.Index(
+                fields=['-last_post_at', '-id'],
+                condition=models.Q(deleted_at__isnull=True),
+                name='groups_group_activity_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -56,3 +88,30 @@ class GroupMembership(models.Model):
     def __str__(self):
         return f'{self.user} in {self.group} ({self.role})'
 
+
+class GroupFriendCount(models.Model):
+    """How many of ``user``'s friends belong to ``group``; rows exist only while that is above zero."""
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name='group_friend_counts',
+        on_delete=models.CASCADE,
+    )
+    group = models.ForeignKey(
+        Group,
+        related_name='friend_counts',
+        on_delete=models.CASCADE,
+    )
+    friends_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'group'], name='unique_group_friend_count'),
+        ]
+        indexes = [
+            # "Groups your friends are in", most friends first.
+            models.Index(fields=['user', '-friends_count', '-group'], name='groups_friendcount_rank_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.friends_count} friends of {self.user_id} in {self.group_id}'
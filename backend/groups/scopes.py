@@ -0,0 +1,11 @@
+"""Version scopes for conditional GETs of groups (see backend.conditional)."""
+from posts.scopes import USERS
+
+
+# Group listings embed member counts and the viewer's membership, so any
+# group or membership change bumps this single scope.
+GROUPS = 'groups'
+
+
+def group_scopes():
+    return [GROUPS, USERS]
@@ -1,17 +1,24 @@
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
 
+from backend.fieldsets import IncludableMixin, SparseFieldsetMixin
 from posts.serializers import PostSerializer
+from users.fields import ProfilePictureField
+from users.stats import adjust_stats
+from .directory import record_joins
+from .membership import member_group_ids
 from .models import Group, GroupMembership
 
 
 User = get_user_model()
 
+MAX_BULK_MEMBERS = 500
 
-class GroupUserSerializer(serializers.ModelSerializer):
+
+class GroupUserSerializer(IncludableMixin, SparseFieldsetMixin, serializers.ModelSerializer):
     firstName = serializers.CharField(source='first_name', read_only=True)
     lastName = serializers.CharField(source='last_name', read_only=True)
-    profilePicture = serializers.ImageField(source='profile_picture', read_only=True)
+    profilePicture = ProfilePictureField(read_only=True)
 
     class Meta:
         model = User
@@ -24,9 +31,11 @@ class GroupUserSerializer(serializers.ModelSerializer):
         ]
 
 
-class GroupSerializer(serializers.ModelSerializer):
+class GroupSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     owner = GroupUserSerializer(read_only=True)
-    membersCount = serializers.SerializerMethodField()
+    membersCount = serializers.IntegerField(source='members_count', read_only=True)
+    lastPostAt = serializers.DateTimeField(source='last_post_at', read_only=True)
+    friendsInGroup = serializers.SerializerMethodField()
     isMember = serializers.SerializerMethodField()
     isOwner = serializers.SerializerMethodField()
 
@@ -38,6 +47,8 @@ class GroupSerializer(serializers.ModelSerializer):
             'description',
             'owner',
             'membersCount',
+            'lastPostAt',
+            'friendsInGroup',
             'isMember',
             'isOwner',
             'created_at',
@@ -46,18 +57,21 @@ class GroupSerializer(serializers.ModelSerializer):
             'id',
             'owner',
             'membersCount',
+            'lastPostAt',
+            'friendsInGroup',
             'isMember',
             'isOwner',
             'created_at',
         ]
 
-    def get_membersCount(self, obj):
-        return obj.members.count()
+    def get_friendsInGroup(self, obj):
+        # Only the "friends" directory sort knows this; elsewhere it is null.
+        return getattr(obj, 'friends_in_group', None)
 
     def get_isMember(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            return obj.members.filter(pk=request.user.pk).exists()
+            return obj.pk in member_group_ids(request.user.pk)
         return False
 
     def get_isOwner(self, obj):
@@ -88,6 +102,9 @@ class GroupCreateSerializer(serializers.ModelSerializer):
             user=request.user,
             role=GroupMembership.Role.OWNER,
         )
+        adjust_stats('groups_count', {request.user.pk: 1})
+        record_joins(group.pk, [request.user.pk])
+        group.refresh_from_db(fields=['members_count'])
         return group
 
 
@@ -105,6 +122,25 @@ class GroupMembershipSerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
 
+class GroupMembersBulkSerializer(serializers.Serializer):
+    userIds = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=MAX_BULK_MEMBERS,
+    )
+    role = serializers.ChoiceField(
+        choices=[GroupMembership.Role.ADMIN, GroupMembership.Role.MEMBER],
+        default=GroupMembership.Role.MEMBER,
+    )
+
+    def validate_userIds(self, value):
+        return list(dict.fromkeys(value))
+
+
+class GroupMembersRoleSerializer(GroupMembersBulkSerializer):
+    role = serializers.ChoiceField(choices=[GroupMembership.Role.ADMIN, GroupMembership.Role.MEMBER])
+
+
 class GroupPostSerializer(PostSerializer):
     class Meta(PostSerializer.Meta):
         read_only_fields = PostSerializer.Meta.read_only_fields
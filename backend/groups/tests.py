@@ -1,3 +1,239 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from backend.throttling import reset_throttling
+from outbox.worker import drain
+from .directory import rebuild_directory
+from .models import Group, GroupFriendCount, GroupMembership
+from .views import GroupDirectoryPagination
+
+
+User = get_user_model()
+
+
+class GroupDirectoryTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        reset_throttling()
+        self.viewer, self.alice, self.bob, self.carol = [
+            User.objects.create_user(username=name, email=f'{name}@example.com', password='password123')
+            for name in ('viewer', 'alice', 'bob', 'carol')
+        ]
+        self.url = reverse('groups:group-list-create')
+
+    def create_group(self, owner, name):
+        self.client.force_authenticate(owner)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, {'name': name, 'description': ''}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return Group.objects.get(name=name)
+
+    def join(self, user, group):
+        self.client.force_authenticate(user)
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(reverse('groups:group-join', args=[group.pk]))
+
+    def leave(self, user, group):
+        self.client.force_authenticate(user)
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(reverse('groups:group-leave', args=[group.pk]))
+
+    def names(self, query=''):
+        self.client.force_authenticate(self.viewer)
+        response = self.client.get(f'{self.url}{query}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [group['name'] for group in response.data['results']]
+
+    def friend_counts(self):
+        return set(GroupFriendCount.objects.values_list('user_id', 'group_id', 'friends_count'))
+
+    def test_members_sort_follows_joins_and_leaves(self):
+        small = self.create_group(self.alice, 'Small')
+        big = self.create_group(self.alice, 'Big')
+        response = self.join(self.bob, big)
+        self.assertEqual(response.data['membersCount'], 2)
+        self.join(self.carol, big)
+        self.assertEqual(self.names('?sort=members'), ['Big', 'Small'])
+
+        self.leave(self.bob, big)
+        self.leave(self.carol, big)
+        self.join(self.bob, small)
+        self.assertEqual(self.names('?sort=members'), ['Small', 'Big'])
+        self.assertEqual(Group.objects.get(pk=small.pk).members_count, 2)
+
+    def test_activity_sort_follows_group_posts(self):
+        quiet = self.create_group(self.alice, 'Quiet')
+        self.create_group(self.alice, 'Newer')
+        self.assertEqual(self.names('?sort=activity'), ['Newer', 'Quiet'])
+
+        self.client.force_authenticate(self.alice)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('groups:group-posts', args=[quiet.pk]), {'content': 'Hello'}, format='json')
+        self.assertEqual(self.names('?sort=activity'), ['Newer', 'Quiet'])
+        with self.captureOnCommitCallbacks(execute=True):
+            drain()
+        self.assertEqual(self.names('?sort=activity'), ['Quiet', 'Newer'])
+
+    def test_friends_sort_ranks_groups_by_friends_in_them(self):
+        one = self.create_group(self.alice, 'One friend')
+        two = self.create_group(self.bob, 'Two friends')
+        self.create_group(self.carol, 'Strangers only')
+        self.join(self.alice, two)
+        self.viewer.add_friend(self.alice)
+        self.viewer.add_friend(self.bob)
+
+        self.client.force_authenticate(self.viewer)
+        results = self.client.get(f'{self.url}?sort=friends').data['results']
+        self.assertEqual([(group['id'], group['friendsInGroup']) for group in results], [(two.pk, 2), (one.pk, 1)])
+
+        self.leave(self.alice, two)
+        self.client.force_authenticate(self.viewer)
+        results = self.client.get(f'{self.url}?sort=friends').data['results']
+        # Ties fall back to the newest group.
+        self.assertEqual([(group['id'], group['friendsInGroup']) for group in results], [(two.pk, 1), (one.pk, 1)])
+        self.assertIsNone(self.client.get(self.url).data['results'][0]['friendsInGroup'])
+
+    def test_incremental_counts_match_a_rebuild(self):
+        one = self.create_group(self.alice, 'One')
+        two = self.create_group(self.bob, 'Two')
+        self.viewer.add_friend(self.alice)
+        self.carol.add_friend(self.alice)
+        self.join(self.carol, one)
+        self.join(self.alice, two)
+        self.carol.add_friend(self.bob)
+        self.leave(self.alice, two)
+        self.join(self.viewer, two)
+
+        counts = self.friend_counts()
+        members = dict(Group.objects.values_list('pk', 'members_count'))
+        Group.objects.update(members_count=0, last_post_at=timezone.now() + timedelta(days=1))
+        GroupFriendCount.objects.all().delete()
+        rebuild_directory(batch_size=2)
+        self.assertEqual(self.friend_counts(), counts)
+        self.assertEqual(dict(Group.objects.values_list('pk', 'members_count')), members)
+        self.assertEqual(Group.objects.get(pk=two.pk).last_post_at, two.created_at)
+
+    @mock.patch.object(GroupDirectoryPagination, 'page_size', 1)
+    def test_cursor_walks_each_sort(self):
+        for name in ('A', 'B', 'C'):
+            group = self.create_group(self.alice, name)
+            GroupMembership.objects.create(group=group, user=self.viewer)
+        self.viewer.add_friend(self.alice)
+
+        for sort in GroupDirectoryPagination.orderings:
+            names = []
+            url = f'{self.url}?sort={sort}'
+            while url:
+                data = self.client.get(url).data
+                names += [group['name'] for group in data['results']]
+                url = data['next']
+            self.assertEqual(names, ['C', 'B', 'A'], sort)
+
+    def test_group_posts_check_membership_in_the_database(self):
+        group = self.create_group(self.alice, 'Private')
+        self.join(self.viewer, group)
+        url = reverse('groups:group-posts', args=[group.pk])
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+
+        # Removed elsewhere: this process still has the viewer's groups cached.
+        GroupMembership.objects.filter(group=group, user=self.viewer).delete()
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+        response = self.client.post(url, {'content': 'Hello'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_filters_and_validation(self):
+        mine = self.create_group(self.alice, 'Mine')
+        self.create_group(self.alice, 'Theirs')
+        self.join(self.viewer, mine)
+        self.assertEqual(self.names('?member=1'), ['Mine'])
+        self.assertEqual(self.names('?search=the'), ['Theirs'])
+
+        response = self.client.get(f'{self.url}?sort=oldest')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        with mock.patch.object(GroupDirectoryPagination, 'page_size', 1):
+            next_url = self.client.get(f'{self.url}?sort=members').data['next']
+        response = self.client.get(next_url.replace('sort=members', 'sort=recent'))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class GroupMembersBulkTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(username='owner', email='owner@example.com', password='password123')
+        self.users = [
+            User.objects.create_user(username=f'user{i}', email=f'user{i}@example.com', password='password123')
+            for i in range(4)
+        ]
+        self.client.force_authenticate(self.owner)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('groups:group-list-create'), {'name': 'Club', 'description': ''}, format='json')
+        self.group = Group.objects.get(name='Club')
+        self.url = reverse('groups:group-members-bulk', args=[self.group.pk])
+        self.ids = [user.pk for user in self.users]
+
+    def send(self, method, data):
+        with self.captureOnCommitCallbacks(execute=True):
+            return getattr(self.client, method)(self.url, data, format='json')
+
+    def members(self):
+        return dict(self.group.group_memberships.values_list('user_id', 'role'))
+
+    def test_add_change_roles_and_remove(self):
+        response = self.send('post', {'userIds': self.ids[:3] + [self.owner.pk, 9999]})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['added'], self.ids[:3])
+        self.assertEqual(response.data['skipped'], [self.owner.pk])
+        self.assertEqual(response.data['missing'], [9999])
+        self.assertEqual(response.data['membersCount'], 4)
+        self.users[0].stats.refresh_from_db()
+        self.assertEqual(self.users[0].stats.groups_count, 1)
+
+        response = self.send('patch', {'userIds': [self.ids[0], self.owner.pk], 'role': 'admin'})
+        self.assertEqual(response.data['updated'], [self.ids[0]])
+        self.assertEqual(response.data['skipped'], [self.owner.pk])
+        self.assertEqual(self.members()[self.ids[0]], GroupMembership.Role.ADMIN)
+        self.assertEqual(self.members()[self.owner.pk], GroupMembership.Role.OWNER)
+
+        response = self.send('delete', {'userIds': [self.ids[0], self.ids[1], self.ids[3], self.owner.pk]})
+        self.assertEqual(response.data['removed'], self.ids[:2])
+        self.assertEqual(response.data['skipped'], [self.ids[3], self.owner.pk])
+        self.assertEqual(response.data['membersCount'], 2)
+        self.assertEqual(set(self.members()), {self.owner.pk, self.ids[2]})
+        self.users[0].stats.refresh_from_db()
+        self.assertEqual(self.users[0].stats.groups_count, 0)
+
+    def test_add_runs_a_fixed_number_of_queries(self):
+        for size in (4, 40):
+            users = [
+                User.objects.create_user(username=f'batch{size}-{i}', email=f'batch{size}-{i}@example.com')
+                for i in range(size)
+            ]
+            users[0].add_friend(users[1])
+            with self.assertNumQueries(12):
+                self.send('post', {'userIds': [user.pk for user in users]})
+
+    def test_membership_caches_and_directory_follow_the_batch(self):
+        self.client.force_authenticate(self.users[0])
+        self.assertFalse(self.client.get(reverse('groups:group-detail', args=[self.group.pk])).data['isMember'])
+        self.client.force_authenticate(self.owner)
+        self.send('post', {'userIds': self.ids})
+        self.client.force_authenticate(self.users[0])
+        self.assertTrue(self.client.get(reverse('groups:group-detail', args=[self.group.pk])).data['isMember'])
+
+        members = self.group.group_memberships.count()
+        self.assertEqual(Group.objects.get(pk=self.group.pk).members_count, members)
+
+    def test_only_the_owner_may_manage_members(self):
+        self.client.force_authenticate(self.users[0])
+        self.assertEqual(self.send('post', {'userIds': self.ids}).status_code, status.HTTP_403_FORBIDDEN)
+        self.client.force_authenticate(self.owner)
+        self.assertEqual(self.send('post', {'userIds': []}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.send('patch', {'userIds': self.ids}).status_code, status.HTTP_400_BAD_REQUEST)
@@ -6,6 +6,7 @@ from .views import (
     GroupLeaveView,
     GroupListCreateView,
     GroupMemberRemoveView,
+    GroupMembersBulkView,
     GroupMembersListView,
     GroupPostListCreateView,
 )
@@ -19,6 +20,7 @@ urlpatterns = [
     path('groups/<int:group_id>/members/', GroupMembersListView.as_view(), name='group-members'),
     path('groups/<int:group_id>/join/', GroupJoinView.as_view(), name='group-join'),
     path('groups/<int:group_id>/leave/', GroupLeaveView.as_view(), name='group-leave'),
+    path('groups/<int:group_id>/members/bulk/', GroupMembersBulkView.as_view(), name='group-members-bulk'),
     path('groups/<int:group_id>/members/<int:user_id>/', GroupMemberRemoveView.as_view(), name='group-member-remove'),
     path('groups/<int:group_id>/posts/', GroupPostListCreateView.as_view(), name='group-posts'),
 ]
@@ -1,32 +1,129 @@
-from django.db import models
+from django.contrib.auth import get_user_model
+from django.db import models, transaction
 from django.shortcuts import get_object_or_404
 from rest_framework import generics, permissions, status
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from backend.conditional import ConditionalGetMixin
+from backend.fieldsets import NormalizedResponseMixin
+from backend.pagination import KeysetPagination
+from backend.replicas import ReplicaReadMixin
+from posts.events import post_created
 from posts.models import Post
-from .models import Group, GroupMembership
+from posts.scopes import bump_post, feed_scopes
+from posts.views import CoalescedFeedMixin, ViewerLikeAnnotationMixin, post_prefetches
+from users.deletion import schedule_group_deletion
+from users.stats import adjust_stats
+from .directory import record_joins, record_leaves
+from .membership import member_group_ids
+from .models import Group, GroupFriendCount, GroupMembership
+from .scopes import group_scopes
 from .serializers import (
     GroupCreateSerializer,
+    GroupMembersBulkSerializer,
     GroupMembershipSerializer,
+    GroupMembersRoleSerializer,
     GroupPostSerializer,
     GroupSerializer,
 )
 
 
-class GroupListCreateView(generics.ListCreateAPIView):
+User = get_user_model()
+
+
+class GroupDirectoryPagination(KeysetPagination):
+    """
+    The group directory in one of ``orderings``, each read off its own index.
+    The cursor starts with the sort it was issued for, so it cannot be
+    replayed against another.
+    """
+
+    orderings = {
+        'recent': ('-created_at', '-id'),
+        'members': ('-members_count', '-id'),
+        'activity': ('-last_post_at', '-id'),
+        # Pages of the viewer's GroupFriendCount rows rather than of groups.
+        'friends': ('-friends_count', '-group_id'),
+    }
+    page_size = 20
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.sort = view.get_sort()
+        self.ordering = self.orderings[self.sort]
+        return super().paginate_queryset(queryset, request, view)
+
+    def decode_cursor(self, request):
+        position = super().decode_cursor(request)
+        return position[1:] if position is not None else None
+
+    def get_position(self, row):
+        return [self.sort, *super().get_position(row)]
+
+    def is_valid_position(self, position):
+        return (
+            isinstance(position, list)
+            and len(position) == len(self.ordering) + 1
+            and position[0] == self.sort
+        )
+
+
+class GroupListCreateView(
+    ConditionalGetMixin,
+    NormalizedResponseMixin,
+    ReplicaReadMixin,
+    generics.ListCreateAPIView,
+):
+    """
+    The group directory. ``?sort=`` is ``recent`` (default), ``members``,
+    ``activity`` (latest post) or ``friends`` (groups the most of the viewer's
+    friends are in); ``?search=`` and ``?member=1`` narrow it down.
+    """
+
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = GroupDirectoryPagination
 
-    def get_queryset(self):
-        queryset = Group.objects.select_related('owner').prefetch_related('members')
+    def get_version_scopes(self):
+        return group_scopes()
+
+    def get_sort(self):
+        sort = self.request.query_params.get('sort', 'recent')
+        if sort not in GroupDirectoryPagination.orderings:
+            raise ValidationError({
+                'sort': f'Supported values: {", ".join(GroupDirectoryPagination.orderings)}.'
+            })
+        return sort
+
+    def filter_groups(self, queryset, prefix=''):
         search = self.request.query_params.get('search', None)
         if search:
             queryset = queryset.filter(
-                models.Q(name__icontains=search) |
-                models.Q(description__icontains=search)
+                models.Q(**{f'{prefix}name__icontains': search}) |
+                models.Q(**{f'{prefix}description__icontains': search})
             )
-        return queryset.order_by('-created_at')
+        if self.request.query_params.get('member') in ('1', 'true'):
+            queryset = queryset.filter(**{f'{prefix}pk__in': member_group_ids(self.request.user.pk)})
+        return queryset
+
+    def get_queryset(self):
+        if self.get_sort() == 'friends':
+            queryset = GroupFriendCount.objects.filter(user=self.request.user, group__deleted_at__isnull=True)
+            return self.filter_groups(queryset, prefix='group__')
+        return self.filter_groups(Group.objects.active().select_related('owner'))
+
+    def list(self, request, *args, **kwargs):
+        if self.get_sort() != 'friends':
+            return super().list(request, *args, **kwargs)
+        page = self.paginate_queryset(self.get_queryset())
+        groups = Group.objects.select_related('owner').in_bulk([row.group_id for row in page])
+        ranked = []
+        for row in page:
+            if row.group_id in groups:
+                groups[row.group_id].friends_in_group = row.friends_count
+                ranked.append(groups[row.group_id])
+        serializer = self.get_serializer(ranked, many=True)
+        return self.get_paginated_response(serializer.data)
 
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -38,22 +135,37 @@ class GroupListCreateView(generics.ListCreateAPIView):
         context['request'] = self.request
         return context
 
-    def perform_create(self, serializer):
-        serializer.save()
 
-
-class GroupDetailView(generics.RetrieveAPIView):
+class GroupDetailView(
+    ConditionalGetMixin,
+    NormalizedResponseMixin,
+    ReplicaReadMixin,
+    generics.RetrieveDestroyAPIView,
+):
     permission_classes = [permissions.IsAuthenticated]
-    queryset = Group.objects.select_related('owner').prefetch_related('members')
+    queryset = Group.objects.active().select_related('owner')
     serializer_class = GroupSerializer
 
+    def get_version_scopes(self):
+        return group_scopes()
+
+    def destroy(self, request, *args, **kwargs):
+        group = self.get_object()
+        if group.owner_id != request.user.pk:
+            raise PermissionDenied('Only the group owner can delete this group.')
+        schedule_group_deletion(group)
+        return Response(
+            {'detail': 'The group has been removed and its content will be deleted shortly.'},
+            status=status.HTTP_202_ACCEPTED,
+        )
 
-class GroupMembersListView(generics.ListAPIView):
+
+class GroupMembersListView(ReplicaReadMixin, generics.ListAPIView):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = GroupMembershipSerializer
 
     def get_queryset(self):
-        group = get_object_or_404(Group.objects.prefetch_related('group_memberships__user'), pk=self.kwargs['group_id'])
+        group = get_object_or_404(Group.objects.active().prefetch_related('group_memberships__user'), pk=self.kwargs['group_id'])
         if not group.members.filter(pk=self.request.user.pk).exists():
             raise PermissionDenied('You must join this group to view members.')
         return group.group_memberships.select_related('user').order_by('user__username')
@@ -63,14 +175,21 @@ class GroupJoinView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request, group_id):
-        group = get_object_or_404(Group, pk=group_id)
-        membership, created = GroupMembership.objects.get_or_create(
-            group=group,
-            user=request.user,
-            defaults={'role': GroupMembership.Role.MEMBER},
-        )
+        with transaction.atomic():
+            # The group lock orders this join with bulk membership changes.
+            group = get_object_or_404(Group.objects.active().select_for_update(), pk=group_id)
+            membership, created = GroupMembership.objects.get_or_create(
+                group=group,
+                user=request.user,
+                defaults={'role': GroupMembership.Role.MEMBER},
+            )
+            if created:
+                adjust_stats('groups_count', {request.user.pk: 1})
+                record_joins(group.pk, [request.user.pk])
         if not created and membership.role == GroupMembership.Role.MEMBER:
             return Response({'detail': 'You are already a member of this group.'}, status=status.HTTP_200_OK)
+        if created:
+            group.refresh_from_db(fields=['members_count'])
         data = GroupSerializer(group, context={'request': request}).data
         return Response(data, status=status.HTTP_200_OK)
 
@@ -86,7 +205,12 @@ class GroupLeaveView(APIView):
             return Response({'detail': 'You are not a member of this group.'}, status=status.HTTP_400_BAD_REQUEST)
         if membership.role == GroupMembership.Role.OWNER:
             return Response({'detail': 'Group owners cannot leave their own group.'}, status=status.HTTP_400_BAD_REQUEST)
-        membership.delete()
+        with transaction.atomic():
+            deleted, _ = GroupMembership.objects.filter(pk=membership.pk).delete()
+            # A concurrent leave or bulk removal may have got there first.
+            if deleted:
+                adjust_stats('groups_count', {membership.user_id: -1})
+                record_leaves(group.pk, [membership.user_id])
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -100,45 +224,134 @@ class GroupMemberRemoveView(APIView):
         membership = get_object_or_404(GroupMembership, group=group, user_id=user_id)
         if membership.role == GroupMembership.Role.OWNER:
             return Response({'detail': 'You cannot remove the group owner.'}, status=status.HTTP_400_BAD_REQUEST)
-        membership.delete()
+        with transaction.atomic():
+            deleted, _ = GroupMembership.objects.filter(pk=membership.pk).delete()
+            if deleted:
+                adjust_stats('groups_count', {membership.user_id: -1})
+                record_leaves(group.pk, [membership.user_id])
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class GroupPostListCreateView(generics.ListCreateAPIView):
+class GroupMembersBulkView(APIView):
+    """
+    Owner-only membership changes for many users at once: ``POST`` adds
+    ``userIds`` with ``role``, ``PATCH`` changes their role and ``DELETE``
+    removes them. Each is one statement over the whole list, and counters and
+    caches are adjusted once per request rather than once per user. Adds and
+    removals hold the group row lock while they read the current members, so
+    concurrent joins and leaves cannot be counted twice.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_group(self, request, group_id, lock=False):
+        groups = Group.objects.active()
+        if lock:
+            groups = groups.select_for_update()
+        group = get_object_or_404(groups, pk=group_id)
+        if group.owner_id != request.user.pk:
+            raise PermissionDenied('Only the group owner can manage members.')
+        return group
+
+    def get_data(self, request, serializer_class):
+        serializer = serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data['userIds'], serializer.validated_data['role']
+
+    def post(self, request, group_id):
+        user_ids, role = self.get_data(request, GroupMembersBulkSerializer)
+        with transaction.atomic():
+            group = self.get_group(request, group_id, lock=True)
+            found = set(User.objects.filter(pk__in=user_ids, is_active=True).values_list('pk', flat=True))
+            members = set(group.group_memberships.filter(user_id__in=found).order_by().values_list('user_id', flat=True))
+            added = [user_id for user_id in user_ids if user_id in found and user_id not in members]
+            GroupMembership.objects.bulk_create(
+                [GroupMembership(group=group, user_id=user_id, role=role) for user_id in added],
+                ignore_conflicts=True,
+            )
+            adjust_stats('groups_count', dict.fromkeys(added, 1))
+            record_joins(group.pk, added)
+        return self.respond(group, {
+            'added': added,
+            'skipped': [user_id for user_id in user_ids if user_id in members],
+            'missing': [user_id for user_id in user_ids if user_id not in found],
+        })
+
+    def patch(self, request, group_id):
+        group = self.get_group(request, group_id)
+        user_ids, role = self.get_data(request, GroupMembersRoleSerializer)
+        memberships = (
+            group.group_memberships.filter(user_id__in=user_ids)
+            .exclude(role=GroupMembership.Role.OWNER)
+            .order_by()
+        )
+        with transaction.atomic():
+            updated = set(memberships.values_list('user_id', flat=True))
+            memberships.filter(user_id__in=updated).update(role=role)
+        return self.respond(group, {
+            'updated': [user_id for user_id in user_ids if user_id in updated],
+            'skipped': [user_id for user_id in user_ids if user_id not in updated],
+        })
+
+    def delete(self, request, group_id):
+        user_ids, _ = self.get_data(request, GroupMembersBulkSerializer)
+        with transaction.atomic():
+            group = self.get_group(request, group_id, lock=True)
+            memberships = (
+                group.group_memberships.filter(user_id__in=user_ids)
+                .exclude(role=GroupMembership.Role.OWNER)
+                .order_by()
+            )
+            # Row locks too: a single leave does not take the group lock.
+            removed = set(memberships.select_for_update().values_list('user_id', flat=True))
+            memberships.filter(user_id__in=removed).delete()
+            adjust_stats('groups_count', dict.fromkeys(removed, -1))
+            record_leaves(group.pk, removed)
+        return self.respond(group, {
+            'removed': [user_id for user_id in user_ids if user_id in removed],
+            'skipped': [user_id for user_id in user_ids if user_id not in removed],
+        })
+
+    def respond(self, group, data):
+        group.refresh_from_db(fields=['members_count'])
+        return Response({**data, 'membersCount': group.members_count}, status=status.HTTP_200_OK)
+
+
+class GroupPostListCreateView(
+    ConditionalGetMixin,
+    CoalescedFeedMixin,
+    NormalizedResponseMixin,
+    ReplicaReadMixin,
+    ViewerLikeAnnotationMixin,
+    generics.ListCreateAPIView,
+):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = GroupPostSerializer
 
     def get_group(self):
-        group = get_object_or_404(Group.objects.prefetch_related('members'), pk=self.kwargs['group_id'])
-        if not group.members.filter(pk=self.request.user.pk).exists():
-            raise PermissionDenied('You must join this group to view or create posts.')
-        return group
+        if not hasattr(self, '_group'):
+            group = get_object_or_404(Group.objects.active(), pk=self.kwargs['group_id'])
+            # Authorize against the table, not the cached ids another process may not have dropped yet.
+            if not GroupMembership.objects.filter(group=group, user_id=self.request.user.pk).exists():
+                raise PermissionDenied('You must join this group to view or create posts.')
+            self._group = group
+        return self._group
+
+    def get_version_scopes(self):
+        return feed_scopes(self.get_group().pk)
 
     def get_queryset(self):
-        from posts.views import ViewerLikeAnnotationMixin
         group = self.get_group()
         queryset = (
             Post.objects.filter(group=group)
             .select_related('author', 'group')
-            .prefetch_related('comments__author')
+            .prefetch_related(*post_prefetches(self.request, GroupPostSerializer))
         )
-        # Apply like annotation from mixin
-        user = self.request.user
-        if user and user.is_authenticated:
-            from django.db.models import Exists, OuterRef
-            from posts.models import Like
-            queryset = queryset.annotate(
-                liked_by_current_user=Exists(
-                    Like.objects.filter(post_id=OuterRef('pk'), user_id=user.pk)
-                )
-            )
-        else:
-            from django.db.models import Value, BooleanField
-            queryset = queryset.annotate(
-                liked_by_current_user=Value(False, output_field=BooleanField())
-            )
-        return queryset.order_by('-created_at')
+        return self._annotate_viewer_like(queryset).order_by('-created_at')
 
     def perform_create(self, serializer):
         group = self.get_group()
-        serializer.save(author=self.request.user, group=group)
+        with transaction.atomic():
+            post = serializer.save(author=self.request.user, group=group)
+            post_created(post)
+        bump_post(post)
@@ -0,0 +1,56 @@
+"""
+Transactional outbox.
+
+Write paths call ``publish()`` inside the transaction of the change itself,
+so an event exists exactly when its write committed. The side effects that
+follow from it (profile stats, group activity, and later notifications or
+fan-out) are ``subscribe()``d handlers that ``outbox.worker`` runs outside the
+request. With ``OUTBOX_DISPATCH = 'inline'`` the events of a request are
+instead applied right after it commits, for setups without a worker.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import OutboxEvent
+
+
+_handlers = defaultdict(list)
+
+
+def subscribe(topic):
+    """Register the decorated ``handler(payload)`` for events on ``topic``."""
+    def register(handler):
+        _handlers[topic].append(handler)
+        return handler
+    return register
+
+
+def handlers_for(topic):
+    return list(_handlers.get(topic, ()))
+
+
+def publish(topic, key, payload, stream=''):
+    """
+    Record an event on ``topic``. ``key`` identifies the change (for example
+    ``like.created:42``); publishing an existing key again is a no-op, so
+    retried writes do not apply their side effects twice. Events on the same
+    ``stream`` are applied in the order they were published.
+    """
+    publish_many(topic, [(key, payload, stream)])
+
+
+def publish_many(topic, events):
+    """``publish()`` each ``(key, payload, stream)`` of ``events`` with one INSERT."""
+    events = [
+        OutboxEvent(topic=topic, key=key, payload=payload, stream=stream)
+        for key, payload, stream in events
+    ]
+    if not events:
+        return
+    OutboxEvent.objects.bulk_create(events, ignore_conflicts=True)
+    if settings.OUTBOX_DISPATCH == 'inline':
+        from .worker import process_keys
+        keys = [event.key for event in events]
+        transaction.on_commit(lambda: process_keys(keys))
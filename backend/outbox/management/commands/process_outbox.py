@@ -0,0 +1,48 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from outbox.worker import BATCH_SIZE, drain, purge_processed
+
+
+class Command(BaseCommand):
+    help = 'Apply the side effects recorded in the outbox'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Events claimed per batch',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=settings.OUTBOX_WORKERS,
+            help='Threads applying the events of a batch',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling for new events instead of exiting when the outbox is drained',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1.0,
+            help='Seconds to sleep between polls with --loop',
+        )
+
+    def handle(self, *args, **options):
+        retention = timedelta(hours=settings.OUTBOX_RETENTION_HOURS)
+        while True:
+            processed, failed = drain(options['batch_size'], options['workers'])
+            purged = purge_processed(retention)
+            if processed or failed or purged:
+                message = f'✓ Applied {processed} events ({failed} failed, {purged} old events purged)'
+                self.stdout.write(self.style.SUCCESS(message))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-19 14:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('outbox', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='outboxevent',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['stream', 'id'], name='outbox_event_stream_idx'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+from django.db import models
+from django.utils import timezone
+
+
+class OutboxEvent(models.Model):
+    """
+    A side effect owed by a committed write. Rows are inserted in the same
+    transaction as the write they describe and applied by ``outbox.worker``.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Pending'
+        DONE = 'done', 'Done'
+        FAILED = 'failed', 'Failed'
+
+    topic = models.CharField(max_length=100)
+    # Idempotency key: publishing the same key twice records one event.
+    key = models.CharField(max_length=200, unique=True)
+    payload = models.JSONField(default=dict)
+    # Events sharing a stream (say, the user whose counters they move) are
+    # applied in order by one thread; the rest run in parallel.
+    stream = models.CharField(max_length=100, blank=True)
+    status = models.CharField(
+        max_length=20,
+        choices=Status.choices,
+        default=Status.PENDING,
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    # Not picked up before this time: pushed forward while a worker holds the
+    # event and after each failure.
+    available_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(
+                fields=['available_at', 'id'],
+                condition=models.Q(status='pending'),
+                name='outbox_event_pending_idx',
+            ),
+            # The earliest pending event of a stream, for in-order claiming.
+            models.Index(
+                fields=['stream', 'id'],
+                condition=models.Q(status='pending'),
+                name='outbox_event_stream_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.topic} {self.key} ({self.status})'
@@ -0,0 +1,135 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from posts.models import Post
+from .events import publish, subscribe
+from .models import OutboxEvent
+from .worker import MAX_ATTEMPTS, LEASE, claim_batch, drain, process_event, purge_processed
+
+
+User = get_user_model()
+
+applied = []
+
+
+@subscribe('test.record')
+def record(payload):
+    applied.append(payload['value'])
+
+
+@subscribe('test.fail')
+def fail(payload):
+    raise RuntimeError('handler failed')
+
+
+class OutboxWorkerTests(TestCase):
+    def setUp(self):
+        applied.clear()
+
+    def test_each_key_is_published_and_applied_once(self):
+        publish('test.record', 'record:1', {'value': 1})
+        publish('test.record', 'record:1', {'value': 1})
+        publish('test.record', 'record:2', {'value': 2})
+        self.assertEqual(OutboxEvent.objects.count(), 2)
+
+        self.assertEqual(drain(), (2, 0))
+        self.assertEqual(applied, [1, 2])
+
+        # A second delivery of a finished event (a worker whose lease ran out) does nothing.
+        self.assertFalse(process_event(OutboxEvent.objects.get(key='record:1')))
+        self.assertEqual(drain(), (0, 0))
+        self.assertEqual(applied, [1, 2])
+
+    def test_claimed_events_are_leased(self):
+        publish('test.record', 'record:1', {'value': 1})
+        self.assertEqual(len(claim_batch()), 1)
+        self.assertEqual(claim_batch(), [])
+
+        OutboxEvent.objects.update(available_at=timezone.now())
+        self.assertEqual(drain(), (1, 0))
+
+    def test_failures_back_off_then_give_up(self):
+        publish('test.fail', 'fail:1', {})
+        with self.assertLogs('outbox.worker', 'ERROR'):
+            self.assertEqual(drain(), (0, 1))
+        event = OutboxEvent.objects.get()
+        self.assertEqual((event.status, event.attempts), (OutboxEvent.Status.PENDING, 1))
+        self.assertIn('handler failed', event.last_error)
+        self.assertGreater(event.available_at, timezone.now())
+
+        OutboxEvent.objects.update(attempts=MAX_ATTEMPTS - 1, available_at=timezone.now())
+        with self.assertLogs('outbox.worker', 'ERROR'):
+            drain()
+        self.assertEqual(OutboxEvent.objects.get().status, OutboxEvent.Status.FAILED)
+        self.assertEqual(drain(), (0, 0))
+
+    def test_a_failure_holds_back_the_rest_of_its_stream(self):
+        publish('test.fail', 'fail:1', {}, stream='user:1')
+        publish('test.record', 'record:1', {'value': 1}, stream='user:1')
+        publish('test.record', 'record:2', {'value': 2}, stream='user:2')
+        with self.assertLogs('outbox.worker', 'ERROR'):
+            self.assertEqual(drain(), (1, 1))
+        self.assertEqual(applied, [2])
+        self.assertEqual(claim_batch(), [])
+
+        # Once the failing event is given up on, the stream moves on.
+        OutboxEvent.objects.filter(key='fail:1').update(attempts=MAX_ATTEMPTS - 1, available_at=timezone.now())
+        with self.assertLogs('outbox.worker', 'ERROR'):
+            self.assertEqual(drain(), (1, 1))
+        self.assertEqual(applied, [2, 1])
+
+    def test_streams_are_claimed_in_order_by_one_worker(self):
+        publish('test.record', 'record:1', {'value': 1}, stream='user:1')
+        publish('test.record', 'record:2', {'value': 2}, stream='user:1')
+        publish('test.record', 'record:3', {'value': 3}, stream='user:2')
+        # The batch ends after the head of the stream; the rest waits for it.
+        self.assertEqual([event.key for event in claim_batch(batch_size=1)], ['record:1'])
+        # Another worker holds the head, so only the other stream is free.
+        self.assertEqual([event.key for event in claim_batch()], ['record:3'])
+
+        OutboxEvent.objects.filter(key='record:1').update(available_at=timezone.now() - LEASE)
+        self.assertEqual([event.key for event in claim_batch()], ['record:1', 'record:2'])
+
+    def test_command_applies_and_purges(self):
+        publish('test.record', 'record:1', {'value': 1})
+        out = StringIO()
+        call_command('process_outbox', '--workers', '1', stdout=out)
+        self.assertIn('Applied 1 events', out.getvalue())
+        self.assertEqual(applied, [1])
+
+        OutboxEvent.objects.update(processed_at=timezone.now() - timedelta(days=2))
+        self.assertEqual(purge_processed(timedelta(days=1)), 1)
+
+
+class OutboxDispatchTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='alice', email='alice@example.com', password='password123')
+        self.client.force_authenticate(self.user)
+
+    def test_side_effects_wait_for_the_worker(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('posts:post-list-create'), {'content': 'Hello'})
+        event = OutboxEvent.objects.get()
+        self.assertEqual((event.topic, event.status), ('post.created', OutboxEvent.Status.PENDING))
+        self.assertEqual(event.payload['post'], Post.objects.get().pk)
+        self.user.stats.refresh_from_db()
+        self.assertEqual(self.user.stats.posts_count, 0)
+
+        drain()
+        self.user.stats.refresh_from_db()
+        self.assertEqual(self.user.stats.posts_count, 1)
+
+    @override_settings(OUTBOX_DISPATCH='inline')
+    def test_inline_dispatch_applies_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('posts:post-list-create'), {'content': 'Hello'})
+        self.assertEqual(OutboxEvent.objects.get().status, OutboxEvent.Status.DONE)
+        self.user.stats.refresh_from_db()
+        self.assertEqual(self.user.stats.posts_count, 1)
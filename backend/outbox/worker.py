@@ -0,0 +1,190 @@
+"""
+Draining the outbox.
+
+Workers claim a batch of due events by pushing their ``available_at`` past a
+lease, then apply each one in its own transaction: the event is marked done
+and its handlers run together, so they commit or roll back as one. Delivery is
+at least once (an event whose worker died is picked up again once the lease
+runs out), and the done-marking makes a second delivery of a finished event a
+no-op. A failing event is retried with exponential backoff and given up on
+(``FAILED``) after ``MAX_ATTEMPTS``. Events on a stream are applied strictly
+in order: a worker only claims an event together with every pending event
+before it on its stream, and stops working on a stream at its first failure.
+"""
+import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.db import close_old_connections, transaction
+from django.db.models import Exists, F, Min, OuterRef, Q
+from django.utils import timezone
+
+from .events import handlers_for
+from .models import OutboxEvent
+
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 100
+LEASE = timedelta(minutes=5)
+MAX_ATTEMPTS = 8
+RETRY_DELAY = timedelta(seconds=5)
+MAX_RETRY_DELAY = timedelta(hours=1)
+
+
+def claim_batch(batch_size=BATCH_SIZE):
+    """
+    Lease up to ``batch_size`` due events to this worker, oldest first,
+    skipping any whose stream has an earlier event still pending elsewhere
+    (leased by another worker or waiting to be retried).
+    """
+    now = timezone.now()
+    pending = OutboxEvent.objects.filter(status=OutboxEvent.Status.PENDING)
+    waiting = pending.filter(stream=OuterRef('stream'), pk__lt=OuterRef('pk'), available_at__gt=now)
+    with transaction.atomic():
+        due = (
+            pending.filter(available_at__lte=now)
+            .filter(Q(stream='') | ~Exists(waiting))
+            .order_by('available_at', 'id')
+            .select_for_update(skip_locked=True)
+        )
+        rows = list(due.values_list('pk', 'stream')[:batch_size])
+        ids = {pk for pk, _ in rows}
+        # The first pending event of each stream that this batch does not hold:
+        # cut off by the batch size, or locked by a worker claiming right now.
+        held_elsewhere = dict(
+            pending.filter(stream__in={stream for _, stream in rows if stream})
+            .exclude(pk__in=ids)
+            .order_by()
+            .values('stream')
+            .annotate(first=Min('pk'))
+            .values_list('stream', 'first')
+        )
+        ids = [
+            pk for pk, stream in rows
+            if stream not in held_elsewhere or pk < held_elsewhere[stream]
+        ]
+        OutboxEvent.objects.filter(pk__in=ids).update(available_at=now + LEASE)
+    return list(OutboxEvent.objects.filter(pk__in=ids).order_by('id'))
+
+
+def process_event(event):
+    """
+    Apply ``event``. Returns True once applied, False if it failed (and was
+    rescheduled) and None if it had already been applied.
+    """
+    try:
+        with transaction.atomic():
+            claimed = OutboxEvent.objects.filter(pk=event.pk, status=OutboxEvent.Status.PENDING).update(
+                status=OutboxEvent.Status.DONE,
+                processed_at=timezone.now(),
+            )
+            if not claimed:
+                return None
+            for handler in handlers_for(event.topic):
+                handler(event.payload)
+    except Exception as exc:
+        logger.exception('Outbox event %s (%s) failed', event.pk, event.topic)
+        _reschedule(event, exc)
+        return False
+    return True
+
+
+def _reschedule(event, exc):
+    attempts = event.attempts + 1
+    delay = min(RETRY_DELAY * 2 ** (attempts - 1), MAX_RETRY_DELAY)
+    OutboxEvent.objects.filter(pk=event.pk, status=OutboxEvent.Status.PENDING).update(
+        attempts=F('attempts') + 1,
+        available_at=timezone.now() + delay,
+        last_error=repr(exc),
+        status=OutboxEvent.Status.FAILED if attempts >= MAX_ATTEMPTS else OutboxEvent.Status.PENDING,
+    )
+
+
+def run_batch(batch_size=BATCH_SIZE, workers=1):
+    """
+    Claim and apply one batch, one stream per thread across ``workers``
+    threads. Returns ``(processed, failed)``.
+    """
+    events = claim_batch(batch_size)
+    streams = defaultdict(list)
+    for event in events:
+        streams[event.stream or event.key].append(event)
+    if workers > 1 and len(streams) > 1:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='outbox') as executor:
+            results = list(executor.map(_process_stream_in_thread, streams.values()))
+    else:
+        results = [_process_stream(stream) for stream in streams.values()]
+    return sum(processed for processed, _ in results), sum(failed for _, failed in results)
+
+
+def _process_stream(events):
+    """Apply ``events`` in order up to the first failure; returns ``(processed, failed)``."""
+    processed = 0
+    for index, event in enumerate(events):
+        applied = process_event(event)
+        if applied is False:
+            # The rest of the stream waits for this event; claim_batch() holds
+            # them back until it has been applied or given up on.
+            later = [later.pk for later in events[index + 1:]]
+            OutboxEvent.objects.filter(pk__in=later, status=OutboxEvent.Status.PENDING).update(
+                available_at=timezone.now(),
+            )
+            return processed, 1
+        processed += bool(applied)
+    return processed, 0
+
+
+def _process_stream_in_thread(events):
+    try:
+        return _process_stream(events)
+    finally:
+        close_old_connections()
+
+
+def drain(batch_size=BATCH_SIZE, workers=1):
+    """Run batches until no event is due. Returns the totals of ``run_batch()``."""
+    processed = failed = 0
+    while True:
+        done, errors = run_batch(batch_size, workers)
+        if not done and not errors:
+            return processed, failed
+        processed += done
+        failed += errors
+
+
+def process_keys(keys):
+    """
+    Apply the pending events with ``keys`` now, in this thread
+    (``OUTBOX_DISPATCH = 'inline'``). Events queued behind an earlier pending
+    event of their stream are left to the worker.
+    """
+    pending = OutboxEvent.objects.filter(status=OutboxEvent.Status.PENDING)
+    earlier = pending.filter(stream=OuterRef('stream'), pk__lt=OuterRef('pk'))
+    events = pending.filter(key__in=keys).filter(Q(stream='') | ~Exists(earlier))
+    streams = defaultdict(list)
+    for event in events:
+        streams[event.stream or event.key].append(event)
+    for stream in streams.values():
+        _process_stream(stream)
+
+
+def purge_processed(older_than):
+    """Delete events finished before ``now - older_than``; returns how many."""
+    deleted, _ = OutboxEvent.objects.filter(
+        status=OutboxEvent.Status.DONE,
+        processed_at__lt=timezone.now() - older_than,
+    ).delete()
+    return deleted
+
+
+def outbox_stats():
+    now = timezone.now()
+    pending = OutboxEvent.objects.filter(status=OutboxEvent.Status.PENDING)
+    oldest = pending.order_by('created_at').values_list('created_at', flat=True).first()
+    return {
+        'pending': pending.count(),
+        'failed': OutboxEvent.objects.filter(status=OutboxEvent.Status.FAILED).count(),
+        'oldestPendingSeconds': round((now - oldest).total_seconds(), 1) if oldest else None,
+    }
@@ -0,0 +1,135 @@
+import math
+
+from django.db import transaction
+from django.db.models import Count
+
+from backend.conditional import bump_versions
+from .models import Comment, CounterWatermark, DirtyPost, Like, Post
+from .ranking import hot_score
+from .scopes import ALL_POSTS
+
+
+DEFAULT_BATCH_SIZE = 1000
+WATERMARK_NAME = 'post-counters-full-sweep'
+# Incremental score updates accumulate float rounding; ignore anything smaller.
+SCORE_TOLERANCE = 1e-6
+
+
+def mark_dirty(post_ids):
+    """Queue ``post_ids`` for the next reconciliation run."""
+    DirtyPost.objects.bulk_create(
+        [DirtyPost(post_id=post_id) for post_id in set(post_ids)],
+        batch_size=DEFAULT_BATCH_SIZE,
+    )
+
+
+def recount(post_ids):
+    """
+    Recompute ``likes_count``/``comments_count`` (and with them ``hot_score``)
+    for ``post_ids`` with one GROUP BY per table and write back only the rows
+    that drifted. The posts stay locked from the count to the write.
+    """
+    post_ids = set(post_ids)
+    if not post_ids:
+        return 0
+
+    with transaction.atomic():
+        # Lock the posts before counting: a like or comment committing between
+        # the count and the write would otherwise have its increment overwritten.
+        posts = list(
+            Post.objects.filter(pk__in=post_ids)
+            .order_by('pk')
+            .select_for_update()
+            .only('pk', 'likes_count', 'comments_count', 'hot_score', 'created_at')
+        )
+        likes = dict(
+            Like.objects.filter(post_id__in=post_ids)
+            .order_by()
+            .values('post_id')
+            .annotate(total=Count('pk'))
+            .values_list('post_id', 'total')
+        )
+        comments = dict(
+            Comment.objects.filter(post_id__in=post_ids)
+            .order_by()
+            .values('post_id')
+            .annotate(total=Count('pk'))
+            .values_list('post_id', 'total')
+        )
+
+        drifted = []
+        for post in posts:
+            likes_count = likes.get(post.pk, 0)
+            comments_count = comments.get(post.pk, 0)
+            score = hot_score(likes_count, comments_count, post.created_at)
+            if (
+                post.likes_count != likes_count
+                or post.comments_count != comments_count
+                or not math.isclose(post.hot_score, score, abs_tol=SCORE_TOLERANCE)
+            ):
+                post.likes_count = likes_count
+                post.comments_count = comments_count
+                post.hot_score = score
+                drifted.append(post)
+
+        if drifted:
+            Post.objects.bulk_update(drifted, ['likes_count', 'comments_count', 'hot_score'])
+            bump_versions(ALL_POSTS)
+    return len(drifted)
+
+
+def reconcile_dirty(batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Drain the dirty-post queue in batches.
+
+    Marks are deleted by id in the same transaction as the recount, so a
+    crashed run leaves only unprocessed marks behind and a mark committed late
+    by a concurrent writer is simply picked up on the next run.
+    """
+    last_mark = 0
+    checked = fixed = 0
+    while True:
+        with transaction.atomic():
+            marks = list(
+                DirtyPost.objects.filter(pk__gt=last_mark)
+                .order_by('pk')
+                .values_list('pk', 'post_id')[:batch_size]
+            )
+            if not marks:
+                break
+            post_ids = {post_id for _, post_id in marks}
+            fixed += recount(post_ids)
+            checked += len(post_ids)
+            last_mark = marks[-1][0]
+            DirtyPost.objects.filter(pk__in=[pk for pk, _ in marks]).delete()
+    return checked, fixed
+
+
+def reconcile_all(batch_size=DEFAULT_BATCH_SIZE, restart=False):
+    """
+    Recount every post, walking the primary key in bounded batches.
+
+    Progress is checkpointed in a watermark after each batch; an interrupted
+    sweep continues from there unless ``restart`` is set.
+    """
+    watermark, _ = CounterWatermark.objects.get_or_create(name=WATERMARK_NAME)
+    if restart:
+        watermark.value = 0
+    checked = fixed = 0
+    while True:
+        post_ids = list(
+            Post.objects.filter(pk__gt=watermark.value)
+            .order_by('pk')
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not post_ids:
+            break
+        with transaction.atomic():
+            fixed += recount(post_ids)
+            watermark.value = post_ids[-1]
+            watermark.save(update_fields=['value', 'updated_at'])
+        checked += len(post_ids)
+
+    watermark.value = 0
+    watermark.save(update_fields=['value', 'updated_at'])
+    return checked, fixed
@@ -0,0 +1,65 @@
+"""
+Outbox events published by post, comment and like writes (see outbox.events).
+
+Each is keyed by the row it announces, and streamed per user whose counters
+its handlers move, so those counters see the events in order. Removing rows
+retracts their counts on the same streams (``stats_retracted()``), so a
+retraction always lands after the credit it cancels, even when the row is
+deleted before its ``*.created`` event has been applied.
+"""
+import uuid
+
+from outbox.events import publish, publish_many
+
+
+POST_CREATED = 'post.created'
+COMMENT_CREATED = 'comment.created'
+LIKE_CREATED = 'like.created'
+LIKE_REMOVED = 'like.removed'
+STATS_RETRACTED = 'stats.retracted'
+
+
+def post_created(post):
+    publish(
+        POST_CREATED,
+        f'{POST_CREATED}:{post.pk}',
+        {
+            'post': post.pk,
+            'author': post.author_id,
+            'group': post.group_id,
+            'createdAt': post.created_at.isoformat(),
+        },
+        stream=f'user:{post.author_id}',
+    )
+
+
+def comment_created(comment):
+    publish(
+        COMMENT_CREATED,
+        f'{COMMENT_CREATED}:{comment.pk}',
+        {'comment': comment.pk, 'post': comment.post_id, 'author': comment.author_id},
+        stream=f'user:{comment.author_id}',
+    )
+
+
+def like_changed(like_id, post, created):
+    """``like_id`` on ``post`` was created (or removed); the post's author gains (or loses) a like."""
+    topic = LIKE_CREATED if created else LIKE_REMOVED
+    publish(
+        topic,
+        f'{topic}:{like_id}',
+        {'like': like_id, 'post': post.pk, 'author': post.author_id},
+        stream=f'user:{post.author_id}',
+    )
+
+
+def stats_retracted(field, counts):
+    """Take ``counts[user_id]`` removed rows off each user's ``field``."""
+    publish_many(STATS_RETRACTED, [
+        (
+            f'{STATS_RETRACTED}:{uuid.uuid4().hex}',
+            {'field': field, 'user': user_id, 'count': count},
+            f'user:{user_id}',
+        )
+        for user_id, count in counts.items()
+    ])
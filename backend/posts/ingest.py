@@ -0,0 +1,304 @@
+import json
+from collections import Counter
+from dataclasses import dataclass, field
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils.dateparse import parse_datetime
+
+from backend.conditional import bump_versions
+from groups.directory import record_group_posts
+from groups.models import Group, GroupMembership
+from tags.indexing import index_comments, index_posts
+from users.stats import adjust_stats
+from .models import Comment, Post
+from .ranking import counter_updates, hot_score
+from .scopes import ALL_POSTS
+from .threads import root_path
+
+
+User = get_user_model()
+
+DEFAULT_CHUNK_SIZE = 5000
+INSERT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+
+@dataclass
+class IngestResult:
+    posts: int = 0
+    comments: int = 0
+    errors: list = field(default_factory=list)
+    refs: dict = field(default_factory=dict)
+
+    def add_error(self, line, errors):
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'errors': errors})
+
+    def as_dict(self):
+        return {
+            'posts': self.posts,
+            'comments': self.comments,
+            'errors': sorted(self.errors, key=lambda error: error['line']),
+            'refs': self.refs,
+        }
+
+
+def iter_ndjson(lines):
+    """Yield ``(line_number, record)`` pairs; malformed lines yield an error string instead of a dict."""
+    for line_number, raw in enumerate(lines, start=1):
+        if isinstance(raw, bytes):
+            raw = raw.decode('utf-8')
+        raw = raw.strip()
+        if not raw:
+            continue
+        try:
+            record = json.loads(raw)
+        except ValueError:
+            yield line_number, 'Invalid JSON.'
+            continue
+        if not isinstance(record, dict):
+            yield line_number, 'Each line must be a JSON object.'
+            continue
+        yield line_number, record
+
+
+def ingest(records, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Import an iterable of ``(line_number, record)`` pairs in chunks.
+
+    Records look like ``{"type": "post", "ref": "p1", "authorId": 1, "groupId": 2,
+    "content": "..."}`` or ``{"type": "comment", "postRef": "p1", "authorId": 3,
+    "content": "..."}`` (``postId`` may be used instead of ``postRef`` for posts
+    that already exist). Posts must appear before the comments that reference
+    them by ``ref``. Invalid lines are reported and skipped.
+    """
+    result = IngestResult()
+    chunk = []
+    for item in records:
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            _ingest_chunk(chunk, result)
+            chunk = []
+    if chunk:
+        _ingest_chunk(chunk, result)
+    if result.posts or result.comments:
+        bump_versions(ALL_POSTS)
+    return result
+
+
+def _ingest_chunk(chunk, result):
+    posts, comments = _parse_chunk(chunk, result)
+    _validate_chunk(posts, comments, result)
+
+    with transaction.atomic():
+        _insert_posts(posts, result)
+        _insert_comments(comments, result)
+
+
+def _parse_chunk(chunk, result):
+    posts, comments = [], []
+    for line, record in chunk:
+        if isinstance(record, str):
+            result.add_error(line, {'non_field_errors': [record]})
+            continue
+
+        errors = {}
+        content = record.get('content')
+        if not isinstance(content, str) or not content.strip():
+            errors['content'] = ['Content cannot be empty.']
+        author_id = _as_int(record.get('authorId'))
+        if author_id is None:
+            errors['authorId'] = ['A valid integer is required.']
+        created_at = None
+        if record.get('createdAt') is not None:
+            created_at = _as_datetime(record['createdAt'])
+            if created_at is None:
+                errors['createdAt'] = ['Invalid datetime.']
+
+        kind = record.get('type')
+        row = {
+            'line': line,
+            'content': content,
+            'author_id': author_id,
+            'created_at': created_at,
+        }
+        if kind == 'post':
+            row['ref'] = record.get('ref')
+            row['group_id'] = None
+            if record.get('groupId') is not None:
+                row['group_id'] = _as_int(record['groupId'])
+                if row['group_id'] is None:
+                    errors['groupId'] = ['A valid integer is required.']
+            target = posts
+        elif kind == 'comment':
+            row['post_ref'] = record.get('postRef')
+            row['post_id'] = _as_int(record.get('postId'))
+            if row['post_ref'] is None and row['post_id'] is None:
+                errors['postId'] = ['Either postId or postRef is required.']
+            target = comments
+        else:
+            errors['type'] = ['Must be "post" or "comment".']
+            target = None
+
+        if errors:
+            result.add_error(line, errors)
+            continue
+        target.append(row)
+    return posts, comments
+
+
+def _validate_chunk(posts, comments, result):
+    """Check every foreign reference in the chunk with one query per table."""
+    for row in comments:
+        if row['post_id'] is None:
+            row['post_id'] = result.refs.get(row['post_ref'])
+
+    author_ids = {row['author_id'] for row in posts} | {row['author_id'] for row in comments}
+    existing_post_ids = {row['post_id'] for row in comments if row['post_id'] is not None}
+
+    active_authors = set(
+        User.objects.filter(pk__in=author_ids, is_active=True).values_list('pk', flat=True)
+    )
+    post_groups = dict(Post.objects.filter(pk__in=existing_post_ids).values_list('pk', 'group_id'))
+    group_ids = {row['group_id'] for row in posts if row['group_id']}
+    existing_groups = set(Group.objects.filter(pk__in=group_ids).values_list('pk', flat=True))
+    membership_group_ids = group_ids | {gid for gid in post_groups.values() if gid}
+    memberships = set(
+        GroupMembership.objects.filter(
+            group_id__in=membership_group_ids,
+            user_id__in=author_ids,
+        ).values_list('group_id', 'user_id')
+    )
+
+    valid_posts = []
+    pending_refs = {}
+    for row in posts:
+        errors = {}
+        if row['author_id'] not in active_authors:
+            errors['authorId'] = ['Unknown or inactive user.']
+        if row['group_id']:
+            if row['group_id'] not in existing_groups:
+                errors['groupId'] = ['Unknown group.']
+            elif (row['group_id'], row['author_id']) not in memberships:
+                errors['authorId'] = ['Author must be a member of the group.']
+        if row['ref'] is not None and (row['ref'] in result.refs or row['ref'] in pending_refs):
+            errors['ref'] = ['Duplicate ref.']
+        if errors:
+            result.add_error(row['line'], errors)
+            continue
+        if row['ref'] is not None:
+            pending_refs[row['ref']] = row
+        valid_posts.append(row)
+
+    valid_comments = []
+    for row in comments:
+        errors = {}
+        if row['author_id'] not in active_authors:
+            errors['authorId'] = ['Unknown or inactive user.']
+        if row['post_id'] is not None:
+            if row['post_id'] not in post_groups:
+                errors['postId'] = ['Unknown post.']
+            else:
+                row['group_id'] = post_groups[row['post_id']]
+        elif row['post_ref'] in pending_refs:
+            row['group_id'] = pending_refs[row['post_ref']]['group_id']
+        else:
+            errors['postRef'] = ['Unknown or invalid post ref.']
+        if not errors and row['group_id'] and (row['group_id'], row['author_id']) not in memberships:
+            errors['authorId'] = ['Author must be a member of the group.']
+        if errors:
+            result.add_error(row['line'], errors)
+            continue
+        valid_comments.append(row)
+
+    posts[:] = valid_posts
+    comments[:] = valid_comments
+
+
+def _insert_posts(posts, result):
+    objects = [
+        Post(author_id=row['author_id'], group_id=row['group_id'], content=row['content'])
+        for row in posts
+    ]
+    for post, row in zip(objects, posts):
+        if row['created_at'] is not None:
+            post.hot_score = hot_score(0, 0, row['created_at'])
+    Post.objects.bulk_create(objects, batch_size=INSERT_BATCH_SIZE)
+    _restore_timestamps(Post, objects, posts, ['created_at'])
+
+    for row, post in zip(posts, objects):
+        if row['ref'] is not None:
+            result.refs[row['ref']] = post.pk
+    result.posts += len(objects)
+    index_posts(objects)
+    adjust_stats('posts_count', Counter(post.author_id for post in objects))
+    record_group_posts(objects)
+
+
+def _insert_comments(comments, result):
+    for row in comments:
+        if row['post_id'] is None:
+            row['post_id'] = result.refs[row['post_ref']]
+    objects = [
+        Comment(post_id=row['post_id'], author_id=row['author_id'], content=row['content'])
+        for row in comments
+    ]
+    Comment.objects.bulk_create(objects, batch_size=INSERT_BATCH_SIZE)
+    # Imported comments are all top level; bulk_create skips Comment.save().
+    Comment.objects.filter(pk__in=[comment.pk for comment in objects]).update(path=root_path())
+    _restore_timestamps(Comment, objects, comments, ['created_at', 'updated_at'])
+    result.comments += len(objects)
+    index_comments(objects)
+    adjust_stats('comments_count', Counter(comment.author_id for comment in objects))
+
+    touched = {row['post_id'] for row in comments}
+    if touched:
+        recount_comments(touched)
+
+
+def recount_comments(post_ids):
+    """Recompute ``comments_count`` for ``post_ids`` in a single aggregated UPDATE."""
+    counts = (
+        Comment.objects.filter(post_id=OuterRef('pk'))
+        .order_by()
+        .values('post_id')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Post.objects.filter(pk__in=post_ids).update(
+        **counter_updates(comments=Coalesce(Subquery(counts), 0))
+    )
+
+
+def _restore_timestamps(model, objects, rows, fields):
+    # ``auto_now_add`` overwrites timestamps on insert, so imported ones are
+    # written back with one CASE-based UPDATE per batch.
+    stamped = []
+    for obj, row in zip(objects, rows):
+        if row['created_at'] is not None:
+            for name in fields:
+                setattr(obj, name, row['created_at'])
+            stamped.append(obj)
+    if stamped:
+        model.objects.bulk_update(stamped, fields, batch_size=INSERT_BATCH_SIZE)
+
+
+def _as_int(value):
+    if isinstance(value, bool):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _as_datetime(value):
+    if not isinstance(value, str):
+        return None
+    try:
+        return parse_datetime(value)
+    except ValueError:
+        return None
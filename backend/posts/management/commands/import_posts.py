@@ -0,0 +1,40 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.ingest import DEFAULT_CHUNK_SIZE, ingest, iter_ndjson
+
+
+class Command(BaseCommand):
+    help = 'Bulk import posts and comments from an NDJSON file (use "-" for stdin)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Path to the NDJSON file, or "-" to read stdin')
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help='Number of lines validated and inserted per transaction',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        try:
+            stream = sys.stdin.buffer if path == '-' else open(path, 'rb')
+        except OSError as exc:
+            raise CommandError(str(exc)) from exc
+
+        try:
+            result = ingest(iter_ndjson(stream), chunk_size=options['chunk_size'])
+        finally:
+            if stream is not sys.stdin.buffer:
+                stream.close()
+
+        for error in result.errors:
+            self.stderr.write(f"line {error['line']}: {error['errors']}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'✓ Imported {result.posts} posts and {result.comments} comments '
+                f'({len(result.errors)} lines rejected)'
+            )
+        )
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import DEFAULT_BATCH_SIZE, reconcile_all, reconcile_dirty
+
+
+class Command(BaseCommand):
+    help = 'Recompute likes_count and comments_count for posts marked dirty (or all posts with --full)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Sweep every post in primary key order, resuming from the last checkpoint',
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='With --full, ignore the checkpoint and start from the first post',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Number of posts recounted per query batch',
+        )
+
+    def handle(self, *args, **options):
+        if options['full']:
+            checked, fixed = reconcile_all(options['batch_size'], restart=options['restart'])
+        else:
+            checked, fixed = reconcile_dirty(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'✓ Checked {checked} posts, fixed {fixed}'))
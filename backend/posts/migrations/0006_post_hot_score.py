@@ -0,0 +1,43 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:00
+
+import posts.ranking
+from django.conf import settings
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def backfill_hot_scores(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    batch = []
+    queryset = Post.objects.only('pk', 'likes_count', 'comments_count', 'created_at')
+    for post in queryset.iterator(chunk_size=BATCH_SIZE):
+        post.hot_score = posts.ranking.hot_score(post.likes_count, post.comments_count, post.created_at)
+        batch.append(post)
+        if len(batch) == BATCH_SIZE:
+            Post.objects.bulk_update(batch, ['hot_score'])
+            batch = []
+    if batch:
+        Post.objects.bulk_update(batch, ['hot_score'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('groups', '0002_group_deleted_at'),
+        ('posts', '0005_post_attachments'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='hot_score',
+            field=models.FloatField(default=posts.ranking.initial_hot_score),
+        ),
+        migrations.RunPython(backfill_hot_scores, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['group', '-hot_score', '-id'], name='posts_post_group_hot_idx'),
+        ),
+    ]
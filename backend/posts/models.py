@@ -1,6 +1,10 @@
+import uuid
+
 from django.db import models
 from django.conf import settings
 
+from .ranking import initial_hot_score
+
 class Post(models.Model):
     author = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -16,10 +20,14 @@ class Post(models.Model):
     )
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    # Last edit of the post itself; counter changes do not touch it.
+    updated_at = models.DateTimeField(auto_now=True)
 
     # Counters
     likes_count = models.PositiveIntegerField(default=0, db_index=True)
     comments_count = models.PositiveIntegerField(default=0, db_index=True)
+    # Time-decayed rank, moved together with the counters; see posts.ranking.
+    hot_score = models.FloatField(default=initial_hot_score)
 
     # Convenience: list users who liked this post
     likes = models.ManyToManyField(
@@ -29,6 +37,14 @@ class Post(models.Model):
         blank=True,
     )
 
+    class Meta:
+        indexes = [
+            # Trending reads for the global feed (group IS NULL) and each group.
+            models.Index(fields=['group', '-hot_score', '-id'], name='posts_post_group_hot_idx'),
+            # Profile timelines seek down one author's posts, newest first.
+            models.Index(fields=['author', '-created_at', '-id'], name='posts_post_author_timeline_idx'),
+        ]
+
     def __str__(self):
         if self.group_id:
             return f'Post in {self.group.name} by {self.author.username} at {self.created_at:%Y-%m-%d %H:%M}'
@@ -70,6 +86,20 @@ class Comment(models.Model):
         on_delete=models.CASCADE,
         related_name='comments'
     )
+    # Replies are removed together with their thread by path range (see
+    # posts.threads), and the batched purges in users.deletion may delete a
+    # parent before its replies, so the database does not enforce this key.
+    parent = models.ForeignKey(
+        'self',
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='replies',
+        null=True,
+        blank=True,
+    )
+    path = models.CharField(max_length=250, default='', editable=False)
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
+    reply_count = models.PositiveIntegerField(default=0)
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -77,7 +107,101 @@ class Comment(models.Model):
     class Meta:
         indexes = [
             models.Index(fields=['post', 'created_at']),
+            # Whole threads and subtrees are one range scan over path.
+            models.Index(fields=['post', 'path'], name='posts_comment_thread_idx'),
+            # Pages of top-level comments, or of one comment's replies.
+            models.Index(fields=['post', 'depth', 'path'], name='posts_comment_level_idx'),
         ]
 
     def __str__(self):
-        return f'Comment by {self.author.username} on post {self.post_id}'
\ No newline at end of file
+        return f'Comment by {self.author.username} on post {self.post_id}'
+
+    def save(self, *args, **kwargs):
+        from .threads import segment
+
+        creating = self._state.adding
+        if creating and self.parent_id:
+            self.depth = self.parent.depth + 1
+        super().save(*args, **kwargs)
+        if creating and not self.path:
+            # The path ends in our own id, which only exists after the insert.
+            self.path = (self.parent.path if self.parent_id else '') + segment(self.pk)
+            Comment.objects.filter(pk=self.pk).update(path=self.path)
+
+
+class DirtyPost(models.Model):
+    """Posts whose counters may have drifted and need a recount."""
+
+    # Not a foreign key: marks must survive (and skip) posts deleted meanwhile.
+    post_id = models.BigIntegerField()
+    marked_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'Dirty post {self.post_id}'
+
+
+class CounterWatermark(models.Model):
+    name = models.CharField(max_length=50, unique=True)
+    value = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.name} @ {self.value}'
+
+
+class MediaBlob(models.Model):
+    """Uploaded file content, stored once per distinct SHA-256."""
+
+    sha256 = models.CharField(max_length=64, unique=True)
+    file = models.FileField(upload_to='attachments/')
+    size = models.PositiveBigIntegerField()
+    content_type = models.CharField(max_length=100)
+    # Image dimensions and the like, read when the blob is stored; see posts.uploads.read_metadata().
+    metadata = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.sha256[:12]} ({self.content_type}, {self.size} bytes)'
+
+
+class UploadSession(models.Model):
+    class Status(models.TextChoices):
+        UPLOADING = 'uploading', 'Uploading'
+        COMPLETE = 'complete', 'Complete'
+        FAILED = 'failed', 'Failed'
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='upload_sessions',
+    )
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100)
+    size = models.PositiveBigIntegerField()
+    sha256 = models.CharField(max_length=64)
+    received = models.PositiveBigIntegerField(default=0)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.UPLOADING)
+    blob = models.ForeignKey(MediaBlob, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'Upload {self.pk} ({self.received}/{self.size})'
+
+
+class PostAttachment(models.Model):
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='attachments',
+    )
+    blob = models.ForeignKey(MediaBlob, on_delete=models.PROTECT, related_name='attachments')
+    position = models.PositiveSmallIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['position', 'pk']
+
+    def __str__(self):
+        return f'Attachment {self.position} of post {self.post_id}'
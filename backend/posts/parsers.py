@@ -0,0 +1,12 @@
+from rest_framework.parsers import BaseParser
+
+from .ingest import iter_ndjson
+
+
+class NDJSONParser(BaseParser):
+    """Stream newline-delimited JSON as ``(line_number, record)`` pairs without buffering the body."""
+
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return iter_ndjson(stream)
@@ -0,0 +1,61 @@
+"""
+Time-decayed "hot" ranking for posts.
+
+    hot_score = log10(max(likes + 2 * comments, 1)) + age / HOT_DECAY_SECONDS
+
+where ``age`` is the post's creation time in seconds since ``HOT_EPOCH``
+(the Reddit formula). Newer posts start higher, and every tenfold increase in
+engagement is worth ``HOT_DECAY_SECONDS`` of recency. The time term never
+changes after creation, so the score only has to move when a counter does: it
+is stored in ``Post.hot_score``, updated in the same UPDATE as the counter,
+and trending lists are a plain read of the ``(group, -hot_score)`` index.
+"""
+import math
+from datetime import datetime, timezone as dt_timezone
+
+from django.db.models import F, Value
+from django.db.models.functions import Greatest, Log
+from django.utils import timezone
+
+
+HOT_EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+HOT_DECAY_SECONDS = 45000
+COMMENT_WEIGHT = 2
+
+
+def hot_score(likes, comments, created_at):
+    engagement = likes + COMMENT_WEIGHT * comments
+    return math.log10(max(engagement, 1)) + (created_at - HOT_EPOCH).total_seconds() / HOT_DECAY_SECONDS
+
+
+def initial_hot_score():
+    """Score of a post created now with no engagement; the model field default."""
+    return hot_score(0, 0, timezone.now())
+
+
+def _log_engagement(likes, comments):
+    return Log(10, Greatest(likes + comments * COMMENT_WEIGHT, Value(1)))
+
+
+def counter_updates(likes=None, comments=None):
+    """
+    ``update()`` kwargs that set the given counters to ``likes``/``comments``
+    (expressions over the current row) and move ``hot_score`` with them.
+
+    Every right-hand side of an UPDATE sees the row as it was before, so the
+    score swaps the old engagement term for the new one and keeps its time term.
+    """
+    updates = {}
+    if likes is not None:
+        updates['likes_count'] = likes
+    if comments is not None:
+        updates['comments_count'] = comments
+    updates['hot_score'] = (
+        F('hot_score')
+        - _log_engagement(F('likes_count'), F('comments_count'))
+        + _log_engagement(
+            F('likes_count') if likes is None else likes,
+            F('comments_count') if comments is None else comments,
+        )
+    )
+    return updates
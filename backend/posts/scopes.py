@@ -0,0 +1,33 @@
+"""Version scopes for conditional GETs of posts (see backend.conditional)."""
+from backend.conditional import bump_versions
+
+
+# Bumped by bulk jobs (imports, deletions, counter repairs) that touch many posts at once.
+ALL_POSTS = 'posts:all'
+# Author summaries are embedded in every post and comment.
+USERS = 'users'
+
+
+def list_scope(group_id):
+    return f'posts:group:{group_id}' if group_id else 'posts:feed'
+
+
+def post_scope(post_id):
+    return f'posts:{post_id}'
+
+
+def author_scope(author_id):
+    return f'posts:author:{author_id}'
+
+
+def feed_scopes(group_id=None):
+    return [ALL_POSTS, USERS, list_scope(group_id)]
+
+
+def post_scopes(post_id):
+    return [ALL_POSTS, USERS, post_scope(post_id)]
+
+
+def bump_post(post):
+    """A post, its likes or its comments changed: refresh its own views and its lists."""
+    bump_versions(post_scope(post.pk), list_scope(post.group_id), author_scope(post.author_id))
@@ -1,17 +1,24 @@
+import re
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from rest_framework import serializers
 
+from backend.fieldsets import IncludableMixin, SparseFieldsetMixin
 from groups.models import Group
-from .models import Comment, Like, Post
+from tags.indexing import index_comments, index_posts
+from users.fields import ProfilePictureField
+from .models import Comment, Like, Post, PostAttachment, UploadSession
 
 
 User = get_user_model()
 
 
-class PostAuthorSerializer(serializers.ModelSerializer):
+class PostAuthorSerializer(IncludableMixin, SparseFieldsetMixin, serializers.ModelSerializer):
     firstName = serializers.CharField(source='first_name', read_only=True)
     lastName = serializers.CharField(source='last_name', read_only=True)
-    profilePicture = serializers.ImageField(source='profile_picture', read_only=True)
+    profilePicture = ProfilePictureField(read_only=True)
 
     class Meta:
         model = User
@@ -24,8 +31,16 @@ class PostAuthorSerializer(serializers.ModelSerializer):
         ]
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     author = PostAuthorSerializer(read_only=True)
+    parentId = serializers.PrimaryKeyRelatedField(
+        source='parent',
+        queryset=Comment.objects.all(),
+        required=False,
+        allow_null=True,
+    )
+    replyCount = serializers.IntegerField(source='reply_count', read_only=True)
+    replies = serializers.SerializerMethodField()
     createdAt = serializers.DateTimeField(source='created_at', read_only=True)
     updatedAt = serializers.DateTimeField(source='updated_at', read_only=True)
 
@@ -35,6 +50,10 @@ class CommentSerializer(serializers.ModelSerializer):
             'id',
             'post',
             'author',
+            'parentId',
+            'depth',
+            'replyCount',
+            'replies',
             'content',
             'createdAt',
             'updatedAt',
@@ -43,6 +62,9 @@ class CommentSerializer(serializers.ModelSerializer):
             'id',
             'post',
             'author',
+            'depth',
+            'replyCount',
+            'replies',
             'createdAt',
             'updatedAt',
         ]
@@ -52,6 +74,27 @@ class CommentSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError('Content cannot be empty.')
         return value
 
+    def create(self, validated_data):
+        with transaction.atomic():
+            comment = super().create(validated_data)
+            index_comments([comment])
+        return comment
+
+    def update(self, instance, validated_data):
+        # A comment stays in the thread it was posted to.
+        validated_data.pop('parent', None)
+        with transaction.atomic():
+            comment = super().update(instance, validated_data)
+            index_comments([comment])
+        return comment
+
+    def get_replies(self, obj):
+        # Only threads loaded through posts.threads carry their replies.
+        children = getattr(obj, 'children', None)
+        if children is None:
+            return None
+        return CommentSerializer(children, many=True, context=self.context).data
+
 
 class LikeSerializer(serializers.ModelSerializer):
     user = PostAuthorSerializer(read_only=True)
@@ -73,6 +116,22 @@ class LikeSerializer(serializers.ModelSerializer):
         ]
 
 
+class LikerSerializer(serializers.ModelSerializer):
+    user = PostAuthorSerializer(read_only=True)
+    likedAt = serializers.DateTimeField(source='created_at', read_only=True)
+    isFriend = serializers.BooleanField(source='is_friend', read_only=True)
+
+    class Meta:
+        model = Like
+        fields = [
+            'id',
+            'user',
+            'likedAt',
+            'isFriend',
+        ]
+        read_only_fields = fields
+
+
 class GroupSummarySerializer(serializers.ModelSerializer):
     class Meta:
         model = Group
@@ -83,14 +142,85 @@ class GroupSummarySerializer(serializers.ModelSerializer):
         ]
 
 
-class PostSerializer(serializers.ModelSerializer):
+class UploadSessionSerializer(serializers.ModelSerializer):
+    contentType = serializers.CharField(source='content_type', max_length=100)
+    offset = serializers.IntegerField(source='received', read_only=True)
+    chunkMaxSize = serializers.SerializerMethodField()
+
+    class Meta:
+        model = UploadSession
+        fields = [
+            'id',
+            'filename',
+            'contentType',
+            'size',
+            'sha256',
+            'offset',
+            'status',
+            'chunkMaxSize',
+        ]
+        read_only_fields = [
+            'id',
+            'offset',
+            'status',
+            'chunkMaxSize',
+        ]
+
+    def validate_contentType(self, value):
+        if not value.startswith(settings.ATTACHMENT_CONTENT_TYPES):
+            raise serializers.ValidationError('Only images and videos can be attached.')
+        return value
+
+    def validate_size(self, value):
+        if value < 1 or value > settings.ATTACHMENT_MAX_SIZE:
+            raise serializers.ValidationError(
+                f'Size must be between 1 and {settings.ATTACHMENT_MAX_SIZE} bytes.'
+            )
+        return value
+
+    def validate_sha256(self, value):
+        value = value.lower()
+        if not re.fullmatch(r'[0-9a-f]{64}', value):
+            raise serializers.ValidationError('Must be a hex-encoded SHA-256 digest.')
+        return value
+
+    def get_chunkMaxSize(self, obj):
+        return settings.UPLOAD_CHUNK_MAX_SIZE
+
+
+class PostAttachmentSerializer(serializers.ModelSerializer):
+    url = serializers.FileField(source='blob.file', read_only=True)
+    contentType = serializers.CharField(source='blob.content_type', read_only=True)
+    size = serializers.IntegerField(source='blob.size', read_only=True)
+    metadata = serializers.JSONField(source='blob.metadata', read_only=True)
+
+    class Meta:
+        model = PostAttachment
+        fields = [
+            'id',
+            'url',
+            'contentType',
+            'size',
+            'metadata',
+        ]
+
+
+class PostSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     author = PostAuthorSerializer(read_only=True)
     createdAt = serializers.DateTimeField(source='created_at', read_only=True)
+    updatedAt = serializers.DateTimeField(source='updated_at', read_only=True)
     likesCount = serializers.IntegerField(source='likes_count', read_only=True)
     commentsCount = serializers.IntegerField(source='comments_count', read_only=True)
     comments = CommentSerializer(many=True, read_only=True)
     group = GroupSummarySerializer(read_only=True)
     viewerHasLiked = serializers.SerializerMethodField()
+    attachments = PostAttachmentSerializer(many=True, read_only=True)
+    uploadIds = serializers.ListField(
+        child=serializers.UUIDField(),
+        write_only=True,
+        required=False,
+        max_length=settings.POST_MAX_ATTACHMENTS,
+    )
 
     class Meta:
         model = Post
@@ -99,21 +229,30 @@ class PostSerializer(serializers.ModelSerializer):
             'author',
             'content',
             'createdAt',
+            'updatedAt',
             'likesCount',
             'commentsCount',
             'comments',
             'group',
             'viewerHasLiked',
+            'attachments',
+            'uploadIds',
+        ]
+        expandable_fields = [
+            'comments',
+            'attachments',
         ]
         read_only_fields = [
             'id',
             'author',
             'createdAt',
+            'updatedAt',
             'likesCount',
             'commentsCount',
             'comments',
             'group',
             'viewerHasLiked',
+            'attachments',
         ]
 
     def validate_content(self, value):
@@ -121,6 +260,43 @@ class PostSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError('Content cannot be empty.')
         return value
 
+    def validate_uploadIds(self, value):
+        request = self.context.get('request')
+        blobs = dict(
+            UploadSession.objects.filter(
+                pk__in=value,
+                owner_id=request.user.pk,
+                status=UploadSession.Status.COMPLETE,
+            ).values_list('pk', 'blob_id')
+        )
+        if len(blobs) != len(set(value)):
+            raise serializers.ValidationError('Every upload must be one of your completed uploads.')
+        return [blobs[upload_id] for upload_id in value]
+
+    def create(self, validated_data):
+        blob_ids = validated_data.pop('uploadIds', [])
+        with transaction.atomic():
+            post = super().create(validated_data)
+            self._attach(post, blob_ids)
+            index_posts([post])
+        return post
+
+    def update(self, instance, validated_data):
+        blob_ids = validated_data.pop('uploadIds', None)
+        with transaction.atomic():
+            post = super().update(instance, validated_data)
+            if blob_ids is not None:
+                post.attachments.all().delete()
+                self._attach(post, blob_ids)
+            index_posts([post])
+        return post
+
+    def _attach(self, post, blob_ids):
+        PostAttachment.objects.bulk_create(
+            PostAttachment(post=post, blob_id=blob_id, position=position)
+            for position, blob_id in enumerate(blob_ids)
+        )
+
     def get_viewerHasLiked(self, obj):
         request = self.context.get('request')
         user = getattr(request, 'user', None)
@@ -134,3 +310,10 @@ class PostSerializer(serializers.ModelSerializer):
 
         return obj.post_likes.filter(user_id=user.pk).exists()
 
+
+class PostBatchSerializer(PostSerializer):
+    """Posts as embedded elsewhere: counters but no comments, which load from the post's own endpoints."""
+
+    class Meta(PostSerializer.Meta):
+        fields = [name for name in PostSerializer.Meta.fields if name not in ('comments', 'uploadIds')]
+        expandable_fields = ['attachments']
@@ -0,0 +1,21 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
+
+from .counters import mark_dirty
+from .models import Comment, Like
+
+
+User = get_user_model()
+
+
+@receiver(pre_delete, sender=User)
+def mark_posts_touched_by_deleted_user(sender, instance, **kwargs):
+    # Deleting a user cascades through their likes and comments without
+    # touching the counters on other people's posts.
+    liked = Like.objects.filter(user_id=instance.pk).exclude(post__author_id=instance.pk)
+    commented = Comment.objects.filter(author_id=instance.pk).exclude(post__author_id=instance.pk)
+    mark_dirty(
+        list(liked.values_list('post_id', flat=True))
+        + list(commented.values_list('post_id', flat=True))
+    )
@@ -1,3 +1,920 @@
-from django.test import TestCase
+import asyncio
+import base64
+import hashlib
+import io
+import json
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import nullcontext
+from io import StringIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from PIL import Image
+from rest_framework.test import APITestCase
+
+from backend.replicas import is_pinned_to_primary
+from backend.singleflight import SingleFlight, reset_singleflight
+from backend.throttling import db_latency, reset_throttling
+from groups.models import Group, GroupMembership
+from .models import Comment, DirtyPost, Like, MediaBlob, Post, UploadSession
+from .ranking import hot_score
+from .threads import load_replies
+from .views import (
+    CommentThreadPagination,
+    LikerPagination,
+    TimelinePagination,
+    TrendingPagination,
+    feed_flight,
+)
+
+User = get_user_model()
+
+
+def encode_cursor(position):
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+
+class PostBulkImportViewTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='admin',
+            email='admin@example.com',
+            password='password123',
+            is_staff=True,
+        )
+        self.author = User.objects.create_user(
+            username='alice',
+            email='alice@example.com',
+            password='password123',
+        )
+        self.outsider = User.objects.create_user(
+            username='bob',
+            email='bob@example.com',
+            password='password123',
+        )
+        self.group = Group.objects.create(name='Chess Club', owner=self.author)
+        GroupMembership.objects.create(
+            group=self.group,
+            user=self.author,
+            role=GroupMembership.Role.OWNER,
+        )
+        self.url = reverse('posts:post-bulk-import')
+
+    def post_ndjson(self, records):
+        body = '\n'.join(
+            record if isinstance(record, str) else json.dumps(record) for record in records
+        )
+        return self.client.post(self.url, data=body, content_type='application/x-ndjson')
+
+    def test_imports_posts_and_comments_with_counts(self):
+        self.client.force_authenticate(self.admin)
+        response = self.post_ndjson(
+            [
+                {'type': 'post', 'ref': 'p1', 'authorId': self.author.pk, 'content': 'Hello'},
+                {
+                    'type': 'post',
+                    'ref': 'p2',
+                    'authorId': self.author.pk,
+                    'groupId': self.group.pk,
+                    'content': 'Group hello',
+                    'createdAt': '2024-01-01T12:00:00Z',
+                },
+                {'type': 'comment', 'postRef': 'p1', 'authorId': self.outsider.pk, 'content': 'Hi'},
+                {'type': 'comment', 'postRef': 'p1', 'authorId': self.author.pk, 'content': 'Hey'},
+                {'type': 'comment', 'postRef': 'p2', 'authorId': self.author.pk, 'content': 'Yo'},
+            ]
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['posts'], 2)
+        self.assertEqual(response.data['comments'], 3)
+        self.assertEqual(response.data['errors'], [])
+
+        first = Post.objects.get(pk=response.data['refs']['p1'])
+        second = Post.objects.get(pk=response.data['refs']['p2'])
+        self.assertEqual(first.comments_count, 2)
+        self.assertEqual(second.comments_count, 1)
+        self.assertEqual(second.group_id, self.group.pk)
+        self.assertEqual(second.created_at.year, 2024)
+
+    def test_invalid_lines_are_reported_and_skipped(self):
+        self.client.force_authenticate(self.admin)
+        response = self.post_ndjson(
+            [
+                'not json',
+                {'type': 'post', 'ref': 'p1', 'authorId': self.outsider.pk, 'groupId': self.group.pk, 'content': 'x'},
+                {'type': 'comment', 'postRef': 'p1', 'authorId': self.author.pk, 'content': 'orphan'},
+                {'type': 'post', 'authorId': self.author.pk, 'content': '   '},
+            ]
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['posts'], 0)
+        self.assertEqual(response.data['comments'], 0)
+        self.assertEqual([error['line'] for error in response.data['errors']], [1, 2, 3, 4])
+        self.assertFalse(Comment.objects.exists())
+
+    def test_requires_staff(self):
+        self.client.force_authenticate(self.author)
+        response = self.post_ndjson([{'type': 'post', 'authorId': self.author.pk, 'content': 'Hi'}])
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class CounterReconciliationTests(APITestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(
+            username='alice',
+            email='alice@example.com',
+            password='password123',
+        )
+        self.fan = User.objects.create_user(
+            username='bob',
+            email='bob@example.com',
+            password='password123',
+        )
+        self.post = Post.objects.create(author=self.author, content='Hello', likes_count=1, comments_count=1)
+        Like.objects.create(user=self.fan, post=self.post)
+        Comment.objects.create(post=self.post, author=self.fan, content='Nice')
+
+    def test_deleting_user_marks_touched_posts_and_reconcile_fixes_counts(self):
+        self.fan.delete()
+
+        self.assertTrue(DirtyPost.objects.filter(post_id=self.post.pk).exists())
+        call_command('reconcile_counters', stdout=StringIO())
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 0)
+        self.assertEqual(self.post.comments_count, 0)
+        self.assertFalse(DirtyPost.objects.exists())
+
+    def test_full_sweep_fixes_unmarked_drift(self):
+        Post.objects.filter(pk=self.post.pk).update(likes_count=7, comments_count=0)
+
+        call_command('reconcile_counters', '--full', '--batch-size', '1', stdout=StringIO())
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 1)
+        self.assertEqual(self.post.comments_count, 1)
+        self.assertAlmostEqual(self.post.hot_score, hot_score(1, 1, self.post.created_at))
+
+
+class TrendingPostTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='alice',
+            email='alice@example.com',
+            password='password123',
+        )
+        self.fans = [
+            User.objects.create_user(username=f'fan{i}', email=f'fan{i}@example.com', password='password123')
+            for i in range(3)
+        ]
+        self.quiet = Post.objects.create(author=self.user, content='Quiet')
+        self.popular = Post.objects.create(author=self.user, content='Popular')
+        self.newest = Post.objects.create(author=self.user, content='Newest')
+        self.group = Group.objects.create(name='Chess Club', owner=self.user)
+        GroupMembership.objects.create(group=self.group, user=self.user, role=GroupMembership.Role.OWNER)
+        self.group_post = Post.objects.create(author=self.user, group=self.group, content='Group')
+        self.url = reverse('posts:post-trending')
+
+    def test_likes_and_comments_move_hot_score(self):
+        for fan in self.fans:
+            self.client.force_authenticate(fan)
+            self.client.post(reverse('posts:post-like-toggle', args=[self.popular.pk]))
+        self.client.post(
+            reverse('posts:comment-list-create', args=[self.popular.pk]),
+            {'content': 'Great'},
+        )
+        self.client.post(reverse('posts:post-like-toggle', args=[self.popular.pk]))
+
+        self.popular.refresh_from_db()
+        self.assertAlmostEqual(self.popular.hot_score, hot_score(2, 1, self.popular.created_at))
+
+        self.client.force_authenticate(self.user)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [post['id'] for post in response.data['results']],
+            [self.popular.pk, self.newest.pk, self.quiet.pk],
+        )
+
+    @mock.patch.object(TrendingPagination, 'page_size', 2)
+    def test_pages_continue_in_score_order(self):
+        self.client.force_authenticate(self.user)
+        first = self.client.get(self.url).data
+        second = self.client.get(first['next']).data
+
+        ids = [post['id'] for post in first['results'] + second['results']]
+        self.assertEqual(ids, [self.newest.pk, self.popular.pk, self.quiet.pk])
+        self.assertIsNone(second['next'])
+
+    def test_group_scope_requires_membership(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(self.url, {'group': self.group.pk})
+        self.assertEqual([post['id'] for post in response.data['results']], [self.group_post.pk])
+
+        self.client.force_authenticate(self.fans[0])
+        response = self.client.get(self.url, {'group': self.group.pk})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class LikeListTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='alice',
+            email='alice@example.com',
+            password='password123',
+        )
+        self.post = Post.objects.create(author=self.user, content='Hello')
+        self.likers = [
+            User.objects.create_user(username=name, email=f'{name}@example.com', password='password123')
+            for name in ['friend', 'stranger1', 'stranger2']
+        ]
+        self.user.add_friend(self.likers[0])
+        for liker in self.likers:
+            self.client.force_authenticate(liker)
+            self.client.post(reverse('posts:post-like-toggle', args=[self.post.pk]))
+        self.url = reverse('posts:post-like-list', args=[self.post.pk])
+        self.client.force_authenticate(self.user)
+
+    def test_friends_come_first_then_newest(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total'], 3)
+        self.assertEqual(
+            [(like['user']['username'], like['isFriend']) for like in response.data['results']],
+            [('friend', True), ('stranger2', False), ('stranger1', False)],
+        )
+        self.assertIsNone(response.data['next'])
+
+    @mock.patch.object(LikerPagination, 'page_size', 1)
+    def test_cursor_crosses_from_friends_to_others(self):
+        usernames = []
+        url = self.url
+        while url:
+            data = self.client.get(url).data
+            usernames += [like['user']['username'] for like in data['results']]
+            url = data['next']
+        self.assertEqual(usernames, ['friend', 'stranger2', 'stranger1'])
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get(self.url, {'cursor': 'WyJub3BlIiwgMSwgMl0='})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get(self.url, {'cursor': encode_cursor(['friends', 'x', {}])})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class UserTimelineTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(
+            username='alice',
+            email='alice@example.com',
+            password='password123',
+        )
+        self.viewer = User.objects.create_user(
+            username='bob',
+            email='bob@example.com',
+            password='password123',
+        )
+        self.shared = Group.objects.create(name='Shared', owner=self.author)
+        self.private = Group.objects.create(name='Private', owner=self.author)
+        for group in (self.shared, self.private):
+            GroupMembership.objects.create(group=group, user=self.author, role=GroupMembership.Role.OWNER)
+        self.posts = [
+            Post.objects.create(author=self.author, content='Public'),
+            Post.objects.create(author=self.author, group=self.shared, content='Shared'),
+            Post.objects.create(author=self.author, group=self.private, content='Private'),
+            Post.objects.create(author=self.author, content='Latest'),
+        ]
+        Post.objects.create(author=self.viewer, content='Not hers')
+        self.url = reverse('posts:user-posts', args=[self.author.pk])
+        self.client.force_authenticate(self.viewer)
+
+    def contents(self, response):
+        return [post['content'] for post in response.data['results']]
+
+    def test_lists_only_groups_the_viewer_belongs_to(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.contents(response), ['Latest', 'Public'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('groups:group-join', args=[self.shared.pk]))
+        self.assertEqual(self.contents(self.client.get(self.url)), ['Latest', 'Shared', 'Public'])
+
+    def test_removed_member_loses_access_at_once(self):
+        GroupMembership.objects.create(group=self.shared, user=self.viewer)
+        self.assertEqual(self.contents(self.client.get(self.url)), ['Latest', 'Shared', 'Public'])
+
+        # Removed without going through the views, so no cache is invalidated.
+        GroupMembership.objects.filter(group=self.shared, user=self.viewer).delete()
+        self.assertEqual(self.contents(self.client.get(self.url)), ['Latest', 'Public'])
+
+    @mock.patch.object(TimelinePagination, 'page_size', 1)
+    def test_cursor_walks_newest_first(self):
+        contents = []
+        url = self.url
+        while url:
+            data = self.client.get(url).data
+            contents += [post['content'] for post in data['results']]
+            url = data['next']
+        self.assertEqual(contents, ['Latest', 'Public'])
+
+    def test_cursor_values_must_fit_their_columns(self):
+        for position in (['x', {}], ['2026-01-01T00:00:00+00:00', '7'], [None, 7], ['2026-01-01', True]):
+            response = self.client.get(self.url, {'cursor': encode_cursor(position)})
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND, position)
+
+    def test_unknown_or_inactive_user_is_404(self):
+        User.objects.filter(pk=self.author.pk).update(is_active=False)
+        response = self.client.get(reverse('posts:user-posts', args=[self.author.pk + 100]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class PostBatchTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='alice',
+            email='alice@example.com',
+            password='password123',
+        )
+        self.group = Group.objects.create(name='Private', owner=self.user)
+        self.posts = [Post.objects.create(author=self.user, content=f'Post {i}') for i in range(4)]
+        self.hidden = Post.objects.create(author=self.user, group=self.group, content='Hidden')
+        self.url = reverse('posts:post-batch')
+        self.client.force_authenticate(self.user)
+
+    def get_batch(self, ids):
+        return self.client.get(self.url, {'ids': ','.join(str(pk) for pk in ids)})
+
+    def test_keeps_input_order_and_reports_missing(self):
+        ids = [self.posts[2].pk, self.hidden.pk, self.posts[0].pk, 999, self.posts[2].pk]
+        response = self.get_batch(ids)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([post['id'] for post in response.data['results']], [self.posts[2].pk, self.posts[0].pk])
+        self.assertEqual(response.data['missing'], [self.hidden.pk, 999])
+        self.assertNotIn('comments', response.data['results'][0])
+
+        membership = GroupMembership.objects.create(group=self.group, user=self.user)
+        response = self.get_batch([self.hidden.pk])
+        self.assertEqual(response.data['results'][0]['content'], 'Hidden')
+
+        # Leaving takes effect on the next read, with no cache to clear.
+        membership.delete()
+        self.assertEqual(self.get_batch([self.hidden.pk]).data['missing'], [self.hidden.pk])
+
+    def test_query_count_does_not_grow_with_batch_size(self):
+        self.get_batch([self.posts[0].pk])
+        with self.assertNumQueries(2):
+            self.get_batch([self.posts[0].pk])
+        with self.assertNumQueries(2):
+            self.get_batch([post.pk for post in self.posts])
+
+    def test_rejects_bad_or_oversized_id_lists(self):
+        self.assertEqual(self.get_batch([]).status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(self.url, {'ids': '1,two'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.get_batch(range(1, 202)).status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class CommentThreadTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        reset_throttling()
+        self.user = User.objects.create_user(
+            username='alice',
+            email='alice@example.com',
+            password='password123',
+        )
+        self.post = Post.objects.create(author=self.user, content='Hello')
+        self.url = reverse('posts:comment-list-create', args=[self.post.pk])
+        self.client.force_authenticate(self.user)
+
+    def _comment(self, content, parent=None):
+        data = {'content': content}
+        if parent is not None:
+            data['parentId'] = parent
+        response = self.client.post(self.url, data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        return response.data['id']
+
+    def test_replies_nest_and_keep_counts(self):
+        first = self._comment('First')
+        reply = self._comment('Reply', first)
+        nested = self._comment('Nested', reply)
+        second = self._comment('Second')
+
+        response = self.client.get(self.url, {'depth': 2})
+        self.assertEqual([comment['id'] for comment in response.data['results']], [first, second])
+        thread = response.data['results'][0]
+        self.assertEqual(thread['replyCount'], 1)
+        self.assertEqual(thread['replies'][0]['id'], reply)
+        self.assertEqual(thread['replies'][0]['depth'], 1)
+        self.assertEqual(thread['replies'][0]['replies'][0]['id'], nested)
+
+        shallow = self.client.get(self.url).data['results'][0]
+        self.assertEqual(shallow['replies'][0]['replies'], [])
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 4)
+
+    def test_thread_loads_in_one_query(self):
+        roots = []
+        for index in range(3):
+            root = Comment.objects.create(post=self.post, author=self.user, content=f'Root {index}')
+            child = Comment.objects.create(post=self.post, author=self.user, content='Child', parent=root)
+            Comment.objects.create(post=self.post, author=self.user, content='Grandchild', parent=child)
+            roots.append(root)
+
+        with self.assertNumQueries(1):
+            load_replies(roots, depth=5)
+        self.assertEqual([len(root.children[0].children) for root in roots], [1, 1, 1])
+
+    @mock.patch.object(CommentThreadPagination, 'page_size', 2)
+    def test_replies_endpoint_pages_direct_replies(self):
+        first = self._comment('First')
+        replies = [self._comment(f'Reply {index}', first) for index in range(3)]
+        self._comment('Elsewhere')
+
+        url = reverse('posts:comment-replies', args=[self.post.pk, first])
+        page = self.client.get(url).data
+        self.assertEqual([comment['id'] for comment in page['results']], replies[:2])
+        page = self.client.get(page['next']).data
+        self.assertEqual([comment['id'] for comment in page['results']], replies[2:])
+        self.assertIsNone(page['next'])
+
+    def test_deleting_a_comment_removes_its_thread(self):
+        first = self._comment('First')
+        reply = self._comment('Reply', first)
+        self._comment('Nested', reply)
+        second = self._comment('Second')
+
+        response = self.client.delete(reverse('posts:comment-detail', args=[self.post.pk, reply]))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        self.assertEqual(set(Comment.objects.values_list('pk', flat=True)), {first, second})
+        self.assertEqual(Comment.objects.get(pk=first).reply_count, 0)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 2)
+
+    def test_reply_must_stay_on_the_post(self):
+        other_post = Post.objects.create(author=self.user, content='Other')
+        foreign = Comment.objects.create(post=other_post, author=self.user, content='Elsewhere')
+
+        response = self.client.post(self.url, {'content': 'Reply', 'parentId': foreign.pk})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('parentId', response.data)
+
+
+@override_settings(CONDITIONAL_GET=True)
+class ConditionalGetTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='alice',
+            email='alice@example.com',
+            password='password123',
+        )
+        self.post = Post.objects.create(author=self.user, content='Hello')
+        self.feed_url = reverse('posts:post-list-create')
+        self.detail_url = reverse('posts:post-detail', args=[self.post.pk])
+        self.client.force_authenticate(self.user)
+
+    def test_unchanged_feed_revalidates_without_queries(self):
+        response = self.client.get(self.feed_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('ETag', response)
+        self.assertNotIn('Last-Modified', response)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.feed_url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    @override_settings(CONDITIONAL_GET=False)
+    def test_no_validators_without_a_shared_version_store(self):
+        response = self.client.get(self.feed_url)
+        self.assertNotIn('ETag', response)
+
+    def test_like_and_comment_change_the_validators(self):
+        etags = {url: self.client.get(url)['ETag'] for url in (self.feed_url, self.detail_url)}
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('posts:post-like-toggle', args=[self.post.pk]))
+
+        for url, etag in etags.items():
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotEqual(response['ETag'], etag)
+
+        comments_url = reverse('posts:comment-list-create', args=[self.post.pk])
+        etag = self.client.get(comments_url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(comments_url, {'content': 'Nice'})
+        response = self.client.get(comments_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_delete_bumps_validators_on_commit(self):
+        etag = self.client.get(self.feed_url)['ETag']
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.delete(self.detail_url)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        # Nothing is bumped until the delete commits.
+        response = self.client.get(self.feed_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        for callback in callbacks:
+            callback()
+        response = self.client.get(self.feed_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [])
+
+    def test_etag_differs_per_viewer(self):
+        other = User.objects.create_user(username='bob', email='bob@example.com', password='password123')
+        etag = self.client.get(self.detail_url)['ETag']
+
+        self.client.force_authenticate(other)
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class FeedCoalescingTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        reset_singleflight()
+        self.user = User.objects.create_user(
+            username='alice',
+            email='alice@example.com',
+            password='password123',
+        )
+        self.other = User.objects.create_user(username='bob', email='bob@example.com', password='password123')
+        self.group = Group.objects.create(name='Chess Club', owner=self.user)
+        for user in (self.user, self.other):
+            GroupMembership.objects.create(group=self.group, user=user)
+        self.posts = [Post.objects.create(author=self.user, group=self.group, content=f'Post {i}') for i in range(2)]
+        Like.objects.create(user=self.other, post=self.posts[0])
+        self.url = reverse('groups:group-posts', args=[self.group.pk])
+
+    def test_concurrent_threads_share_one_computation(self):
+        flight = SingleFlight('test-threads')
+        release = threading.Event()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            release.wait(5)
+            return {'posts': [1, 2]}
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(flight.do('feed', compute))) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        while flight.stats()['shared'] < 4:
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'posts': [1, 2]}] * 5)
+        self.assertEqual(flight.stats()['collapseRatio'], 5.0)
+
+    def test_concurrent_coroutines_share_one_computation(self):
+        flight = SingleFlight('test-async')
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return 'page'
+
+        async def burst():
+            return await asyncio.gather(*[flight.do_async('feed', compute) for _ in range(5)])
+
+        self.assertEqual(asyncio.run(burst()), ['page'] * 5)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(flight.stats()['shared'], 4)
+
+    def test_viewers_share_the_page_but_see_their_own_likes(self):
+        self.client.force_authenticate(self.user)
+        mine = self.client.get(self.url).data
+        self.client.force_authenticate(self.other)
+        # The group and the viewer's groups, then only the viewer's likes.
+        with self.assertNumQueries(3):
+            theirs = self.client.get(self.url).data
+
+        self.assertEqual([post['viewerHasLiked'] for post in mine], [False, False])
+        self.assertEqual([post['viewerHasLiked'] for post in theirs], [False, True])
+        self.assertEqual([post['content'] for post in theirs], ['Post 1', 'Post 0'])
+        self.assertEqual(feed_flight.stats()['cached'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(self.url, {'content': 'Post 2'})
+        self.assertEqual(len(self.client.get(self.url).data), 3)
+
+
+class SparseFieldsetTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='alice',
+            email='alice@example.com',
+            password='password123',
+        )
+        self.friend = User.objects.create_user(username='bob', email='bob@example.com', password='password123')
+        for index in range(3):
+            post = Post.objects.create(author=self.user, content=f'Post {index}')
+            Comment.objects.create(post=post, author=self.friend, content='Nice')
+            Comment.objects.create(post=post, author=self.user, content='Thanks')
+        self.url = reverse('posts:post-list-create')
+        self.client.force_authenticate(self.user)
+
+    def test_fields_limit_the_payload_at_every_depth(self):
+        response = self.client.get(self.url, {'fields': 'id,author.username,likesCount'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data[0]), {'id', 'author', 'likesCount'})
+        self.assertEqual(response.data[0]['author'], {'username': 'alice'})
+
+    def test_expandable_fields_need_expand_once_sparse(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, {'fields': 'id,content'})
+        self.assertNotIn('comments', response.data[0])
+
+        response = self.client.get(self.url, {'fields': 'id', 'expand': 'comments'})
+        self.assertEqual(set(response.data[0]), {'id', 'comments'})
+        self.assertEqual(len(response.data[0]['comments']), 2)
+
+        response = self.client.get(self.url, {'expand': 'attachments'})
+        self.assertIn('content', response.data[0])
+        self.assertIn('attachments', response.data[0])
+        self.assertNotIn('comments', response.data[0])
+
+    def test_full_payload_without_parameters(self):
+        response = self.client.get(self.url)
+        self.assertIn('comments', response.data[0])
+        self.assertIn('attachments', response.data[0])
+
+    def test_normalize_users_sends_each_user_once(self):
+        response = self.client.get(self.url, {'normalize': 'users', 'expand': 'comments'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        users = response.data['includes']['users']
+        self.assertEqual(set(users), {self.user.pk, self.friend.pk})
+        self.assertEqual(users[self.friend.pk]['username'], 'bob')
+        post = response.data['results'][0]
+        self.assertEqual(post['author'], self.user.pk)
+        self.assertEqual({comment['author'] for comment in post['comments']}, {self.user.pk, self.friend.pk})
+
+        response = self.client.get(self.url, {'normalize': 'groups'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_feed_is_compressed(self):
+        plain = self.client.get(self.url)
+        compressed = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', compressed['Vary'])
+        self.assertLess(len(compressed.content), len(plain.content))
+
+
+@override_settings(THROTTLE_POLICIES={'likes': {'rate': 0.001, 'burst': 2}})
+class LikeThrottleTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        reset_throttling()
+        self.addCleanup(reset_throttling)
+        self.user = User.objects.create_user(
+            username='alice',
+            email='alice@example.com',
+            password='password123',
+        )
+        self.other = User.objects.create_user(username='bob', email='bob@example.com', password='password123')
+        self.post = Post.objects.create(author=self.user, content='Hello')
+        self.url = reverse('posts:post-like-toggle', args=[self.post.pk])
+
+    def _toggle(self, user):
+        self.client.force_authenticate(user)
+        return self.client.post(self.url)
+
+    def _assert_bucket_per_user(self):
+        self.assertEqual(self._toggle(self.user).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self._toggle(self.user).status_code, status.HTTP_200_OK)
+
+        response = self._toggle(self.user)
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(self._toggle(self.other).status_code, status.HTTP_201_CREATED)
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 1)
+
+    def test_local_bucket(self):
+        self._assert_bucket_per_user()
+
+    @override_settings(THROTTLE_BACKEND='cache')
+    def test_shared_cache_bucket(self):
+        self._assert_bucket_per_user()
+
+    def test_reads_are_not_throttled(self):
+        self.client.force_authenticate(self.user)
+        for _ in range(3):
+            response = self.client.get(reverse('posts:comment-list-create', args=[self.post.pk]))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(ADMISSION_LATENCY_MS=50)
+    def test_slow_database_sheds_writes(self):
+        db_latency.value = 10_000
+        response = self._toggle(self.user)
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertFalse(Like.objects.exists())
+
+        db_latency.reset()
+        self.assertEqual(self._toggle(self.user).status_code, status.HTTP_201_CREATED)
+
+        staff = User.objects.create_user(
+            username='admin',
+            email='admin@example.com',
+            password='password123',
+            is_staff=True,
+        )
+        self.client.force_authenticate(staff)
+        stats = self.client.get(reverse('ops-metrics')).data['throttling']
+        self.assertEqual(stats['scopes']['likes'], {'allowed': 1, 'throttled': 0, 'shed': 1})
+
+    @override_settings(ADMISSION_LATENCY_MS=50)
+    def test_shedding_stops_once_the_average_fades(self):
+        db_latency.value = 10_000
+        self.assertEqual(self._toggle(self.user).status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        # No queries ran meanwhile, yet a minute later the spike is forgotten.
+        later = time.monotonic() + 60
+        with mock.patch('backend.throttling.time.monotonic', return_value=later):
+            self.assertLess(db_latency.value, 50)
+            self.assertEqual(self._toggle(self.user).status_code, status.HTTP_201_CREATED)
+
+
+@mock.patch('backend.replicas.replica_configured', return_value=True)
+class ReplicaRoutingTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='alice',
+            email='alice@example.com',
+            password='password123',
+        )
+        self.url = reverse('posts:post-list-create')
+        self.client.force_authenticate(self.user)
+
+    def test_feed_reads_use_replica(self, _configured):
+        with mock.patch('backend.replicas.use_replica', return_value=nullcontext()) as use_replica:
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        use_replica.assert_called_once()
+
+    def test_reads_after_a_write_stay_on_primary(self, _configured):
+        response = self.client.post(self.url, {'content': 'Hello'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(is_pinned_to_primary(self.user.pk))
+
+        with mock.patch('backend.replicas.use_replica', return_value=nullcontext()) as use_replica:
+            self.client.get(self.url)
+
+        use_replica.assert_not_called()
+
+
+class AttachmentUploadTests(APITestCase):
+    def setUp(self):
+        root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, root)
+        override = self.settings(
+            MEDIA_ROOT=root / 'media',
+            UPLOAD_PARTIAL_DIR=root / 'partial',
+            UPLOAD_CHUNK_MAX_SIZE=1024,
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.user = User.objects.create_user(
+            username='alice',
+            email='alice@example.com',
+            password='password123',
+        )
+        self.client.force_authenticate(self.user)
+
+        buffer = io.BytesIO()
+        Image.effect_noise((40, 30), 64).convert('RGB').save(buffer, 'PNG')
+        self.content = buffer.getvalue()
+        self.sha256 = hashlib.sha256(self.content).hexdigest()
+
+    def open_session(self):
+        response = self.client.post(
+            reverse('posts:upload-create'),
+            {'filename': 'photo.png', 'contentType': 'image/png', 'size': len(self.content), 'sha256': self.sha256},
+            format='json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data
+
+    def send(self, session_id, offset, data):
+        return self.client.put(
+            reverse('posts:upload-detail', args=[session_id]),
+            {'chunk': SimpleUploadedFile('blob', data)},
+            format='multipart',
+            HTTP_UPLOAD_OFFSET=str(offset),
+            HTTP_UPLOAD_CHECKSUM=f'sha256 {hashlib.sha256(data).hexdigest()}',
+        )
+
+    def upload(self, session_id):
+        for offset in range(0, len(self.content), 1000):
+            response = self.send(session_id, offset, self.content[offset:offset + 1000])
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_chunked_upload_resumes_and_verifies(self):
+        session = self.open_session()
+        self.send(session['id'], 0, self.content[:1000])
+
+        response = self.send(session['id'], 0, self.content[:1000])
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data['offset'], 1000)
+
+        state = self.client.get(reverse('posts:upload-detail', args=[session['id']])).data
+        for offset in range(state['offset'], len(self.content), 1000):
+            response = self.send(session['id'], offset, self.content[offset:offset + 1000])
+
+        self.assertEqual(response.data['status'], UploadSession.Status.COMPLETE)
+        blob = MediaBlob.objects.get()
+        self.assertEqual(blob.sha256, self.sha256)
+        with blob.file.open('rb') as stored:
+            self.assertEqual(stored.read(), self.content)
+
+    def test_content_not_matching_the_digest_fails_the_session(self):
+        session = self.open_session()
+        content = self.content[::-1]
+        for offset in range(0, len(content), 1000):
+            response = self.send(session['id'], offset, content[offset:offset + 1000])
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(UploadSession.objects.get().status, UploadSession.Status.FAILED)
+        self.assertFalse(MediaBlob.objects.exists())
+
+    def test_oversized_chunk_is_rejected(self):
+        session = self.open_session()
+        response = self.send(session['id'], 0, self.content[:2000])
+
+        self.assertEqual(response.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        self.assertEqual(UploadSession.objects.get().received, 0)
+
+    def test_identical_upload_is_deduplicated_and_attached(self):
+        first = self.open_session()
+        self.upload(first['id'])
+
+        second = self.open_session()
+        self.assertEqual(second['status'], UploadSession.Status.COMPLETE)
+        self.assertEqual(MediaBlob.objects.count(), 1)
+
+        response = self.client.post(
+            reverse('posts:post-list-create'),
+            {'content': 'Holiday', 'uploadIds': [first['id'], second['id']]},
+            format='json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        feed = self.client.get(reverse('posts:post-list-create')).data
+        attachments = feed[0]['attachments']
+        self.assertEqual(len(attachments), 2)
+        self.assertEqual(attachments[0]['metadata'], {'width': 40, 'height': 30, 'format': 'PNG'})
+
+    def test_known_digest_of_someone_elses_upload_needs_the_bytes(self):
+        self.upload(self.open_session()['id'])
+        blob = MediaBlob.objects.get()
+
+        other = User.objects.create_user(username='bob', email='bob@example.com', password='password123')
+        self.client.force_authenticate(other)
+        session = self.open_session()
+        self.assertEqual(session['status'], UploadSession.Status.UPLOADING)
+
+        self.assertEqual(self.upload(session['id'])['status'], UploadSession.Status.COMPLETE)
+        self.assertEqual(UploadSession.objects.get(pk=session['id']).blob, blob)
+        self.assertEqual(MediaBlob.objects.count(), 1)
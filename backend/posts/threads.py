@@ -0,0 +1,92 @@
+"""
+Threaded comments stored as materialized paths.
+
+A comment's ``path`` is its ancestors' ids followed by its own, each
+zero-padded to ``SEGMENT_WIDTH`` digits. Sorting by path therefore lists a
+thread depth-first with replies in the order they were written, and a
+comment's whole subtree is the contiguous range ``[path, next_path(path))``:
+one scan of the ``(post, path)`` index, whatever its shape. Rows come back
+parents-first, so ``build_tree()`` links them in a single pass.
+"""
+from django.db.models import CharField, F, Value, Window
+from django.db.models.functions import Cast, LPad, RowNumber
+
+from .models import Comment
+
+
+SEGMENT_WIDTH = 10
+# The path column holds 250 characters: 25 segments.
+MAX_DEPTH = 24
+# Replies shown under each comment when a page of threads is expanded; the
+# rest are fetched from the comment's replies endpoint.
+REPLY_PREVIEW = 5
+MAX_EXPAND_DEPTH = 5
+
+
+def segment(pk):
+    return str(pk).zfill(SEGMENT_WIDTH)
+
+
+def next_path(path):
+    """The first path after every descendant of ``path``."""
+    return str(int(path) + 1).zfill(len(path))
+
+
+def root_path():
+    """The path of a top-level comment, computed from its id inside an UPDATE."""
+    return LPad(Cast('id', CharField()), SEGMENT_WIDTH, Value('0'))
+
+
+def subtree(post_id, first_path, last_path=None):
+    """Comments under ``first_path`` through ``last_path`` (siblings), including themselves."""
+    return Comment.objects.filter(
+        post_id=post_id,
+        path__gte=first_path,
+        path__lt=next_path(last_path or first_path),
+    )
+
+
+def load_replies(roots, depth, preview=REPLY_PREVIEW):
+    """
+    Attach replies up to ``depth`` levels below ``roots`` (a page of siblings,
+    in path order) as ``children``, at most ``preview`` per comment. One query.
+    """
+    for root in roots:
+        root.children = []
+    if not roots or depth < 1:
+        return roots
+    base_depth = roots[0].depth
+    replies = (
+        subtree(roots[0].post_id, roots[0].path, roots[-1].path)
+        .filter(depth__gt=base_depth, depth__lte=base_depth + depth)
+        .select_related('author')
+        .annotate(rank=Window(RowNumber(), partition_by=F('parent_id'), order_by=F('path').asc()))
+        .filter(rank__lte=preview)
+        .order_by('path')
+    )
+    build_tree(replies, known=roots)
+    return roots
+
+
+def build_tree(comments, known=()):
+    """
+    Link ``comments`` (in path order) to their parents' ``children``.
+    Returns the comments whose parent was not among them or ``known``.
+    """
+    nodes = {comment.pk: comment for comment in known}
+    orphans = []
+    for comment in comments:
+        comment.children = []
+        nodes[comment.pk] = comment
+        parent = nodes.get(comment.parent_id)
+        if parent is None:
+            orphans.append(comment)
+        else:
+            parent.children.append(comment)
+    return orphans
+
+
+def delete_subtree(comment):
+    """Delete ``comment`` with every reply beneath it; returns how many comments went."""
+    deleted, _ = subtree(comment.post_id, comment.path).delete()
+    return deleted
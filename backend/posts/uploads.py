@@ -0,0 +1,185 @@
+"""
+Chunked, resumable uploads for post attachments.
+
+A client opens an ``UploadSession`` declaring the file's size and SHA-256, then
+sends the bytes as a series of multipart chunks, each tagged with the offset it
+starts at. ``ChunkUploadHandler`` streams every chunk straight into the
+session's partial file, so no worker ever holds more than one network buffer
+of it. When the last byte arrives the partial file is hashed block by block,
+checked against the declared digest and moved into storage as a ``MediaBlob``.
+Blobs are keyed by content hash: a finished upload of content that is already
+stored reuses the existing blob. Declaring the digest of a file the uploader has
+stored before finishes the session instantly; for anyone else's content the
+bytes have to be sent, as a digest alone proves nothing about having the file.
+"""
+import hashlib
+import os
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.files.uploadhandler import FileUploadHandler, StopUpload
+from django.db import IntegrityError, transaction
+from PIL import Image
+
+from .models import MediaBlob, UploadSession
+
+
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+class ReceivedChunk:
+    """What ``ChunkUploadHandler`` leaves in ``request.FILES`` instead of the bytes."""
+
+    def __init__(self, size, sha256):
+        self.size = size
+        self.sha256 = sha256
+
+
+class ChunkUploadHandler(FileUploadHandler):
+    """Write the ``chunk`` part of a multipart body into a session's partial file at ``offset``."""
+
+    chunk_field = 'chunk'
+
+    def __init__(self, session, offset, request=None):
+        super().__init__(request)
+        self.session = session
+        self.offset = offset
+        self.limit = min(session.size - offset, settings.UPLOAD_CHUNK_MAX_SIZE)
+        self.destination = None
+        self.active = False
+        self.written = 0
+
+    def new_file(self, field_name, *args, **kwargs):
+        super().new_file(field_name, *args, **kwargs)
+        # Only the first ``chunk`` part is written; anything else is ignored.
+        self.active = field_name == self.chunk_field and self.destination is None
+        if not self.active:
+            return
+        path = partial_path(self.session)
+        os.makedirs(path.parent, exist_ok=True)
+        self.destination = open(path, 'r+b' if path.exists() else 'wb')
+        self.destination.seek(self.offset)
+        self.destination.truncate()
+        self.written = 0
+        self.digest = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        if not self.active:
+            return None
+        self.written += len(raw_data)
+        if self.written > self.limit:
+            self._close()
+            raise StopUpload(connection_reset=True)
+        self.destination.write(raw_data)
+        self.digest.update(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        if not self.active:
+            return None
+        self.active = False
+        self._close()
+        return ReceivedChunk(self.written, self.digest.hexdigest())
+
+    def upload_interrupted(self):
+        self._close()
+
+    def _close(self):
+        if self.destination is not None and not self.destination.closed:
+            self.destination.close()
+
+
+def partial_path(session):
+    return settings.UPLOAD_PARTIAL_DIR / f'{session.pk}.part'
+
+
+def discard_partial(session, keep=0):
+    """Cut the partial file back to ``keep`` bytes, or remove it entirely."""
+    path = partial_path(session)
+    if not path.exists():
+        return
+    if keep:
+        os.truncate(path, keep)
+    else:
+        path.unlink()
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as source:
+        for block in iter(lambda: source.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def blob_name(sha256, filename):
+    extension = os.path.splitext(filename)[1].lower()[:10]
+    return f'attachments/{sha256[:2]}/{sha256}{extension}'
+
+
+def link_existing_blob(session, owned_only=False):
+    """
+    Finish ``session`` with the stored blob of the same content, if any. With
+    ``owned_only`` (no bytes received yet) only blobs from the owner's own
+    completed uploads qualify.
+    """
+    blobs = MediaBlob.objects.filter(sha256=session.sha256, size=session.size)
+    if owned_only:
+        blobs = blobs.filter(
+            uploadsession__owner_id=session.owner_id,
+            uploadsession__status=UploadSession.Status.COMPLETE,
+        )
+    blob = blobs.first()
+    if blob is None:
+        return False
+    session.blob = blob
+    session.received = session.size
+    session.status = UploadSession.Status.COMPLETE
+    session.save(update_fields=['blob', 'received', 'status', 'updated_at'])
+    return True
+
+
+def finalize(session):
+    """Verify the assembled file and turn it into a ``MediaBlob``. Returns False on a hash mismatch."""
+    path = partial_path(session)
+    if file_sha256(path) != session.sha256:
+        session.status = UploadSession.Status.FAILED
+        session.save(update_fields=['status', 'updated_at'])
+        discard_partial(session)
+        return False
+
+    if not link_existing_blob(session):
+        with open(path, 'rb') as source:
+            name = default_storage.save(blob_name(session.sha256, session.filename), File(source))
+        try:
+            with transaction.atomic():
+                blob = MediaBlob.objects.create(
+                    sha256=session.sha256,
+                    file=name,
+                    size=session.size,
+                    content_type=session.content_type,
+                    metadata=read_metadata(path, session.content_type),
+                )
+        except IntegrityError:
+            # Another session stored the same content first; keep theirs.
+            default_storage.delete(name)
+            link_existing_blob(session)
+        else:
+            session.blob = blob
+            session.status = UploadSession.Status.COMPLETE
+            session.save(update_fields=['blob', 'status', 'updated_at'])
+    discard_partial(session)
+    return True
+
+
+def read_metadata(path, content_type):
+    """Describe the file at ``path`` (image dimensions and the like) for its ``MediaBlob``."""
+    if not content_type.startswith('image/'):
+        return {}
+    try:
+        with Image.open(path) as image:
+            # Only the header is parsed; pixel data is never decoded here.
+            return {'width': image.width, 'height': image.height, 'format': image.format}
+    except (OSError, Image.DecompressionBombError):
+        return {}
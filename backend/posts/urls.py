@@ -3,9 +3,17 @@ from django.urls import path
 from .views import (
     CommentDetailView,
     CommentListCreateView,
+    CommentReplyListView,
+    LikeListView,
     LikeToggleView,
+    PostBatchView,
+    PostBulkImportView,
     PostDetailView,
     PostListCreateView,
+    TrendingPostListView,
+    UploadSessionCreateView,
+    UploadSessionDetailView,
+    UserPostListView,
 )
 
 
@@ -13,9 +21,21 @@ app_name = 'posts'
 
 urlpatterns = [
     path('posts/', PostListCreateView.as_view(), name='post-list-create'),
+    path('posts/trending/', TrendingPostListView.as_view(), name='post-trending'),
+    path('posts/import/', PostBulkImportView.as_view(), name='post-bulk-import'),
+    path('posts/batch/', PostBatchView.as_view(), name='post-batch'),
+    path('uploads/', UploadSessionCreateView.as_view(), name='upload-create'),
+    path('uploads/<uuid:pk>/', UploadSessionDetailView.as_view(), name='upload-detail'),
     path('posts/<int:pk>/', PostDetailView.as_view(), name='post-detail'),
     path('posts/<int:post_id>/like/', LikeToggleView.as_view(), name='post-like-toggle'),
+    path('posts/<int:post_id>/likes/', LikeListView.as_view(), name='post-like-list'),
     path('posts/<int:post_id>/comments/', CommentListCreateView.as_view(), name='comment-list-create'),
     path('posts/<int:post_id>/comments/<int:comment_id>/', CommentDetailView.as_view(), name='comment-detail'),
+    path(
+        'posts/<int:post_id>/comments/<int:comment_id>/replies/',
+        CommentReplyListView.as_view(),
+        name='comment-replies',
+    ),
+    path('users/<int:user_id>/posts/', UserPostListView.as_view(), name='user-posts'),
 ]
 
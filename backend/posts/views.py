@@ -1,18 +1,84 @@
-from django.db.models import BooleanField, Exists, F, OuterRef, Value
+import copy
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import BooleanField, Exists, F, OuterRef, Prefetch, Q, Value
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 from rest_framework import generics, permissions, status
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .models import Comment, Like, Post
-from .serializers import CommentSerializer, LikeSerializer, PostSerializer
+from backend.batch import batch_ids, batch_response
+from backend.conditional import ConditionalGetMixin
+from backend.fieldsets import NormalizedResponseMixin, wants_field
+from backend.pagination import KeysetPagination
+from backend.replicas import ReplicaReadMixin
+from backend.singleflight import SingleFlight
+from groups.models import Group, GroupMembership
+from groups.scopes import GROUPS
+from tags.indexing import unindex_posts
+from users.profiles import load_profile
+from users.stats import discount_posts, discount_rows
+from . import events
+from .counters import mark_dirty
+from .ingest import ingest
+from .models import Comment, Like, Post, UploadSession
+from .parsers import NDJSONParser
+from .ranking import counter_updates
+from .scopes import ALL_POSTS, USERS, author_scope, bump_post, feed_scopes, post_scopes
+from .serializers import (
+    CommentSerializer,
+    LikerSerializer,
+    LikeSerializer,
+    PostBatchSerializer,
+    PostSerializer,
+    UploadSessionSerializer,
+)
+from .threads import MAX_DEPTH, MAX_EXPAND_DEPTH, delete_subtree, load_replies, subtree
+from .uploads import ChunkUploadHandler, discard_partial, finalize, link_existing_blob
+
+
+User = get_user_model()
+
+feed_flight = SingleFlight('feeds')
+
+
+def post_prefetches(request, serializer_class=PostSerializer):
+    """Prefetch only the related rows the response will render."""
+    lookups = []
+    if wants_field(request, serializer_class, 'comments'):
+        # Posts embed their top-level comments; replies load per thread.
+        top_level = Comment.objects.filter(depth=0).select_related('author').order_by('path')
+        lookups.append(Prefetch('comments', queryset=top_level))
+    if wants_field(request, serializer_class, 'attachments'):
+        lookups.append('attachments__blob')
+    return lookups
+
+
+def visible_posts(user_id):
+    """Posts outside groups, or in active groups ``user_id`` belongs to."""
+    # Checked against the membership table in the same query: a cached list
+    # of groups could still show a group's posts after the user has left it.
+    membership = GroupMembership.objects.filter(
+        group_id=OuterRef('group_id'),
+        user_id=user_id,
+        group__deleted_at__isnull=True,
+    )
+    return Q(group__isnull=True) | Exists(membership)
 
 
 class ViewerLikeAnnotationMixin:
+    # Set while rendering a response shared between viewers; see CoalescedFeedMixin.
+    viewer_independent = False
+
     def _annotate_viewer_like(self, queryset):
         user = getattr(self.request, 'user', None)
-        if user and user.is_authenticated:
+        if user and user.is_authenticated and not self.viewer_independent:
             return queryset.annotate(
                 liked_by_current_user=Exists(
                     Like.objects.filter(post_id=OuterRef('pk'), user_id=user.pk)
@@ -23,29 +89,303 @@ class ViewerLikeAnnotationMixin:
         )
 
 
-class PostListCreateView(ViewerLikeAnnotationMixin, generics.ListCreateAPIView):
+class CoalescedFeedMixin:
+    """
+    Share one rendering of a feed page between identical concurrent reads.
+
+    The page is computed once per normalized URL and set of scope versions
+    (so any write starts a new one) with every viewer-specific field left at
+    its default; each request then overlays its own ``viewerHasLiked`` with
+    one query over the page's ids. Access checks have already run by then,
+    in ``get_version_scopes()``. Must come after ``ConditionalGetMixin``.
+    """
+
+    def list(self, request, *args, **kwargs):
+        key = f'{request.build_absolute_uri(request.path)}?{_normalized_query(request)}|{self.scope_versions}'
+        ttl = settings.FEED_COALESCE_TTL_MS / 1000 if self._can_validate(max(self.scope_versions)) else 0
+        shared = feed_flight.do(key, self._render_shared_page, ttl)
+
+        data = copy.deepcopy(shared['data'])
+        if shared['includes'] is not None:
+            self._includes = copy.deepcopy(shared['includes'])
+        self._overlay_viewer_likes(data, shared['ids'])
+        return Response(data)
+
+    def _render_shared_page(self):
+        self.viewer_independent = True
+        try:
+            queryset = self.filter_queryset(self.get_queryset())
+            page = self.paginate_queryset(queryset)
+            posts = list(queryset if page is None else page)
+            data = self.get_serializer(posts, many=True).data
+            if page is not None:
+                data = self.get_paginated_response(data).data
+        finally:
+            self.viewer_independent = False
+        return {
+            'data': data,
+            'ids': [post.pk for post in posts],
+            'includes': getattr(self, '_includes', None),
+        }
+
+    def _overlay_viewer_likes(self, data, ids):
+        items = data['results'] if isinstance(data, dict) else data
+        if not items or 'viewerHasLiked' not in items[0]:
+            return
+        liked = set(
+            Like.objects.filter(user_id=self.request.user.pk, post_id__in=ids).values_list('post_id', flat=True)
+        )
+        for item, post_id in zip(items, ids):
+            item['viewerHasLiked'] = post_id in liked
+
+
+def _normalized_query(request):
+    return urlencode(sorted((key, value) for key, values in request.query_params.lists() for value in values))
+
+
+class PostListCreateView(
+    ConditionalGetMixin,
+    CoalescedFeedMixin,
+    NormalizedResponseMixin,
+    ReplicaReadMixin,
+    ViewerLikeAnnotationMixin,
+    generics.ListCreateAPIView,
+):
     serializer_class = PostSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    def get_version_scopes(self):
+        return feed_scopes()
+
     def get_queryset(self):
         queryset = (
             Post.objects.filter(group__isnull=True)
             .select_related('author')
-            .prefetch_related('comments__author')
+            .prefetch_related(*post_prefetches(self.request))
         )
         queryset = self._annotate_viewer_like(queryset)
         return queryset.order_by('-created_at')
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        with transaction.atomic():
+            post = serializer.save(author=self.request.user)
+            events.post_created(post)
+        bump_post(post)
+
+
+class TrendingPagination(KeysetPagination):
+    ordering = ('-hot_score', '-id')
+    page_size = 20
+
+
+class TrendingPostListView(
+    ConditionalGetMixin,
+    CoalescedFeedMixin,
+    NormalizedResponseMixin,
+    ReplicaReadMixin,
+    ViewerLikeAnnotationMixin,
+    generics.ListAPIView,
+):
+    """Posts by time-decayed score, read straight off the ``(group, -hot_score)`` index."""
+
+    serializer_class = PostSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = TrendingPagination
+
+    def get_group_id(self):
+        if not hasattr(self, '_group_id'):
+            group_id = self.request.query_params.get('group')
+            if group_id is not None:
+                if not group_id.isdigit():
+                    raise ValidationError({'group': 'A valid integer is required.'})
+                group = get_object_or_404(Group.objects.active(), pk=group_id)
+                if not GroupMembership.objects.filter(group_id=group.pk, user_id=self.request.user.pk).exists():
+                    raise PermissionDenied('You must join this group to view or create posts.')
+                group_id = group.pk
+            self._group_id = group_id
+        return self._group_id
+
+    def get_version_scopes(self):
+        return feed_scopes(self.get_group_id())
+
+    def get_queryset(self):
+        queryset = (
+            Post.objects.filter(group_id=self.get_group_id())
+            .select_related('author', 'group')
+            .prefetch_related(*post_prefetches(self.request))
+        )
+        return self._annotate_viewer_like(queryset)
+
+
+class TimelinePagination(KeysetPagination):
+    ordering = ('-created_at', '-id')
+    page_size = 20
+
+
+class UserPostListView(
+    ConditionalGetMixin,
+    NormalizedResponseMixin,
+    ReplicaReadMixin,
+    ViewerLikeAnnotationMixin,
+    generics.ListAPIView,
+):
+    """
+    One user's posts, newest first, read off the ``(author, -created_at, -id)``
+    index. Group posts are listed only in groups the viewer belongs to, as on
+    the post detail view.
+    """
+
+    serializer_class = PostSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = TimelinePagination
+
+    def get_author_id(self):
+        # The cached profile answers "does this user exist" without a query.
+        if load_profile(self.kwargs['user_id']) is None:
+            raise Http404
+        return self.kwargs['user_id']
+
+    def get_version_scopes(self):
+        # Joining or leaving a group changes which posts the viewer may see.
+        return [ALL_POSTS, USERS, GROUPS, author_scope(self.get_author_id())]
+
+    def get_queryset(self):
+        queryset = (
+            Post.objects.filter(visible_posts(self.request.user.pk), author_id=self.get_author_id())
+            .select_related('author', 'group')
+            .prefetch_related(*post_prefetches(self.request))
+        )
+        return self._annotate_viewer_like(queryset)
+
+
+class PostBatchView(
+    NormalizedResponseMixin,
+    ReplicaReadMixin,
+    ViewerLikeAnnotationMixin,
+    generics.GenericAPIView,
+):
+    """
+    ``?ids=`` posts in one request for notification lists and embeds. Posts
+    in groups the viewer does not belong to right now are reported missing,
+    like posts that do not exist.
+    """
+
+    serializer_class = PostBatchSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        ids = batch_ids(request)
+        queryset = (
+            Post.objects.filter(visible_posts(request.user.pk), pk__in=ids)
+            .select_related('author', 'group')
+            .prefetch_related(*post_prefetches(request, PostBatchSerializer))
+        )
+        posts = list(self._annotate_viewer_like(queryset))
+        data = self.get_serializer(posts, many=True).data
+        return Response(batch_response(ids, {post.pk: item for post, item in zip(posts, data)}))
+
+
+class PostBulkImportView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+    parser_classes = [NDJSONParser]
+
+    def post(self, request, *args, **kwargs):
+        result = ingest(request.data)
+        return Response(result.as_dict(), status=status.HTTP_200_OK)
+
+
+class UploadSessionCreateView(generics.CreateAPIView):
+    serializer_class = UploadSessionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def perform_create(self, serializer):
+        session = serializer.save(owner_id=self.request.user.pk)
+        # Content the user has uploaded before does not need to be sent again.
+        link_existing_blob(session, owned_only=True)
+
 
+class UploadSessionDetailView(APIView):
+    """
+    ``GET`` reports how far an upload has got, so an interrupted client knows
+    where to resume. ``PUT`` appends one multipart ``chunk`` starting at the
+    byte given in the ``Upload-Offset`` header; an optional
+    ``Upload-Checksum: sha256 <hex>`` header is checked against the chunk.
+    """
 
-class PostDetailView(ViewerLikeAnnotationMixin, generics.RetrieveUpdateDestroyAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [MultiPartParser]
+
+    def get_session(self, pk, lock=False):
+        sessions = UploadSession.objects.select_for_update() if lock else UploadSession.objects
+        return get_object_or_404(sessions, pk=pk, owner_id=self.request.user.pk)
+
+    def get(self, request, pk):
+        return Response(UploadSessionSerializer(self.get_session(pk)).data)
+
+    def put(self, request, pk):
+        # The chunk is written into the partial file while the body is parsed,
+        # so hold the session row until the offset has moved: a second PUT for
+        # the same session waits here and then finds the offset taken.
+        with transaction.atomic():
+            session = self.get_session(pk, lock=True)
+            if session.status != UploadSession.Status.UPLOADING:
+                return Response(UploadSessionSerializer(session).data, status=status.HTTP_409_CONFLICT)
+            try:
+                offset = int(request.headers.get('Upload-Offset', ''))
+            except ValueError:
+                raise ValidationError({'Upload-Offset': 'This header is required.'})
+            if offset != session.received:
+                return Response(
+                    {'detail': 'Chunk does not start at the current offset.', 'offset': session.received},
+                    status=status.HTTP_409_CONFLICT,
+                )
+
+            # Stream the chunk to disk as it is parsed instead of buffering it.
+            handler = ChunkUploadHandler(session, offset, request)
+            request.upload_handlers = [handler]
+            chunk = request.FILES.get(handler.chunk_field)
+            if chunk is None or chunk.size == 0:
+                discard_partial(session, keep=offset)
+                if handler.written > handler.limit:
+                    return Response(
+                        {'detail': 'Chunk is larger than allowed or runs past the declared size.'},
+                        status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    )
+                raise ValidationError({'chunk': 'A non-empty chunk file part is required.'})
+
+            algorithm, _, expected = request.headers.get('Upload-Checksum', '').partition(' ')
+            if algorithm and (algorithm.lower() != 'sha256' or expected.lower() != chunk.sha256):
+                discard_partial(session, keep=offset)
+                raise ValidationError({'Upload-Checksum': 'Chunk does not match its checksum.'})
+
+            session.received = offset + chunk.size
+            session.save(update_fields=['received', 'updated_at'])
+            # Raised once the block has committed, so the failed status sticks.
+            mismatch = session.received == session.size and not finalize(session)
+        if mismatch:
+            raise ValidationError({'sha256': 'Uploaded content does not match the declared digest.'})
+        return Response(UploadSessionSerializer(session).data)
+
+
+class PostDetailView(
+    ConditionalGetMixin,
+    NormalizedResponseMixin,
+    ReplicaReadMixin,
+    ViewerLikeAnnotationMixin,
+    generics.RetrieveUpdateDestroyAPIView,
+):
     serializer_class = PostSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    def get_version_scopes(self):
+        post = get_object_or_404(Post.objects.select_related('group'), pk=self.kwargs['pk'])
+        self._ensure_group_access(post)
+        return post_scopes(post.pk)
+
     def get_queryset(self):
-        queryset = Post.objects.select_related('author', 'group').prefetch_related('comments__author')
+        queryset = Post.objects.select_related('author', 'group').prefetch_related(
+            *post_prefetches(self.request)
+        )
         return self._annotate_viewer_like(queryset)
 
     def get_object(self):
@@ -59,12 +399,19 @@ class PostDetailView(ViewerLikeAnnotationMixin, generics.RetrieveUpdateDestroyAP
             raise PermissionDenied('You can only update your own posts.')
         self._ensure_group_access(post)
         serializer.save()
+        bump_post(post)
 
     def perform_destroy(self, instance):
         self._ensure_group_access(instance)
         if instance.author != self.request.user:
             raise PermissionDenied('You can only delete your own posts.')
-        instance.delete()
+        with transaction.atomic():
+            # Scopes are named now, while the instance still has its pk; the
+            # bump itself waits for the commit.
+            bump_post(instance)
+            unindex_posts([instance.pk])
+            discount_posts([instance.pk])
+            instance.delete()
 
     def _ensure_group_access(self, post):
         if post.group_id and not post.group.members.filter(pk=self.request.user.pk).exists():
@@ -72,25 +419,93 @@ class PostDetailView(ViewerLikeAnnotationMixin, generics.RetrieveUpdateDestroyAP
 
 
 
-class CommentListCreateView(generics.ListCreateAPIView):
+class CommentThreadPagination(KeysetPagination):
+    ordering = ('path',)
+    page_size = 20
+
+
+class CommentThreadMixin:
+    """
+    Page one level of a thread in path order and expand each comment's first
+    replies, ``?depth=`` levels down (default 1), with one more query.
+    """
+
+    pagination_class = CommentThreadPagination
+
+    def get_post(self):
+        if not hasattr(self, '_post'):
+            post = get_object_or_404(Post.objects.select_related('group'), pk=self.kwargs['post_id'])
+            self._ensure_group_access(post)
+            self._post = post
+        return self._post
+
+    def get_version_scopes(self):
+        return post_scopes(self.get_post().pk)
+
+    def get_expand_depth(self):
+        depth = self.request.query_params.get('depth', '1')
+        if not depth.isdigit():
+            raise ValidationError({'depth': 'A valid integer is required.'})
+        return min(int(depth), MAX_EXPAND_DEPTH)
+
+    def list(self, request, *args, **kwargs):
+        page = self.paginate_queryset(self.get_queryset())
+        load_replies(page, self.get_expand_depth())
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    def _ensure_group_access(self, post):
+        if post.group_id and not post.group.members.filter(pk=self.request.user.pk).exists():
+            raise PermissionDenied('You must be a member of this group to interact with comments here.')
+
+
+class CommentListCreateView(
+    CommentThreadMixin,
+    ConditionalGetMixin,
+    NormalizedResponseMixin,
+    ReplicaReadMixin,
+    generics.ListCreateAPIView,
+):
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = 'comments'
 
     def get_queryset(self):
-        post_id = self.kwargs['post_id']
-        post = get_object_or_404(Post.objects.select_related('group'), pk=post_id)
-        self._ensure_group_access(post)
-        return Comment.objects.filter(post_id=post_id).select_related('author', 'post').order_by('created_at')
+        return Comment.objects.filter(post_id=self.get_post().pk, depth=0).select_related('author')
 
     def perform_create(self, serializer):
-        post = get_object_or_404(Post.objects.select_related('group'), pk=self.kwargs['post_id'])
-        self._ensure_group_access(post)
-        serializer.save(author=self.request.user, post=post)
-        Post.objects.filter(pk=post.pk).update(comments_count=F('comments_count') + 1)
+        post = self.get_post()
+        parent = serializer.validated_data.get('parent')
+        if parent is not None:
+            if parent.post_id != post.pk:
+                raise ValidationError({'parentId': 'You can only reply to a comment on the same post.'})
+            if parent.depth >= MAX_DEPTH:
+                raise ValidationError({'parentId': 'This thread is too deep to reply to.'})
+        with transaction.atomic():
+            comment = serializer.save(author=self.request.user, post=post)
+            if parent is not None:
+                Comment.objects.filter(pk=parent.pk).update(reply_count=F('reply_count') + 1)
+            events.comment_created(comment)
+            Post.objects.filter(pk=post.pk).update(**counter_updates(comments=F('comments_count') + 1))
+        bump_post(post)
 
-    def _ensure_group_access(self, post):
-        if post.group_id and not post.group.members.filter(pk=self.request.user.pk).exists():
-            raise PermissionDenied('You must be a member of this group to interact with comments here.')
+
+class CommentReplyListView(
+    CommentThreadMixin,
+    ConditionalGetMixin,
+    NormalizedResponseMixin,
+    ReplicaReadMixin,
+    generics.ListAPIView,
+):
+    """Direct replies to one comment, for expanding a thread past its preview."""
+
+    serializer_class = CommentSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        post = self.get_post()
+        comment = get_object_or_404(Comment, pk=self.kwargs['comment_id'], post_id=post.pk)
+        return subtree(post.pk, comment.path).filter(depth=comment.depth + 1).select_related('author')
 
 
 class CommentDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -110,15 +525,25 @@ class CommentDetailView(generics.RetrieveUpdateDestroyAPIView):
         if comment.author != self.request.user:
             raise PermissionDenied('You can only edit your own comments.')
         serializer.save()
+        bump_post(comment.post)
 
     def perform_destroy(self, instance):
         self._ensure_group_access(instance.post)
         if instance.author != self.request.user:
             raise PermissionDenied('You can only delete your own comments.')
-        instance.delete()
-        Post.objects.filter(pk=self.kwargs['post_id'], comments_count__gt=0).update(
-            comments_count=F('comments_count') - 1
-        )
+        with transaction.atomic():
+            discount_rows('comments_count', subtree(instance.post_id, instance.path), 'author_id')
+            removed = delete_subtree(instance)
+            if instance.parent_id:
+                Comment.objects.filter(pk=instance.parent_id, reply_count__gt=0).update(
+                    reply_count=F('reply_count') - 1
+                )
+            updated = Post.objects.filter(pk=self.kwargs['post_id'], comments_count__gte=removed).update(
+                **counter_updates(comments=F('comments_count') - removed)
+            )
+        if not updated:
+            mark_dirty([self.kwargs['post_id']])
+        bump_post(instance.post)
 
     def _ensure_group_access(self, post):
         if post.group_id and not post.group.members.filter(pk=self.request.user.pk).exists():
@@ -127,22 +552,108 @@ class CommentDetailView(generics.RetrieveUpdateDestroyAPIView):
 
 class LikeToggleView(APIView):
     permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = 'likes'
 
     def post(self, request, post_id):
         post = get_object_or_404(Post.objects.select_related('group'), pk=post_id)
         if post.group_id and not post.group.members.filter(pk=request.user.pk).exists():
             raise PermissionDenied('You must be a member of this group to like this post.')
-        like, created = Like.objects.get_or_create(user=request.user, post=post)
+        with transaction.atomic():
+            like, created = Like.objects.get_or_create(user=request.user, post=post)
+            if created:
+                Post.objects.filter(pk=post_id).update(**counter_updates(likes=F('likes_count') + 1))
+                events.like_changed(like.pk, post, created=True)
+            else:
+                like_id = like.pk
+                like.delete()
+                updated = Post.objects.filter(pk=post_id, likes_count__gt=0).update(
+                    **counter_updates(likes=F('likes_count') - 1)
+                )
+                if not updated:
+                    mark_dirty([post_id])
+                events.like_changed(like_id, post, created=False)
+        post.refresh_from_db(fields=['likes_count'])
+        bump_post(post)
         if created:
-            Post.objects.filter(pk=post_id).update(likes_count=F('likes_count') + 1)
-            post.refresh_from_db(fields=['likes_count'])
             serializer = LikeSerializer(like)
             return Response(
                 {'liked': True, 'likesCount': post.likes_count, 'like': serializer.data},
                 status=status.HTTP_201_CREATED,
             )
-
-        like.delete()
-        Post.objects.filter(pk=post_id, likes_count__gt=0).update(likes_count=F('likes_count') - 1)
-        post.refresh_from_db(fields=['likes_count'])
         return Response({'liked': False, 'likesCount': post.likes_count}, status=status.HTTP_200_OK)
+
+
+class LikerPagination(KeysetPagination):
+    """
+    Likes newest first, the viewer's friends before everyone else. Each group
+    is its own seek down the ``(post, created_at)`` index, and the cursor
+    records which group it stopped in.
+    """
+
+    ordering = ('-created_at', '-id')
+    page_size = 50
+    phases = ('friends', 'others')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        position = self.decode_cursor(request)
+        phase = self.phases[0]
+        if position is not None:
+            phase, *position = position
+            self.check_values(position, queryset.model)
+
+        friendship = User.friends.through.objects.filter(
+            from_user_id=request.user.pk,
+            to_user_id=OuterRef('user_id'),
+        )
+        rows = []
+        for name in self.phases[self.phases.index(phase):]:
+            is_friend = name == 'friends'
+            part = queryset.filter(Exists(friendship) if is_friend else ~Exists(friendship))
+            part = part.order_by(*self.ordering)
+            if position is not None:
+                part = part.filter(self.seek(position))
+                position = None
+            for row in part[:self.page_size + 1 - len(rows)]:
+                row.is_friend = is_friend
+                rows.append(row)
+            if len(rows) > self.page_size:
+                break
+
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def get_position(self, row):
+        return ['friends' if row.is_friend else 'others', *super().get_position(row)]
+
+    def is_valid_position(self, position):
+        return (
+            isinstance(position, list)
+            and len(position) == len(self.ordering) + 1
+            and position[0] in self.phases
+        )
+
+
+class LikeListView(ReplicaReadMixin, generics.ListAPIView):
+    """Who liked a post. ``total`` is the post's like counter, so no page ever counts rows."""
+
+    serializer_class = LikerSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = LikerPagination
+
+    def get_post(self):
+        if not hasattr(self, '_post'):
+            post = get_object_or_404(Post.objects.select_related('group'), pk=self.kwargs['post_id'])
+            if post.group_id and not post.group.members.filter(pk=self.request.user.pk).exists():
+                raise PermissionDenied('You must be a member of this group to access this post.')
+            self._post = post
+        return self._post
+
+    def get_queryset(self):
+        return Like.objects.filter(post_id=self.get_post().pk).select_related('user')
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        response.data['total'] = self.get_post().likes_count
+        return response
@@ -0,0 +1,16 @@
+from django.contrib import admin
+
+from .models import Hashtag, Mention
+
+
+@admin.register(Hashtag)
+class HashtagAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'usage_count', 'last_used_at')
+    search_fields = ('name',)
+
+
+@admin.register(Mention)
+class MentionAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'post', 'comment', 'created_at')
+    search_fields = ('user__username',)
+    raw_id_fields = ('user', 'post', 'comment')
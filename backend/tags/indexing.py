@@ -0,0 +1,184 @@
+"""
+Hashtag and mention indexing.
+
+Post and comment text is parsed whenever it is written through the API, the
+importer or the ``index_tags`` backfill. ``#tags`` in posts become
+``PostTag`` rows (the inverted index behind tag feeds) and ``@username``
+in posts and comments becomes ``Mention`` rows. Every entry point takes a
+batch and syncs it with a fixed number of queries: new tags are upserted,
+links are diffed against what is stored, and ``Hashtag.usage_count`` moves by
+the difference in a single UPDATE.
+"""
+import re
+from collections import Counter
+from functools import reduce
+from operator import or_
+
+from django.contrib.auth import get_user_model
+from django.db.models import Case, Count, F, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .models import Hashtag, Mention, PostTag
+
+
+User = get_user_model()
+
+HASHTAG_RE = re.compile(r'(?<![\w&#])#(\w{1,100})')
+MENTION_RE = re.compile(r'(?<![\w@])@([\w.+-]{1,150})')
+MAX_TAGS = 30
+MAX_MENTIONS = 50
+BULK_BATCH_SIZE = 1000
+
+
+def extract_hashtags(text):
+    """Distinct lowercased tag names in order of appearance."""
+    names = dict.fromkeys(match.lower() for match in HASHTAG_RE.findall(text))
+    return list(names)[:MAX_TAGS]
+
+
+def extract_mentions(text):
+    # Usernames may contain dots and dashes, but not end a sentence with them.
+    names = dict.fromkeys(match.rstrip('.-') for match in MENTION_RE.findall(text))
+    names.pop('', None)
+    return list(names)[:MAX_MENTIONS]
+
+
+def index_posts(posts):
+    """Bring the tags and mentions stored for ``posts`` in line with their content."""
+    posts = {post.pk: post for post in posts}
+    if not posts:
+        return
+    wanted = {pk: extract_hashtags(post.content) for pk, post in posts.items()}
+    tag_ids = _upsert_hashtags({name for names in wanted.values() for name in names})
+    desired = {(pk, tag_ids[name]) for pk, names in wanted.items() for name in names}
+    stored = set(PostTag.objects.filter(post_id__in=posts).values_list('post_id', 'hashtag_id'))
+
+    added = desired - stored
+    PostTag.objects.bulk_create(
+        [
+            PostTag(
+                post_id=post_id,
+                hashtag_id=hashtag_id,
+                group_id=posts[post_id].group_id,
+                created_at=posts[post_id].created_at,
+            )
+            for post_id, hashtag_id in added
+        ],
+        ignore_conflicts=True,
+        batch_size=BULK_BATCH_SIZE,
+    )
+    removed = stored - desired
+    if removed:
+        PostTag.objects.filter(_pairs_q('post_id', 'hashtag_id', removed)).delete()
+
+    usage = Counter(hashtag_id for _, hashtag_id in added)
+    usage.subtract(hashtag_id for _, hashtag_id in removed)
+    _adjust_usage(usage)
+
+    _sync_mentions(
+        'post_id',
+        {pk: (pk, post.content) for pk, post in posts.items()},
+        Mention.objects.filter(post_id__in=posts, comment__isnull=True),
+    )
+
+
+def index_comments(comments):
+    """Bring the mentions stored for ``comments`` in line with their content."""
+    comments = {comment.pk: comment for comment in comments}
+    if not comments:
+        return
+    _sync_mentions(
+        'comment_id',
+        {pk: (comment.post_id, comment.content) for pk, comment in comments.items()},
+        Mention.objects.filter(comment_id__in=comments),
+    )
+
+
+def unindex_posts(post_ids):
+    """Drop the tags of posts about to be deleted, taking them off the usage counters."""
+    links = PostTag.objects.filter(post_id__in=post_ids)
+    usage = Counter()
+    usage.subtract(links.values_list('hashtag_id', flat=True))
+    links.delete()
+    _adjust_usage(usage)
+
+
+def recount_usage():
+    """Recompute every ``usage_count`` from ``PostTag`` in one UPDATE; repairs drift from races."""
+    links = (
+        PostTag.objects.filter(hashtag_id=OuterRef('pk'))
+        .values('hashtag_id')
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    return Hashtag.objects.update(usage_count=Coalesce(Subquery(links), 0))
+
+
+def _upsert_hashtags(names):
+    """``{name: id}`` for ``names``, creating the missing tags in one INSERT."""
+    if not names:
+        return {}
+    Hashtag.objects.bulk_create(
+        [Hashtag(name=name) for name in names],
+        ignore_conflicts=True,
+        batch_size=BULK_BATCH_SIZE,
+    )
+    return dict(Hashtag.objects.filter(name__in=names).values_list('name', 'pk'))
+
+
+def _adjust_usage(usage):
+    usage = {hashtag_id: delta for hashtag_id, delta in usage.items() if delta}
+    if not usage:
+        return
+    used = [hashtag_id for hashtag_id, delta in usage.items() if delta > 0]
+    Hashtag.objects.filter(pk__in=usage).update(
+        usage_count=Greatest(F('usage_count') + _per_row(usage), 0),
+        last_used_at=Case(
+            When(pk__in=used, then=Value(timezone.now())),
+            default=F('last_used_at'),
+        ),
+    )
+
+
+def _sync_mentions(owner_field, owners, stored):
+    """
+    ``owners`` maps each post or comment id (``owner_field``) to its
+    ``(post_id, content)``; ``stored`` holds their current mentions.
+    """
+    wanted = {pk: extract_mentions(content) for pk, (_, content) in owners.items()}
+    usernames = {name for names in wanted.values() for name in names}
+    user_ids = dict(User.objects.filter(username__in=usernames).values_list('username', 'pk')) if usernames else {}
+    desired = {(pk, user_ids[name]) for pk, names in wanted.items() for name in names if name in user_ids}
+    current = set(stored.values_list(owner_field, 'user_id'))
+
+    added = desired - current
+    Mention.objects.bulk_create(
+        [
+            Mention(
+                user_id=user_id,
+                post_id=owners[pk][0],
+                comment_id=pk if owner_field == 'comment_id' else None,
+            )
+            for pk, user_id in added
+        ],
+        ignore_conflicts=True,
+        batch_size=BULK_BATCH_SIZE,
+    )
+    removed = current - desired
+    if removed:
+        stored.filter(_pairs_q(owner_field, 'user_id', removed)).delete()
+
+
+def _pairs_q(first, second, pairs):
+    grouped = {}
+    for a, b in pairs:
+        grouped.setdefault(a, []).append(b)
+    return reduce(or_, [Q(**{first: a, f'{second}__in': bs}) for a, bs in grouped.items()])
+
+
+def _per_row(values):
+    return Case(
+        *[When(pk=pk, then=Value(value)) for pk, value in values.items()],
+        default=Value(0),
+    )
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.models import Comment, Post
+from tags.indexing import index_comments, index_posts, recount_usage
+
+
+def _chunks(queryset, size):
+    """Walk ``queryset`` in primary key order, ``size`` rows per query."""
+    last_pk = 0
+    while True:
+        chunk = list(queryset.filter(pk__gt=last_pk).order_by('pk')[:size])
+        if not chunk:
+            return
+        yield chunk
+        last_pk = chunk[-1].pk
+
+
+class Command(BaseCommand):
+    help = 'Index hashtags and mentions of existing posts and comments, then recount tag usage'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Number of posts or comments parsed per transaction',
+        )
+
+    def handle(self, *args, **options):
+        size = options['chunk_size']
+        posts = comments = 0
+        for chunk in _chunks(Post.objects.only('id', 'content', 'group_id', 'created_at'), size):
+            with transaction.atomic():
+                index_posts(chunk)
+            posts += len(chunk)
+        for chunk in _chunks(Comment.objects.only('id', 'post_id', 'content'), size):
+            with transaction.atomic():
+                index_comments(chunk)
+            comments += len(chunk)
+        tags = recount_usage()
+        self.stdout.write(self.style.SUCCESS(f'✓ Indexed {posts} posts and {comments} comments ({tags} tags)'))
@@ -0,0 +1,79 @@
+from django.conf import settings
+from django.db import models
+from django.db.models import Q
+
+
+class Hashtag(models.Model):
+    name = models.CharField(max_length=100, unique=True)
+    # Public and group posts currently carrying the tag; backs trending tags.
+    usage_count = models.PositiveIntegerField(default=0)
+    last_used_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-usage_count'], name='tags_hashtag_usage_idx'),
+        ]
+
+    def __str__(self):
+        return f'#{self.name}'
+
+
+class PostTag(models.Model):
+    """One tag on one post, carrying the post's group and creation time so tag feeds never join posts to page."""
+
+    hashtag = models.ForeignKey(Hashtag, on_delete=models.CASCADE, related_name='post_tags')
+    post = models.ForeignKey('posts.Post', on_delete=models.CASCADE, related_name='post_tags')
+    group = models.ForeignKey(
+        'groups.Group',
+        on_delete=models.CASCADE,
+        related_name='+',
+        null=True,
+        blank=True,
+    )
+    created_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'hashtag'], name='tags_posttag_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['hashtag', 'group', '-created_at', '-id'], name='tags_posttag_feed_idx'),
+        ]
+
+    def __str__(self):
+        return f'#{self.hashtag.name} on post {self.post_id}'
+
+
+class Mention(models.Model):
+    """A user named with ``@username`` in a post, or in a comment on it (``comment`` set)."""
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='mentions')
+    post = models.ForeignKey('posts.Post', on_delete=models.CASCADE, related_name='mentions')
+    comment = models.ForeignKey(
+        'posts.Comment',
+        on_delete=models.CASCADE,
+        related_name='mentions',
+        null=True,
+        blank=True,
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                condition=Q(comment__isnull=True),
+                name='tags_mention_post_unique',
+            ),
+            models.UniqueConstraint(
+                fields=['user', 'comment'],
+                condition=Q(comment__isnull=False),
+                name='tags_mention_comment_unique',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='tags_mention_user_idx'),
+        ]
+
+    def __str__(self):
+        return f'@{self.user_id} in post {self.post_id}'
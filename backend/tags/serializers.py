@@ -0,0 +1,18 @@
+from rest_framework import serializers
+
+from .models import Hashtag
+
+
+class HashtagSerializer(serializers.ModelSerializer):
+    usageCount = serializers.IntegerField(source='usage_count', read_only=True)
+    lastUsedAt = serializers.DateTimeField(source='last_used_at', read_only=True)
+
+    class Meta:
+        model = Hashtag
+        fields = [
+            'id',
+            'name',
+            'usageCount',
+            'lastUsedAt',
+        ]
+        read_only_fields = fields
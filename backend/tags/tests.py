@@ -0,0 +1,100 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from backend.throttling import reset_throttling
+from groups.models import Group, GroupMembership
+from posts.models import Post
+from .indexing import extract_hashtags, extract_mentions
+from .models import Hashtag, Mention, PostTag
+from .views import TagPostPagination
+
+User = get_user_model()
+
+
+class TagIndexingTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        reset_throttling()
+        self.user = User.objects.create_user(
+            username='alice',
+            email='alice@example.com',
+            password='password123',
+        )
+        self.bob = User.objects.create_user(username='bob', email='bob@example.com', password='password123')
+        self.client.force_authenticate(self.user)
+
+    def _post(self, content):
+        response = self.client.post(reverse('posts:post-list-create'), {'content': content})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data['id']
+
+    def test_extraction(self):
+        self.assertEqual(extract_hashtags('#Django, #python and #django again; a#b and &#39;'), ['django', 'python'])
+        self.assertEqual(extract_mentions('Thanks @bob. Mail me at me@example.com, @bob!'), ['bob'])
+
+    def test_create_and_edit_keep_the_index_in_step(self):
+        post_id = self._post('Loving #Django and #python with @bob')
+
+        self.assertEqual(
+            set(PostTag.objects.filter(post_id=post_id).values_list('hashtag__name', flat=True)),
+            {'django', 'python'},
+        )
+        self.assertEqual(Hashtag.objects.get(name='django').usage_count, 1)
+        self.assertTrue(Mention.objects.filter(post_id=post_id, user=self.bob, comment__isnull=True).exists())
+
+        self.client.patch(reverse('posts:post-detail', args=[post_id]), {'content': 'Only #django now'})
+        self.assertEqual(list(PostTag.objects.values_list('hashtag__name', flat=True)), ['django'])
+        self.assertEqual(Hashtag.objects.get(name='python').usage_count, 0)
+        self.assertFalse(Mention.objects.exists())
+
+        self.client.delete(reverse('posts:post-detail', args=[post_id]))
+        self.assertEqual(Hashtag.objects.get(name='django').usage_count, 0)
+
+    def test_comment_mentions(self):
+        post_id = self._post('Hello')
+        response = self.client.post(
+            reverse('posts:comment-list-create', args=[post_id]),
+            {'content': 'cc @bob'},
+        )
+        self.assertTrue(Mention.objects.filter(comment_id=response.data['id'], post_id=post_id, user=self.bob).exists())
+
+    @mock.patch.object(TagPostPagination, 'page_size', 2)
+    def test_tag_feed_pages_public_posts_newest_first(self):
+        posts = [self._post(f'Post {index} #chess') for index in range(3)]
+        group = Group.objects.create(name='Chess Club', owner=self.user)
+        GroupMembership.objects.create(group=group, user=self.user, role=GroupMembership.Role.OWNER)
+        self.client.post(reverse('groups:group-posts', args=[group.pk]), {'content': 'Members only #chess'})
+
+        url = reverse('tags:tag-posts', args=['Chess'])
+        first = self.client.get(url).data
+        second = self.client.get(first['next']).data
+
+        ids = [post['id'] for post in first['results'] + second['results']]
+        self.assertEqual(ids, posts[::-1])
+        self.assertIsNone(second['next'])
+        self.assertEqual(self.client.get(reverse('tags:tag-posts', args=['nothing'])).status_code, 404)
+
+    def test_trending_tags(self):
+        self._post('#chess #go')
+        self._post('#chess')
+
+        response = self.client.get(reverse('tags:tag-trending'))
+        self.assertEqual([(tag['name'], tag['usageCount']) for tag in response.data], [('chess', 2), ('go', 1)])
+
+    def test_backfill_indexes_existing_posts(self):
+        Post.objects.create(author=self.user, content='Old #archive post for @bob')
+        Post.objects.create(author=self.user, content='Another #archive')
+
+        out = StringIO()
+        call_command('index_tags', '--chunk-size', '1', stdout=out)
+
+        self.assertIn('Indexed 2 posts', out.getvalue())
+        self.assertEqual(Hashtag.objects.get(name='archive').usage_count, 2)
+        self.assertEqual(Mention.objects.get().user, self.bob)
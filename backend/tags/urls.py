@@ -0,0 +1,11 @@
+from django.urls import path
+
+from .views import TagPostListView, TrendingTagListView
+
+
+app_name = 'tags'
+
+urlpatterns = [
+    path('tags/trending/', TrendingTagListView.as_view(), name='tag-trending'),
+    path('tags/<str:tag>/posts/', TagPostListView.as_view(), name='tag-posts'),
+]
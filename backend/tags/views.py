@@ -0,0 +1,63 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from rest_framework import generics, permissions
+
+from backend.conditional import ConditionalGetMixin
+from backend.pagination import KeysetPagination
+from backend.replicas import ReplicaReadMixin
+from posts.models import Post
+from posts.scopes import feed_scopes
+from posts.serializers import PostSerializer
+from posts.views import ViewerLikeAnnotationMixin, post_prefetches
+from .models import Hashtag, PostTag
+from .serializers import HashtagSerializer
+
+
+class TagPostPagination(KeysetPagination):
+    ordering = ('-created_at', '-id')
+    page_size = 20
+
+
+class TagPostListView(
+    ConditionalGetMixin,
+    ReplicaReadMixin,
+    ViewerLikeAnnotationMixin,
+    generics.ListAPIView,
+):
+    """
+    Public posts carrying a tag, newest first. Pages are read off the
+    ``(hashtag, group, -created_at)`` index of ``PostTag`` and only then
+    joined to their posts.
+    """
+
+    serializer_class = PostSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = TagPostPagination
+
+    def get_version_scopes(self):
+        return feed_scopes()
+
+    def get_queryset(self):
+        hashtag = get_object_or_404(Hashtag, name=self.kwargs['tag'].lower())
+        return PostTag.objects.filter(hashtag=hashtag, group__isnull=True)
+
+    def list(self, request, *args, **kwargs):
+        page = self.paginate_queryset(self.get_queryset())
+        posts = Post.objects.select_related('author').prefetch_related(*post_prefetches(request))
+        posts = self._annotate_viewer_like(posts).in_bulk([link.post_id for link in page])
+        serializer = self.get_serializer([posts[link.post_id] for link in page if link.post_id in posts], many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+class TrendingTagListView(ReplicaReadMixin, generics.ListAPIView):
+    """The most used tags among those used within ``TRENDING_TAGS_WINDOW``."""
+
+    serializer_class = HashtagSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        since = timezone.now() - timedelta(hours=settings.TRENDING_TAGS_WINDOW_HOURS)
+        return Hashtag.objects.filter(last_used_at__gte=since, usage_count__gt=0).order_by('-usage_count', 'name')[:20]
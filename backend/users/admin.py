@@ -2,7 +2,9 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.utils.translation import gettext_lazy as _
 
-from .models import User
+from .deletion import requeue_failed_jobs, schedule_user_deletion
+from .images import profile_picture_changed
+from .models import DeletionJob, User
 
 
 @admin.register(User)
@@ -19,3 +21,26 @@ class CustomUserAdmin(UserAdmin):
     list_display = ('username', 'email', 'first_name', 'last_name', 'is_staff')
     search_fields = ('username', 'email', 'first_name', 'last_name')
     ordering = ('username',)
+    actions = ['schedule_deletion']
+
+    def save_model(self, request, obj, form, change):
+        if 'profile_picture' in form.changed_data:
+            profile_picture_changed(obj)
+        super().save_model(request, obj, form, change)
+
+    @admin.action(description=_('Deactivate and delete in the background'))
+    def schedule_deletion(self, request, queryset):
+        for user in queryset:
+            schedule_user_deletion(user)
+
+
+@admin.register(DeletionJob)
+class DeletionJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'target_type', 'target_id', 'status', 'stage', 'rows_deleted', 'attempts', 'updated_at')
+    list_filter = ('status', 'target_type')
+    search_fields = ('target_id',)
+    actions = ['requeue']
+
+    @admin.action(description=_('Requeue failed jobs'))
+    def requeue(self, request, queryset):
+        requeue_failed_jobs(queryset)
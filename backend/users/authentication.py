@@ -0,0 +1,95 @@
+import copy
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+
+User = get_user_model()
+
+
+class _UserCache:
+    """Per-process cache of recently loaded users, kept for a few seconds."""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        entry = self._entries.get(user_id)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
+
+    def set(self, user_id, user):
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + settings.USER_CACHE_TTL, user)
+
+    def discard(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = _UserCache()
+
+
+def _revoked_key(user_id):
+    return f'users:revoked:{user_id}'
+
+
+def invalidate_user(user_id, revoke=False):
+    """
+    Drop ``user_id`` from the local user cache. With ``revoke``, outstanding
+    access tokens are also flagged in the default cache, which rejects them at
+    once in every process sharing it (Redis). Other processes reread the user,
+    and with it ``is_active``, within ``USER_CACHE_TTL`` seconds regardless.
+    """
+    user_cache.discard(user_id)
+    if revoke:
+        timeout = int(jwt_settings.ACCESS_TOKEN_LIFETIME.total_seconds())
+        cache.set(_revoked_key(user_id), 1, timeout=timeout)
+    else:
+        cache.delete(_revoked_key(user_id))
+
+
+def load_user(user_id):
+    user = user_cache.get(user_id)
+    if user is None:
+        try:
+            user = User.objects.get(pk=user_id)
+        except User.DoesNotExist as exc:
+            raise AuthenticationFailed('User not found', code='user_not_found') from exc
+        user_cache.set(user_id, user)
+    # Views may mutate the instance they are handed; never share the cached one.
+    return copy.copy(user)
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    ``JWTAuthentication`` that reuses a loaded user for ``USER_CACHE_TTL``
+    seconds instead of reading it on every request. Deactivation is checked
+    against the database whenever the cached user expires.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[jwt_settings.USER_ID_CLAIM]
+        except KeyError as exc:
+            raise InvalidToken('Token contained no recognizable user identification') from exc
+
+        user_id = User._meta.pk.to_python(user_id)
+        if cache.get(_revoked_key(user_id)) is not None:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        user = load_user(user_id)
+        if not user.is_active:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        return user
@@ -0,0 +1,391 @@
+"""
+Chunked deletion of users and groups.
+
+Deleting a heavy account through the ORM makes the collector load every
+dependent row into memory and removes them in one transaction. Instead the
+target is soft-deleted immediately and a ``DeletionJob`` purges its dependents
+in bounded batches, one short transaction per batch. Every step is
+"select the next batch of ids, delete them", so a job interrupted by a crash
+simply continues where the rows left off. A job that raises is retried with
+exponential backoff and marked ``FAILED`` after ``MAX_ATTEMPTS``;
+``requeue_failed_jobs()`` (``process_deletions --retry-failed``) puts failed
+jobs back in the queue once the cause is fixed.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from functools import reduce
+from operator import or_
+
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Case, F, Q, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from backend.conditional import bump_versions
+from friends.cache import invalidate_friend_lists
+from friends.models import FriendRequest
+from groups.directory import record_leaves
+from groups.membership import invalidate_member_groups
+from groups.models import Group, GroupMembership
+from groups.scopes import GROUPS
+from posts.models import Comment, Like, Post
+from posts.ranking import counter_updates
+from posts.scopes import ALL_POSTS, USERS
+from posts.threads import next_path
+from tags.indexing import unindex_posts
+from tags.models import Mention
+from .authentication import invalidate_user
+from .models import DeletionJob
+from .profiles import invalidate_profiles
+from .stats import discount, discount_likes, discount_posts
+
+
+User = get_user_model()
+
+BATCH_SIZE = 1000
+LEASE = timedelta(minutes=5)
+MAX_ATTEMPTS = 5
+RETRY_DELAY = timedelta(minutes=1)
+MAX_RETRY_DELAY = timedelta(hours=1)
+
+USER_STAGES = [
+    'owned_groups',
+    'likes',
+    'comments',
+    'posts',
+    'memberships',
+    'friend_requests',
+    'friendships',
+    'finalize',
+]
+GROUP_STAGES = [
+    'posts',
+    'memberships',
+    'finalize',
+]
+
+
+def schedule_user_deletion(user):
+    with transaction.atomic():
+        now = timezone.now()
+        User.objects.filter(pk=user.pk).update(is_active=False, deleted_at=now)
+        invalidate_user(user.pk, revoke=True)
+        invalidate_profiles(user.pk)
+        # Owned groups go with their owner; the user's job purges them first.
+        Group.objects.filter(owner_id=user.pk, deleted_at__isnull=True).update(deleted_at=now)
+        bump_versions(USERS, GROUPS)
+        return _schedule(DeletionJob.Target.USER, user.pk)
+
+
+def schedule_group_deletion(group):
+    with transaction.atomic():
+        Group.objects.filter(pk=group.pk, deleted_at__isnull=True).update(deleted_at=timezone.now())
+        bump_versions(GROUPS)
+        return _schedule(DeletionJob.Target.GROUP, group.pk)
+
+
+def _schedule(target_type, target_id):
+    try:
+        with transaction.atomic():
+            return DeletionJob.objects.create(target_type=target_type, target_id=target_id)
+    except IntegrityError:
+        return DeletionJob.objects.get(target_type=target_type, target_id=target_id)
+
+
+def claim_next_job():
+    """Lease the oldest unfinished job whose lease is free or expired."""
+    now = timezone.now()
+    candidates = (
+        DeletionJob.objects.filter(status__in=[DeletionJob.Status.PENDING, DeletionJob.Status.RUNNING])
+        .filter(Q(locked_until__isnull=True) | Q(locked_until__lt=now))
+        .order_by('created_at')
+        .values_list('pk', flat=True)
+    )
+    for job_id in candidates[:10]:
+        claimed = DeletionJob.objects.filter(pk=job_id).filter(
+            Q(locked_until__isnull=True) | Q(locked_until__lt=now)
+        ).update(
+            status=DeletionJob.Status.RUNNING,
+            locked_until=now + LEASE,
+            attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return DeletionJob.objects.get(pk=job_id)
+    return None
+
+
+def requeue_failed_jobs(queryset=None):
+    """Give ``FAILED`` jobs (all, or those in ``queryset``) a fresh set of attempts; returns how many."""
+    queryset = DeletionJob.objects.all() if queryset is None else queryset
+    return queryset.filter(status=DeletionJob.Status.FAILED).update(
+        status=DeletionJob.Status.PENDING,
+        attempts=0,
+        locked_until=None,
+        updated_at=timezone.now(),
+    )
+
+
+def run_job(job, batch_size=BATCH_SIZE):
+    """Run ``job`` to completion from its recorded stage."""
+    stages = USER_STAGES if job.target_type == DeletionJob.Target.USER else GROUP_STAGES
+    start = stages.index(job.stage) if job.stage in stages else 0
+    try:
+        for stage in stages[start:]:
+            if job.stage != stage:
+                job.stage = stage
+                _save_progress(job)
+            handler = _HANDLERS[(job.target_type, stage)]
+            for deleted in handler(job.target_id, batch_size):
+                job.rows_deleted += deleted
+                _save_progress(job)
+    except Exception as exc:
+        # ``attempts`` was counted when the job was claimed.
+        job.last_error = repr(exc)
+        if job.attempts >= MAX_ATTEMPTS:
+            job.status = DeletionJob.Status.FAILED
+            job.locked_until = None
+        else:
+            job.status = DeletionJob.Status.PENDING
+            delay = min(RETRY_DELAY * 2 ** (job.attempts - 1), MAX_RETRY_DELAY)
+            job.locked_until = timezone.now() + delay
+        job.save(update_fields=['status', 'last_error', 'locked_until', 'updated_at'])
+        raise
+
+    job.status = DeletionJob.Status.DONE
+    job.locked_until = None
+    job.save(update_fields=['status', 'locked_until', 'updated_at'])
+    # Counters and listings all over the site may have changed.
+    bump_versions(ALL_POSTS, GROUPS, USERS)
+    return job
+
+
+def _save_progress(job):
+    job.locked_until = timezone.now() + LEASE
+    job.save(update_fields=['stage', 'rows_deleted', 'locked_until', 'updated_at'])
+
+
+def _delete_ids(model, ids):
+    table = connection.ops.quote_name(model._meta.db_table)
+    pk = connection.ops.quote_name(model._meta.pk.column)
+    placeholders = ', '.join(['%s'] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {table} WHERE {pk} IN ({placeholders})', ids)
+        return cursor.rowcount
+
+
+def _purge(queryset, batch_size, before_delete=None, fields=('post_id',)):
+    """
+    Yield the number of rows removed per batch until ``queryset`` is empty.
+    ``before_delete`` receives ``(pk, *fields)`` for every row in the batch.
+    """
+    model = queryset.model
+    while True:
+        with transaction.atomic():
+            if before_delete is None:
+                ids = list(queryset.order_by('pk').values_list('pk', flat=True)[:batch_size])
+            else:
+                rows = list(queryset.order_by('pk').values_list('pk', *fields)[:batch_size])
+                ids = [row[0] for row in rows]
+            if not ids:
+                return
+            deleted = _delete_ids(model, ids)
+            if before_delete is not None:
+                before_delete(rows)
+        yield deleted
+
+
+def _per_row(counts):
+    return Case(
+        *[When(pk=pk, then=Value(count)) for pk, count in counts.items()],
+        default=Value(0),
+    )
+
+
+def _decrement_by(model, field, counts):
+    """Subtract ``counts[pk]`` from ``field`` on each row in one UPDATE."""
+    model.objects.filter(pk__in=counts).update(**{field: Greatest(F(field) - _per_row(counts), 0)})
+
+
+def _decrement(counter):
+    """Decrement a post counter (``'likes'`` or ``'comments'``) once per removed row, keeping ``hot_score`` in step."""
+    field = f'{counter}_count'
+
+    def adjust(rows):
+        counts = {}
+        for _, post_id in rows:
+            counts[post_id] = counts.get(post_id, 0) + 1
+        remaining = Greatest(F(field) - _per_row(counts), 0)
+        Post.objects.filter(pk__in=counts).update(**counter_updates(**{counter: remaining}))
+    return adjust
+
+
+def _purge_posts(posts, batch_size):
+    """Remove posts batch by batch, draining their likes and comments first."""
+    while True:
+        post_ids = list(posts.order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not post_ids:
+            return
+        yield from _purge(Like.objects.filter(post_id__in=post_ids), batch_size, _discount_likes)
+        yield from _purge(Mention.objects.filter(post_id__in=post_ids), batch_size)
+        yield from _purge(
+            Comment.objects.filter(post_id__in=post_ids),
+            batch_size,
+            _discount('comments_count'),
+            fields=('author_id',),
+        )
+        with transaction.atomic():
+            unindex_posts(post_ids)
+            # Likes and comments are gone by now, so only the posts themselves are counted off.
+            discount_posts(post_ids)
+            # The remaining dependents are small, so the ORM collector is cheap here.
+            deleted, _ = Post.objects.filter(pk__in=post_ids).delete()
+        yield deleted
+
+
+def _discount(field):
+    """Take each removed row off the stats of the user in its first field."""
+    def adjust(rows):
+        discount(field, [user_id for _, user_id in rows])
+    return adjust
+
+
+def _discount_likes(rows):
+    discount_likes([post_id for _, post_id in rows])
+
+
+def _remove_memberships(rows):
+    _discount('groups_count')(rows)
+    invalidate_member_groups(*{user_id for _, user_id in rows})
+
+
+def _leave_groups(rows):
+    """Like ``_remove_memberships``, but the groups live on, so their directory counts are kept too."""
+    discount('groups_count', [user_id for _, _, user_id in rows])
+    leaving = defaultdict(list)
+    for _, group_id, user_id in rows:
+        leaving[group_id].append(user_id)
+    for group_id, user_ids in leaving.items():
+        record_leaves(group_id, user_ids)
+
+
+def _user_owned_groups(user_id, batch_size):
+    for group_id in Group.objects.filter(owner_id=user_id).values_list('pk', flat=True):
+        for stage in GROUP_STAGES:
+            yield from _HANDLERS[(DeletionJob.Target.GROUP, stage)](group_id, batch_size)
+
+
+def _user_likes(user_id, batch_size):
+    decrement = _decrement('likes')
+
+    def adjust(rows):
+        decrement(rows)
+        _discount_likes(rows)
+    return _purge(Like.objects.filter(user_id=user_id), batch_size, adjust)
+
+
+def _user_comments(user_id, batch_size):
+    return _purge(
+        Comment.objects.filter(author_id=user_id),
+        batch_size,
+        _remove_threads,
+        fields=('post_id', 'parent_id', 'path', 'author_id'),
+    )
+
+
+def _remove_threads(rows):
+    """Delete the replies under a batch of removed comments and fix the counters of both."""
+    under = reduce(or_, [
+        Q(post_id=post_id, path__gt=path, path__lt=next_path(path))
+        for _, post_id, _, path, _ in rows
+    ])
+    replies = list(Comment.objects.filter(under).values_list('pk', 'post_id', 'parent_id', 'author_id'))
+    for start in range(0, len(replies), BATCH_SIZE):
+        _delete_ids(Comment, [reply[0] for reply in replies[start:start + BATCH_SIZE]])
+    discount('comments_count', [author_id for *_, author_id in rows + replies])
+
+    removed = [(pk, post_id, parent_id) for pk, post_id, parent_id, *_ in rows + replies]
+    Mention.objects.filter(comment_id__in=[pk for pk, _, _ in removed]).delete()
+    _decrement('comments')([(pk, post_id) for pk, post_id, _ in removed])
+    gone = {pk for pk, _, _ in removed}
+    surviving_parents = {}
+    for _, _, parent_id in removed:
+        if parent_id is not None and parent_id not in gone:
+            surviving_parents[parent_id] = surviving_parents.get(parent_id, 0) + 1
+    if surviving_parents:
+        _decrement_by(Comment, 'reply_count', surviving_parents)
+
+
+def _user_posts(user_id, batch_size):
+    return _purge_posts(Post.objects.filter(author_id=user_id), batch_size)
+
+
+def _user_memberships(user_id, batch_size):
+    return _purge(
+        GroupMembership.objects.filter(user_id=user_id),
+        batch_size,
+        _leave_groups,
+        fields=('group_id', 'user_id'),
+    )
+
+
+def _user_friend_requests(user_id, batch_size):
+    return _purge(
+        FriendRequest.objects.filter(Q(sender_id=user_id) | Q(receiver_id=user_id)),
+        batch_size,
+    )
+
+
+def _user_friendships(user_id, batch_size):
+    def adjust(rows):
+        # Each friendship is stored in both directions; count the former friend once.
+        former_friends = {to_user_id for _, from_user_id, to_user_id in rows if from_user_id == user_id}
+        _decrement_by(User, 'friends_count', dict.fromkeys(former_friends, 1))
+        invalidate_profiles(*former_friends)
+        transaction.on_commit(lambda: invalidate_friend_lists(*former_friends))
+
+    through = User.friends.through
+    return _purge(
+        through.objects.filter(Q(from_user_id=user_id) | Q(to_user_id=user_id)),
+        batch_size,
+        adjust,
+        fields=('from_user_id', 'to_user_id'),
+    )
+
+
+def _user_finalize(user_id, batch_size):
+    deleted, _ = User.objects.filter(pk=user_id).delete()
+    yield deleted
+
+
+def _group_posts(group_id, batch_size):
+    return _purge_posts(Post.objects.filter(group_id=group_id), batch_size)
+
+
+def _group_memberships(group_id, batch_size):
+    return _purge(
+        GroupMembership.objects.filter(group_id=group_id),
+        batch_size,
+        _remove_memberships,
+        fields=('user_id',),
+    )
+
+
+def _group_finalize(group_id, batch_size):
+    deleted, _ = Group.objects.filter(pk=group_id).delete()
+    yield deleted
+
+
+_HANDLERS = {
+    (DeletionJob.Target.USER, 'owned_groups'): _user_owned_groups,
+    (DeletionJob.Target.USER, 'likes'): _user_likes,
+    (DeletionJob.Target.USER, 'comments'): _user_comments,
+    (DeletionJob.Target.USER, 'posts'): _user_posts,
+    (DeletionJob.Target.USER, 'memberships'): _user_memberships,
+    (DeletionJob.Target.USER, 'friend_requests'): _user_friend_requests,
+    (DeletionJob.Target.USER, 'friendships'): _user_friendships,
+    (DeletionJob.Target.USER, 'finalize'): _user_finalize,
+    (DeletionJob.Target.GROUP, 'posts'): _group_posts,
+    (DeletionJob.Target.GROUP, 'memberships'): _group_memberships,
+    (DeletionJob.Target.GROUP, 'finalize'): _group_finalize,
+}
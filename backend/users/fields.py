@@ -0,0 +1,20 @@
+from rest_framework import serializers
+
+
+class ProfilePictureField(serializers.ImageField):
+    """
+    A user's ``profile_picture`` rendered at the size the response needs.
+
+    Reads emit the URL of the requested rendition, falling back to the original
+    upload until renditions have been built; writes accept a new original.
+    """
+
+    def __init__(self, rendition='thumb', **kwargs):
+        self.rendition = rendition
+        kwargs.setdefault('source', 'profile_picture')
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        if value:
+            value = getattr(value.instance, f'profile_picture_{self.rendition}') or value
+        return super().to_representation(value)
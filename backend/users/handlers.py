@@ -0,0 +1,29 @@
+"""Profile stats moved by outbox events (see posts.events)."""
+from outbox.events import subscribe
+from posts.events import COMMENT_CREATED, LIKE_CREATED, LIKE_REMOVED, POST_CREATED, STATS_RETRACTED
+from .stats import adjust_stats
+
+
+@subscribe(POST_CREATED)
+def count_post(payload):
+    adjust_stats('posts_count', {payload['author']: 1})
+
+
+@subscribe(COMMENT_CREATED)
+def count_comment(payload):
+    adjust_stats('comments_count', {payload['author']: 1})
+
+
+@subscribe(LIKE_CREATED)
+def count_like(payload):
+    adjust_stats('likes_received', {payload['author']: 1})
+
+
+@subscribe(LIKE_REMOVED)
+def discount_like(payload):
+    adjust_stats('likes_received', {payload['author']: -1})
+
+
+@subscribe(STATS_RETRACTED)
+def retract(payload):
+    adjust_stats(payload['field'], {payload['user']: -payload['count']})
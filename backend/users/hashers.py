@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2-SHA256 with the work factor taken from ``PASSWORD_PBKDF2_ITERATIONS``.
+
+    It keeps Django's ``pbkdf2_sha256`` algorithm name, so existing hashes
+    verify unchanged and are rewritten with the configured iteration count on
+    the next successful login.
+    """
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_PBKDF2_ITERATIONS
@@ -0,0 +1,123 @@
+"""
+Profile picture renditions.
+
+Feeds and lists only ever show small avatars, so every uploaded picture is
+decoded once and scaled into a ``thumb`` and a ``medium`` JPEG. Renditions are
+named after a hash of their bytes, which makes them safe to cache forever and
+lets identical uploads share a file. The work runs on a small thread pool:
+Pillow releases the GIL while decoding and resampling.
+"""
+import hashlib
+import io
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps
+
+from backend.conditional import bump_versions
+from posts.scopes import USERS
+from .authentication import invalidate_user
+
+
+User = get_user_model()
+logger = logging.getLogger(__name__)
+
+# Longest edge in pixels, largest first: each rendition is scaled from the previous one.
+RENDITIONS = {
+    'medium': 512,
+    'thumb': 96,
+}
+RENDITION_DIR = 'profile_pics/renditions'
+JPEG_QUALITY = 82
+
+_executor = None
+_lock = threading.Lock()
+
+
+def _get_pool():
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.IMAGE_WORKERS,
+                    thread_name_prefix='image-renditions',
+                )
+    return _executor
+
+
+def render(source):
+    """Decode ``source`` (a file object) once and return ``{rendition: jpeg_bytes}``."""
+    with Image.open(source) as image:
+        # For JPEGs, draft() makes the decoder scale by 1/2..1/8 while reading,
+        # so a 12 MP photo never materializes at full size.
+        largest = max(RENDITIONS.values())
+        image.draft('RGB', (largest, largest))
+        image = ImageOps.exif_transpose(image)
+        if image.mode != 'RGB':
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            converted = image.convert('RGBA')
+            background.paste(converted, mask=converted.getchannel('A'))
+            image = background
+
+        output = {}
+        for name, size in RENDITIONS.items():
+            image.thumbnail((size, size), Image.LANCZOS)
+            buffer = io.BytesIO()
+            image.save(buffer, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+            output[name] = buffer.getvalue()
+        return output
+
+
+def _store(name, data):
+    digest = hashlib.sha256(data).hexdigest()[:20]
+    path = f'{RENDITION_DIR}/{digest}-{name}.jpg'
+    if not default_storage.exists(path):
+        path = default_storage.save(path, ContentFile(data))
+    return path
+
+
+def process_profile_picture(user_id):
+    """Build and attach renditions for ``user_id``'s current profile picture."""
+    original = User.objects.filter(pk=user_id).values_list('profile_picture', flat=True).first()
+    if not original:
+        return False
+    with default_storage.open(original, 'rb') as source:
+        renditions = render(source)
+    paths = {f'profile_picture_{name}': _store(name, data) for name, data in renditions.items()}
+    # Only attach them if the picture was not replaced while we were working.
+    updated = User.objects.filter(pk=user_id, profile_picture=original).update(**paths)
+    if updated:
+        invalidate_user(user_id)
+        bump_versions(USERS)
+    return bool(updated)
+
+
+def _run(user_id):
+    try:
+        process_profile_picture(user_id)
+    except Exception:
+        logger.exception('Could not build profile picture renditions for user %s', user_id)
+    finally:
+        close_old_connections()
+
+
+def submit_profile_picture(user_id):
+    """Queue rendition processing for ``user_id`` on the image pool."""
+    return _get_pool().submit(_run, user_id)
+
+
+def profile_picture_changed(user):
+    """
+    Call before saving a new ``profile_picture``: drops the stale renditions
+    and queues new ones once the save has committed.
+    """
+    for name in RENDITIONS:
+        setattr(user, f'profile_picture_{name}', None)
+    transaction.on_commit(lambda: submit_profile_picture(user.pk))
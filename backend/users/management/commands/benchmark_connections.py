@@ -0,0 +1,80 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = 'Compare per-query latency with fresh, persistent and pooled database connections'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200, help='Queries per mode')
+        parser.add_argument('--database', default='default', help='Database alias to benchmark')
+
+    def handle(self, *args, **options):
+        alias = options['database']
+        iterations = options['iterations']
+        wrapper = connections.create_connection(alias)
+        params = wrapper.get_connection_params()
+        database = wrapper.Database
+
+        def fresh():
+            connection = database.connect(**params)
+            try:
+                self._ping(connection)
+            finally:
+                connection.close()
+
+        persistent = database.connect(**params)
+
+        def reused():
+            self._ping(persistent)
+
+        results = [('fresh connection', self._measure(fresh, iterations))]
+        results.append(('persistent connection', self._measure(reused, iterations)))
+        persistent.close()
+
+        pool = self._make_pool(wrapper, params)
+        if pool is not None:
+            def pooled():
+                with pool.connection() as connection:
+                    self._ping(connection)
+
+            results.append(('psycopg pool', self._measure(pooled, iterations)))
+            pool.close()
+
+        baseline = statistics.mean(results[0][1])
+        self.stdout.write(f'{iterations} x SELECT 1 against "{alias}" ({wrapper.vendor})')
+        for label, timings in results:
+            mean = statistics.mean(timings)
+            p99 = sorted(timings)[int(len(timings) * 0.99) - 1]
+            self.stdout.write(
+                f'  {label:<22} mean {mean * 1000:8.3f} ms   p99 {p99 * 1000:8.3f} ms   '
+                f'{1 / mean:9.0f} q/s   x{baseline / mean:.1f}'
+            )
+
+    def _measure(self, operation, iterations):
+        operation()  # warm up
+        timings = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            operation()
+            timings.append(time.perf_counter() - started)
+        return timings
+
+    def _ping(self, connection):
+        cursor = connection.cursor()
+        cursor.execute('SELECT 1')
+        cursor.fetchone()
+        cursor.close()
+
+    def _make_pool(self, wrapper, params):
+        if wrapper.vendor != 'postgresql':
+            return None
+        try:
+            from psycopg_pool import ConnectionPool
+        except ImportError:
+            self.stdout.write('psycopg_pool is not installed; skipping the pooled run.')
+            return None
+        return ConnectionPool(kwargs=params, min_size=1, max_size=1, open=True)
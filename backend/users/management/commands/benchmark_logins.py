@@ -0,0 +1,47 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from users.hashers import TunedPBKDF2PasswordHasher
+
+
+class Command(BaseCommand):
+    help = 'Measure password verifications per second for each hasher profile'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=float, default=2.0, help='Time spent per measurement')
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=settings.PASSWORD_CHECK_WORKERS,
+            help='Threads used for the pooled measurement',
+        )
+
+    def handle(self, *args, **options):
+        seconds = options['seconds']
+        workers = options['workers']
+        self.stdout.write(f'{"profile":<12} {"iterations":>10} {"per core":>12} {f"{workers} threads":>12}')
+        for profile, iterations in settings.PASSWORD_HASHER_PROFILES.items():
+            with override_settings(PASSWORD_PBKDF2_ITERATIONS=iterations):
+                encoded = TunedPBKDF2PasswordHasher().encode('benchmark-password', 'benchmarksalt')
+                per_core = self._rate(encoded, seconds, 1)
+                pooled = self._rate(encoded, seconds, workers)
+            self.stdout.write(f'{profile:<12} {iterations:>10} {per_core:>8.1f} /s {pooled:>8.1f} /s')
+
+    def _rate(self, encoded, seconds, workers):
+        def worker():
+            done = 0
+            deadline = time.perf_counter() + seconds
+            while time.perf_counter() < deadline:
+                check_password('benchmark-password', encoded)
+                done += 1
+            return done
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            total = sum(executor.map(lambda _: worker(), range(workers)))
+        return total / (time.perf_counter() - started)
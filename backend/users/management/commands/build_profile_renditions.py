@@ -0,0 +1,47 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.db.models import Q
+
+from users.images import process_profile_picture
+
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Build missing thumbnail and medium renditions for uploaded profile pictures'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=settings.IMAGE_WORKERS)
+        parser.add_argument('--all', action='store_true', help='Rebuild renditions that already exist')
+
+    def handle(self, *args, **options):
+        users = User.objects.exclude(profile_picture='').exclude(profile_picture__isnull=True)
+        if not options['all']:
+            # File fields store a missing rendition as '' rather than NULL.
+            users = users.filter(Q(profile_picture_thumb='') | Q(profile_picture_thumb__isnull=True))
+        user_ids = list(users.order_by('pk').values_list('pk', flat=True))
+
+        built = failed = 0
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            for user_id, error in zip(user_ids, executor.map(self._process, user_ids)):
+                if error is None:
+                    built += 1
+                else:
+                    failed += 1
+                    self.stderr.write(f'User {user_id}: {error}')
+
+        self.stdout.write(self.style.SUCCESS(f'✓ Built renditions for {built} users ({failed} failed)'))
+
+    def _process(self, user_id):
+        try:
+            process_profile_picture(user_id)
+        except Exception as exc:
+            return repr(exc)
+        finally:
+            close_old_connections()
+        return None
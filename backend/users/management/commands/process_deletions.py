@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from users.deletion import BATCH_SIZE, claim_next_job, requeue_failed_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = 'Purge soft-deleted users and groups in bounded batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Rows deleted per transaction',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling for new jobs instead of exiting when the queue is empty',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5.0,
+            help='Seconds to sleep between polls with --loop',
+        )
+        parser.add_argument(
+            '--retry-failed',
+            action='store_true',
+            help='Requeue jobs that ran out of attempts before processing',
+        )
+
+    def handle(self, *args, **options):
+        if options['retry_failed']:
+            requeued = requeue_failed_jobs()
+            self.stdout.write(self.style.SUCCESS(f'✓ Requeued {requeued} failed jobs'))
+
+        while True:
+            job = claim_next_job()
+            if job is None:
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+                continue
+
+            self.stdout.write(f'Processing {job} from stage "{job.stage or "start"}"...')
+            try:
+                run_job(job, batch_size=options['batch_size'])
+            except Exception as exc:
+                self.stderr.write(self.style.ERROR(f'✗ {job}: {exc!r}'))
+                continue
+            self.stdout.write(self.style.SUCCESS(f'✓ {job}: {job.rows_deleted} rows deleted'))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from users.stats import DEFAULT_BATCH_SIZE, rebuild_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute the post, like, comment and group totals shown on user profiles'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=int,
+            action='append',
+            dest='user_ids',
+            help='Only rebuild this user (repeatable)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Number of users recounted per query batch',
+        )
+
+    def handle(self, *args, **options):
+        written = rebuild_stats(options['user_ids'], options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'✓ Rebuilt stats for {written} users'))
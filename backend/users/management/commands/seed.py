@@ -1,9 +1,12 @@
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
 from django.utils import timezone
+from posts.counters import recount
 from posts.models import Post, Like, Comment
 from friends.models import FriendRequest
+from groups.directory import rebuild_directory
 from groups.models import Group, GroupMembership
+from users.stats import rebuild_stats
 import random
 from datetime import timedelta
 
@@ -55,6 +58,16 @@ class Command(BaseCommand):
         # Create comments
         comments_count = self.create_comments(users, posts)
         self.stdout.write(self.style.SUCCESS(f'✓ Created {comments_count} comments'))
+
+        # Posts were backdated and counted directly, so rank them from scratch
+        recount([post.pk for post in posts])
+        self.stdout.write(self.style.SUCCESS('✓ Ranked posts for trending'))
+
+        rebuild_stats([user.pk for user in users])
+        self.stdout.write(self.style.SUCCESS('✓ Built profile stats'))
+
+        rebuild_directory()
+        self.stdout.write(self.style.SUCCESS('✓ Built group directory'))
         
         self.stdout.write(self.style.SUCCESS('\n✅ Database seeding completed successfully!'))
 
@@ -172,7 +185,7 @@ class Command(BaseCommand):
         ]
 
         for user1_idx, user2_idx in friendships:
-            users[user1_idx].friends.add(users[user2_idx])
+            users[user1_idx].add_friend(users[user2_idx])
 
         return len(friendships)
 
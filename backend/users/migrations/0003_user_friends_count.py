@@ -0,0 +1,34 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:49
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_friends_count(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    Friendship = User.friends.through
+    counts = (
+        Friendship.objects.filter(from_user_id=OuterRef('pk'))
+        .order_by()
+        .values('from_user_id')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    User.objects.update(friends_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_deletion_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='friends_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_friends_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0003_user_friends_count'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['username', 'id'], include=('first_name', 'last_name', 'profile_picture'), name='users_username_id_covering'),
+        ),
+    ]
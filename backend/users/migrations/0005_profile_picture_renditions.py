@@ -0,0 +1,32 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0004_user_username_covering_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='user',
+            name='users_username_id_covering',
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='profile_picture_medium',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to=''),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='profile_picture_thumb',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to=''),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['username', 'id'], include=('first_name', 'last_name', 'profile_picture', 'profile_picture_thumb'), name='users_username_id_covering'),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:26
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_user_stats(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    UserStats = apps.get_model('users', 'UserStats')
+    Post = apps.get_model('posts', 'Post')
+    Like = apps.get_model('posts', 'Like')
+    Comment = apps.get_model('posts', 'Comment')
+    GroupMembership = apps.get_model('groups', 'GroupMembership')
+
+    def total(queryset, owner):
+        return Coalesce(Subquery(
+            queryset.filter(**{owner: OuterRef('pk')})
+            .order_by()
+            .values(owner)
+            .annotate(total=Count('pk'))
+            .values('total')
+        ), 0)
+
+    UserStats.objects.bulk_create(
+        [UserStats(user_id=user_id) for user_id in User.objects.values_list('pk', flat=True).iterator()],
+        batch_size=1000,
+    )
+    UserStats.objects.update(
+        posts_count=total(Post.objects.all(), 'author_id'),
+        likes_received=total(Like.objects.all(), 'post__author_id'),
+        comments_count=total(Comment.objects.all(), 'author_id'),
+        groups_count=total(GroupMembership.objects.all(), 'user_id'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_profile_picture_renditions'),
+        ('posts', '0008_comment_threads'),
+        ('groups', '0002_group_deleted_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('posts_count', models.PositiveIntegerField(default=0)),
+                ('likes_received', models.PositiveIntegerField(default=0)),
+                ('comments_count', models.PositiveIntegerField(default=0)),
+                ('groups_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(backfill_user_stats, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,10 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import AbstractUser
 
+from friends.cache import invalidate_friend_lists
+from groups.directory import record_friendship
+from .profiles import invalidate_profiles
+
 class User(AbstractUser):
     email = models.EmailField(unique=True)
     friends = models.ManyToManyField(
@@ -9,10 +13,108 @@ class User(AbstractUser):
         blank=True,
     )
 
+    # Denormalized size of ``friends``; maintained by add_friend() and account deletion.
+    friends_count = models.PositiveIntegerField(default=0)
+
     bio = models.TextField(blank=True, null=True)
     profile_picture = models.ImageField(upload_to='profile_pics/', blank=True, null=True)
+    # Downscaled copies built by users.images; empty until processing has finished.
+    profile_picture_thumb = models.ImageField(blank=True, null=True, editable=False)
+    profile_picture_medium = models.ImageField(blank=True, null=True, editable=False)
+
+    # Set when the account is scheduled for deletion; rows are purged in the background.
+    deleted_at = models.DateTimeField(blank=True, null=True)
 
     REQUIRED_FIELDS = ['email']
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Friend list pages seek on (username, id) and read only these columns.
+            models.Index(
+                fields=['username', 'id'],
+                include=['first_name', 'last_name', 'profile_picture', 'profile_picture_thumb'],
+                name='users_username_id_covering',
+            ),
+        ]
+
+    def __str__(self):
+        return self.username
+
+    def add_friend(self, other):
+        """Befriend ``other`` (both directions) and bump both friend counts. Returns False if already friends."""
+        with transaction.atomic():
+            # Lock both users (in pk order) so requests accepted both ways at once
+            # cannot both pass the check: the M2M add() ignores duplicate rows.
+            locked = User.objects.filter(pk__in=[self.pk, other.pk]).order_by('pk').select_for_update()
+            list(locked.values_list('pk', flat=True))
+            if self.friends.filter(pk=other.pk).exists():
+                return False
+            self.friends.add(other)
+            User.objects.filter(pk__in=[self.pk, other.pk]).update(
+                friends_count=models.F('friends_count') + 1
+            )
+            transaction.on_commit(lambda: invalidate_friend_lists(self.pk, other.pk))
+            invalidate_profiles(self.pk, other.pk)
+            record_friendship(self.pk, other.pk)
+        return True
+
+
+class UserStats(models.Model):
+    """
+    Activity totals shown on profiles, kept in step by the write paths in
+    ``users.stats`` instead of being counted per request.
+    """
+
+    user = models.OneToOneField(
+        User,
+        primary_key=True,
+        related_name='stats',
+        on_delete=models.CASCADE,
+    )
+    posts_count = models.PositiveIntegerField(default=0)
+    likes_received = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
+    groups_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f'Stats for {self.user_id}'
+
+
+class DeletionJob(models.Model):
+    class Target(models.TextChoices):
+        USER = 'user', 'User'
+        GROUP = 'group', 'Group'
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Pending'
+        RUNNING = 'running', 'Running'
+        DONE = 'done', 'Done'
+        FAILED = 'failed', 'Failed'
+
+    target_type = models.CharField(max_length=20, choices=Target.choices)
+    target_id = models.BigIntegerField()
+    status = models.CharField(
+        max_length=20,
+        choices=Status.choices,
+        default=Status.PENDING,
+        db_index=True,
+    )
+    stage = models.CharField(max_length=50, blank=True)
+    rows_deleted = models.BigIntegerField(default=0)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    locked_until = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['target_type', 'target_id'],
+                name='unique_deletion_job_per_target',
+            ),
+        ]
+        ordering = ['created_at']
+
     def __str__(self):
-        return self.username
\ No newline at end of file
+        return f'Delete {self.target_type} {self.target_id} ({self.status})'
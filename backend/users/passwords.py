@@ -0,0 +1,71 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import check_password, get_hasher, identify_hasher, make_password
+from rest_framework.exceptions import Throttled
+
+
+User = get_user_model()
+
+# Password hashing runs in OpenSSL with the GIL released, so a small thread
+# pool gives real parallelism while capping how many cores logins can use.
+_executor = None
+_slots = None
+_lock = threading.Lock()
+
+
+def _get_pool():
+    global _executor, _slots
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                workers = settings.PASSWORD_CHECK_WORKERS
+                _slots = threading.BoundedSemaphore(workers + settings.PASSWORD_CHECK_QUEUE)
+                _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-check')
+    return _executor, _slots
+
+
+def submit(fn, *args):
+    """Run ``fn`` on the hashing pool, refusing work once the queue is full."""
+    executor, slots = _get_pool()
+    if not slots.acquire(blocking=False):
+        raise Throttled(wait=1, detail='Too many logins in progress, please retry.')
+    future = executor.submit(fn, *args)
+    future.add_done_callback(lambda _: slots.release())
+    return future
+
+
+def _wait(future):
+    try:
+        return future.result(timeout=settings.PASSWORD_CHECK_TIMEOUT)
+    except TimeoutError as exc:
+        raise Throttled(wait=1, detail='Too many logins in progress, please retry.') from exc
+
+
+def _needs_rehash(encoded):
+    try:
+        hasher = identify_hasher(encoded)
+    except ValueError:
+        return False
+    preferred = get_hasher('default')
+    return hasher.algorithm != preferred.algorithm or preferred.must_update(encoded)
+
+
+def verify_password(user, raw_password):
+    """
+    Check ``raw_password`` against ``user`` off the request thread. When the
+    stored hash uses outdated parameters it is replaced after a successful check.
+    """
+    valid = _wait(submit(check_password, raw_password, user.password))
+    if valid and _needs_rehash(user.password):
+        user.password = _wait(submit(make_password, raw_password))
+        User.objects.filter(pk=user.pk).update(password=user.password)
+    return valid
+
+
+def burn_password_check(raw_password):
+    """Spend the same work as a real check so unknown accounts cannot be told apart by timing."""
+    _wait(submit(make_password, raw_password))
+
@@ -0,0 +1,70 @@
+"""
+Shared cache of public profile headers.
+
+Profile cards are fetched every time a user name is hovered, so
+``GET /users/<id>/`` is answered from a cached copy of the user row with its
+``UserStats``. Profile edits, friend count changes and stat adjustments drop
+the entry once their transaction commits; the timeout bounds anything that
+slips past them (a read racing a write). Only with ``SHARED_CACHE`` are
+profiles cached at all, since a drop must reach every process.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+
+
+PROFILE_TIMEOUT = 300
+# Sentinel for users that do not exist or are inactive, so misses are cached too.
+MISSING = 0
+
+PROFILE_FIELDS = [
+    'id',
+    'username',
+    'first_name',
+    'last_name',
+    'bio',
+    'profile_picture',
+    'profile_picture_thumb',
+    'profile_picture_medium',
+    'friends_count',
+]
+
+
+def _profile_key(user_id):
+    return f'users:profile:{user_id}'
+
+
+def load_profile(user_id):
+    """The active user ``user_id`` with ``stats`` loaded, or ``None``."""
+    return load_profiles([user_id]).get(user_id)
+
+
+def load_profiles(user_ids):
+    """
+    ``{user_id: user}`` for the active users among ``user_ids``: one cache
+    round trip, plus one query for the ids the cache did not have.
+    """
+    keys = {_profile_key(user_id): user_id for user_id in user_ids}
+    cached = cache.get_many(list(keys)) if settings.SHARED_CACHE else {}
+    profiles = {keys[key]: user for key, user in cached.items()}
+    missing = [user_id for user_id in user_ids if user_id not in profiles]
+    if missing:
+        User = get_user_model()
+        loaded = {
+            user.pk: user
+            for user in User.objects.filter(pk__in=missing, is_active=True)
+            .select_related('stats')
+            .only(*PROFILE_FIELDS, 'stats')
+        }
+        fetched = {user_id: loaded.get(user_id, MISSING) for user_id in missing}
+        if settings.SHARED_CACHE:
+            cache.set_many({_profile_key(user_id): user for user_id, user in fetched.items()}, PROFILE_TIMEOUT)
+        profiles.update(fetched)
+    return {user_id: user for user_id, user in profiles.items() if user}
+
+
+def invalidate_profiles(*user_ids):
+    """Drop the cached profiles of ``user_ids`` once the current transaction commits."""
+    keys = [_profile_key(user_id) for user_id in user_ids]
+    transaction.on_commit(lambda: cache.delete_many(keys))
@@ -3,10 +3,46 @@ from rest_framework import serializers
 from rest_framework.exceptions import AuthenticationFailed
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from .fields import ProfilePictureField
+from .images import profile_picture_changed
+from .models import UserStats
+from .passwords import burn_password_check, verify_password
+
 
 User = get_user_model()
 
 
+class UserStatsSerializer(serializers.ModelSerializer):
+    postsCount = serializers.IntegerField(source='posts_count')
+    likesReceived = serializers.IntegerField(source='likes_received')
+    commentsCount = serializers.IntegerField(source='comments_count')
+    groupsCount = serializers.IntegerField(source='groups_count')
+
+    class Meta:
+        model = UserStats
+        fields = [
+            'postsCount',
+            'likesReceived',
+            'commentsCount',
+            'groupsCount',
+        ]
+        read_only_fields = fields
+
+
+class StatsField(serializers.Field):
+    """A user's ``UserStats``; read it with ``select_related('stats')`` to avoid a query."""
+
+    def __init__(self, **kwargs):
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, user):
+        # Accounts the rebuild has not reached yet read as zeros.
+        stats = getattr(user, 'stats', None) or UserStats(user_id=user.pk)
+        return UserStatsSerializer(stats).data
+
+
 class UserProfileSerializer(serializers.ModelSerializer):
     firstName = serializers.CharField(
         source='first_name',
@@ -18,15 +54,16 @@ class UserProfileSerializer(serializers.ModelSerializer):
         required=False,
         allow_blank=True,
     )
-    profilePicture = serializers.ImageField(
-        source='profile_picture',
+    profilePicture = ProfilePictureField(
+        rendition='medium',
         required=False,
         allow_null=True,
     )
-    friends = serializers.PrimaryKeyRelatedField(
-        many=True,
+    friendsCount = serializers.IntegerField(
+        source='friends_count',
         read_only=True,
     )
+    stats = StatsField()
 
     class Meta:
         model = User
@@ -38,18 +75,45 @@ class UserProfileSerializer(serializers.ModelSerializer):
             'lastName',
             'bio',
             'profilePicture',
-            'friends',
+            'friendsCount',
+            'stats',
         ]
         read_only_fields = [
             'id',
             'email',
-            'friends',
         ]
         extra_kwargs = {
             'username': {'required': False},
             'bio': {'required': False, 'allow_blank': True, 'allow_null': True},
         }
 
+    def update(self, instance, validated_data):
+        if 'profile_picture' in validated_data:
+            profile_picture_changed(instance)
+        return super().update(instance, validated_data)
+
+
+class PublicProfileSerializer(serializers.ModelSerializer):
+    firstName = serializers.CharField(source='first_name', read_only=True)
+    lastName = serializers.CharField(source='last_name', read_only=True)
+    profilePicture = ProfilePictureField(rendition='medium', read_only=True)
+    friendsCount = serializers.IntegerField(source='friends_count', read_only=True)
+    stats = StatsField()
+
+    class Meta:
+        model = User
+        fields = [
+            'id',
+            'username',
+            'firstName',
+            'lastName',
+            'bio',
+            'profilePicture',
+            'friendsCount',
+            'stats',
+        ]
+        read_only_fields = fields
+
 
 class RegisterSerializer(serializers.ModelSerializer):
     password = serializers.CharField(
@@ -106,6 +170,8 @@ class RegisterSerializer(serializers.ModelSerializer):
         user = User(**validated_data)
         user.set_password(password)
         user.save()
+        if user.profile_picture:
+            profile_picture_changed(user)
         return user
 
 
@@ -131,12 +197,13 @@ class EmailLoginSerializer(serializers.Serializer):
         try:
             user = User.objects.get(email=email)
         except User.DoesNotExist as exc:
+            burn_password_check(password)
             raise AuthenticationFailed(self.error_messages['invalid_credentials']) from exc
 
         if not user.is_active:
             raise AuthenticationFailed(self.error_messages['inactive'])
 
-        if not user.check_password(password):
+        if not verify_password(user, password):
             raise AuthenticationFailed(self.error_messages['invalid_credentials'])
 
         refresh = RefreshToken.for_user(user)
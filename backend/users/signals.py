@@ -0,0 +1,34 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from backend.conditional import bump_versions
+from posts.scopes import USERS
+from .authentication import invalidate_user
+from .profiles import invalidate_profiles
+from .models import UserStats
+
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+def invalidate_saved_user(sender, instance, created, **kwargs):
+    # Also clears a cached "no such user" left by a lookup before the account existed.
+    invalidate_profiles(instance.pk)
+    if not created:
+        invalidate_user(instance.pk, revoke=not instance.is_active)
+        if kwargs.get('update_fields') != frozenset({'last_login'}):
+            bump_versions(USERS)
+
+
+@receiver(post_save, sender=User)
+def create_user_stats(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        UserStats.objects.get_or_create(user=instance)
+
+
+@receiver(post_delete, sender=User)
+def invalidate_deleted_user(sender, instance, **kwargs):
+    invalidate_user(instance.pk, revoke=True)
+    invalidate_profiles(instance.pk)
@@ -0,0 +1,117 @@
+"""
+Per-user activity totals.
+
+Every ``User`` has a ``UserStats`` row, created with the account. The write
+paths that add or remove posts, likes, comments and memberships move the
+matching counter with ``adjust_stats()``, in the same transaction or, for
+posts, comments and likes, from the outbox handlers in ``users.handlers``, so
+a profile reads its totals from one row by primary key. ``rebuild_stats()``
+recomputes the rows from the source tables, in batches of users with one
+GROUP BY per table; the ``rebuild_user_stats`` command runs it to create
+missing rows and repair drift.
+"""
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.db.models import Case, Count, F, Value, When
+from django.db.models.functions import Greatest
+
+from groups.models import GroupMembership
+from posts.events import stats_retracted
+from posts.models import Comment, Like, Post
+from .models import UserStats
+from .profiles import invalidate_profiles
+
+
+User = get_user_model()
+
+DEFAULT_BATCH_SIZE = 1000
+STAT_FIELDS = ('posts_count', 'likes_received', 'comments_count', 'groups_count')
+# Credited by outbox handlers, so removals are retracted through the outbox too.
+OUTBOX_FIELDS = ('posts_count', 'likes_received', 'comments_count')
+
+
+def adjust_stats(field, deltas):
+    """Move ``field`` by ``deltas[user_id]`` for each user in one UPDATE."""
+    deltas = {user_id: delta for user_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    change = Case(
+        *[When(pk=user_id, then=Value(delta)) for user_id, delta in deltas.items()],
+        default=Value(0),
+    )
+    UserStats.objects.filter(pk__in=deltas).update(**{field: Greatest(F(field) + change, 0)})
+    invalidate_profiles(*deltas)
+
+
+def discount(field, user_ids):
+    """Subtract one from ``field`` for every occurrence of a user in ``user_ids``."""
+    _subtract(field, {user_id: n for user_id, n in Counter(user_ids).items() if user_id is not None})
+
+
+def discount_rows(field, queryset, owner):
+    """Subtract from ``field`` the rows of ``queryset`` each user owns; for rows about to be deleted."""
+    _subtract(field, _totals(queryset, owner))
+
+
+def _subtract(field, counts):
+    # A row may go before the event that counts it has been applied; clamping
+    # at zero would then lose the subtraction, so it queues up behind it.
+    if field in OUTBOX_FIELDS:
+        stats_retracted(field, {user_id: n for user_id, n in counts.items() if n and user_id is not None})
+    else:
+        adjust_stats(field, {user_id: -n for user_id, n in counts.items()})
+
+
+def discount_likes(post_ids):
+    """Take one like per entry in ``post_ids`` off the posts' authors."""
+    authors = dict(Post.objects.filter(pk__in=set(post_ids)).values_list('pk', 'author_id'))
+    discount('likes_received', [authors.get(post_id) for post_id in post_ids])
+
+
+def discount_posts(post_ids):
+    """Take posts about to be deleted off their authors, with the likes and comments that go with them."""
+    discount_rows('posts_count', Post.objects.filter(pk__in=post_ids), 'author_id')
+    discount_rows('likes_received', Like.objects.filter(post_id__in=post_ids), 'post__author_id')
+    discount_rows('comments_count', Comment.objects.filter(post_id__in=post_ids), 'author_id')
+
+
+def rebuild_stats(user_ids=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Recompute the stats of ``user_ids`` (default: everyone); returns how many users were written."""
+    users = User.objects.order_by('pk').values_list('pk', flat=True)
+    if user_ids is not None:
+        users = users.filter(pk__in=user_ids)
+
+    written = 0
+    last_id = 0
+    while True:
+        batch = list(users.filter(pk__gt=last_id)[:batch_size])
+        if not batch:
+            return written
+        last_id = batch[-1]
+        totals = {
+            'posts_count': _totals(Post.objects.filter(author_id__in=batch), 'author_id'),
+            'likes_received': _totals(Like.objects.filter(post__author_id__in=batch), 'post__author_id'),
+            'comments_count': _totals(Comment.objects.filter(author_id__in=batch), 'author_id'),
+            'groups_count': _totals(GroupMembership.objects.filter(user_id__in=batch), 'user_id'),
+        }
+        UserStats.objects.bulk_create(
+            [
+                UserStats(user_id=user_id, **{field: totals[field].get(user_id, 0) for field in STAT_FIELDS})
+                for user_id in batch
+            ],
+            update_conflicts=True,
+            unique_fields=['user'],
+            update_fields=list(STAT_FIELDS),
+        )
+        invalidate_profiles(*batch)
+        written += len(batch)
+
+
+def _totals(queryset, owner):
+    return dict(
+        queryset.order_by()
+        .values(owner)
+        .annotate(total=Count('pk'))
+        .values_list(owner, 'total')
+    )
@@ -1,3 +1,480 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+import time
+from io import StringIO
+from unittest.mock import patch
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from PIL import Image
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from backend.throttling import reset_throttling
+from groups.models import Group, GroupMembership
+from outbox.worker import drain
+from posts.models import Comment, Like, Post
+from .authentication import user_cache
+from .deletion import MAX_ATTEMPTS, claim_next_job
+from .images import process_profile_picture
+from .models import DeletionJob, UserStats
+from .stats import STAT_FIELDS, rebuild_stats
+
+User = get_user_model()
+
+
+def fail_stage(target_id, batch_size):
+    raise RuntimeError('stage failed')
+
+
+class AccountDeletionTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='alice',
+            email='alice@example.com',
+            password='password123',
+        )
+        self.other = User.objects.create_user(
+            username='bob',
+            email='bob@example.com',
+            password='password123',
+        )
+        self.user.add_friend(self.other)
+
+        self.other_post = Post.objects.create(author=self.other, content='Hi', likes_count=1, comments_count=4)
+        Like.objects.create(user=self.user, post=self.other_post)
+        Comment.objects.create(post=self.other_post, author=self.user, content='Hello')
+        # A reply by the user goes with the replies beneath it; the comment it answers stays.
+        self.thread = Comment.objects.create(post=self.other_post, author=self.other, content='Thread', reply_count=1)
+        reply = Comment.objects.create(post=self.other_post, author=self.user, content='Reply', parent=self.thread, reply_count=1)
+        Comment.objects.create(post=self.other_post, author=self.other, content='Nested', parent=reply)
+
+        own_post = Post.objects.create(author=self.user, content='Mine', likes_count=1)
+        Like.objects.create(user=self.other, post=own_post)
+
+        self.group = Group.objects.create(name='Chess Club', owner=self.user)
+        GroupMembership.objects.create(group=self.group, user=self.user, role=GroupMembership.Role.OWNER)
+        GroupMembership.objects.create(group=self.group, user=self.other)
+        Post.objects.create(author=self.other, group=self.group, content='Group post')
+        rebuild_stats()
+
+        self.url = reverse('users:me')
+
+    def test_delete_soft_deletes_then_purges_in_batches(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.delete(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.user.refresh_from_db()
+        self.group.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+        self.assertIsNotNone(self.user.deleted_at)
+        self.assertIsNotNone(self.group.deleted_at)
+
+        call_command('process_deletions', '--batch-size', '1', stdout=StringIO())
+
+        job = DeletionJob.objects.get(target_type=DeletionJob.Target.USER, target_id=self.user.pk)
+        self.assertEqual(job.status, DeletionJob.Status.DONE)
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+        self.assertFalse(Group.objects.filter(pk=self.group.pk).exists())
+        self.assertEqual(list(Post.objects.values_list('pk', flat=True)), [self.other_post.pk])
+        self.assertFalse(self.other.friends.exists())
+        self.other.refresh_from_db()
+        self.assertEqual(self.other.friends_count, 0)
+
+        self.other_post.refresh_from_db()
+        self.assertEqual(self.other_post.likes_count, 0)
+        self.assertEqual(self.other_post.comments_count, 1)
+        self.assertEqual(list(Comment.objects.values_list('pk', flat=True)), [self.thread.pk])
+        self.thread.refresh_from_db()
+        self.assertEqual(self.thread.reply_count, 0)
+
+        # The purge kept the survivor's stats in step with what is left.
+        drain()
+        incremental = UserStats.objects.values(*STAT_FIELDS).get(pk=self.other.pk)
+        rebuild_stats()
+        self.assertEqual(UserStats.objects.values(*STAT_FIELDS).get(pk=self.other.pk), incremental)
+
+    def test_interrupted_job_resumes_from_recorded_stage(self):
+        self.client.force_authenticate(self.user)
+        self.client.delete(self.url)
+        DeletionJob.objects.update(status=DeletionJob.Status.RUNNING, stage='posts')
+
+        call_command('process_deletions', stdout=StringIO())
+
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+        self.assertEqual(DeletionJob.objects.get().status, DeletionJob.Status.DONE)
+
+    def test_failed_job_backs_off_then_can_be_requeued(self):
+        self.client.force_authenticate(self.user)
+        self.client.delete(self.url)
+
+        with patch.dict('users.deletion._HANDLERS', {('user', 'owned_groups'): fail_stage}):
+            call_command('process_deletions', stdout=StringIO(), stderr=StringIO())
+            job = DeletionJob.objects.get()
+            self.assertEqual((job.status, job.attempts), (DeletionJob.Status.PENDING, 1))
+            self.assertIn('stage failed', job.last_error)
+            self.assertIsNone(claim_next_job())
+
+            DeletionJob.objects.update(attempts=MAX_ATTEMPTS - 1, locked_until=None)
+            call_command('process_deletions', stdout=StringIO(), stderr=StringIO())
+            self.assertEqual(DeletionJob.objects.get().status, DeletionJob.Status.FAILED)
+            self.assertIsNone(claim_next_job())
+
+        out = StringIO()
+        call_command('process_deletions', '--retry-failed', stdout=out)
+        self.assertIn('Requeued 1 failed jobs', out.getvalue())
+        self.assertEqual(DeletionJob.objects.get().status, DeletionJob.Status.DONE)
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+
+
+class UserStatsTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        reset_throttling()
+        self.user = User.objects.create_user(
+            username='alice',
+            email='alice@example.com',
+            password='password123',
+        )
+        self.other = User.objects.create_user(
+            username='bob',
+            email='bob@example.com',
+            password='password123',
+        )
+        self.group = Group.objects.create(name='Chess Club', owner=self.other)
+        GroupMembership.objects.create(group=self.group, user=self.other, role=GroupMembership.Role.OWNER)
+        UserStats.objects.filter(pk=self.other.pk).update(groups_count=1)
+
+    def stats(self, user):
+        return UserStats.objects.values(*STAT_FIELDS).get(pk=user.pk)
+
+    def test_write_paths_keep_stats_current(self):
+        self.client.force_authenticate(self.user)
+        post_id = self.client.post(reverse('posts:post-list-create'), {'content': 'Hello'}).data['id']
+        self.client.post(reverse('groups:group-join', args=[self.group.pk]))
+
+        self.client.force_authenticate(self.other)
+        self.client.post(reverse('posts:post-like-toggle', args=[post_id]))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('posts:comment-list-create', args=[post_id]), {'content': 'Nice'})
+        # Post, like and comment stats are outbox side effects, removals included; group joins apply at once.
+        self.assertEqual(self.stats(self.user)['posts_count'], 0)
+        drain()
+
+        self.assertEqual(
+            self.stats(self.user),
+            {'posts_count': 1, 'likes_received': 1, 'comments_count': 0, 'groups_count': 1},
+        )
+        self.assertEqual(
+            self.stats(self.other),
+            {'posts_count': 0, 'likes_received': 0, 'comments_count': 1, 'groups_count': 1},
+        )
+
+        self.client.force_authenticate(self.user)
+        self.client.post(reverse('groups:group-leave', args=[self.group.pk]))
+        self.client.delete(reverse('posts:post-detail', args=[post_id]))
+        drain()
+
+        self.assertEqual(self.stats(self.user), dict.fromkeys(STAT_FIELDS, 0))
+        self.assertEqual(self.stats(self.other)['comments_count'], 0)
+
+    def test_rows_deleted_before_their_events_apply_are_not_counted(self):
+        self.client.force_authenticate(self.user)
+        post_id = self.client.post(reverse('posts:post-list-create'), {'content': 'Hello'}).data['id']
+        self.client.force_authenticate(self.other)
+        self.client.post(reverse('posts:post-like-toggle', args=[post_id]))
+        comment_id = self.client.post(reverse('posts:comment-list-create', args=[post_id]), {'content': 'Nice'}).data['id']
+        self.client.delete(reverse('posts:comment-detail', args=[post_id, comment_id]))
+        self.client.force_authenticate(self.user)
+        self.client.delete(reverse('posts:post-detail', args=[post_id]))
+
+        drain()
+        self.assertEqual(self.stats(self.user), dict.fromkeys(STAT_FIELDS, 0))
+        self.assertEqual(self.stats(self.other), {**dict.fromkeys(STAT_FIELDS, 0), 'groups_count': 1})
+
+    def test_profiles_read_stats_without_aggregates(self):
+        Post.objects.create(author=self.other, content='Hi')
+        rebuild_stats([self.other.pk])
+        self.client.force_authenticate(self.user)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('users:user-detail', args=[self.other.pk]))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data['stats'],
+            {'postsCount': 1, 'likesReceived': 0, 'commentsCount': 0, 'groupsCount': 1},
+        )
+        self.assertNotIn('email', response.data)
+        self.assertEqual(self.client.get(reverse('users:me')).data['stats']['postsCount'], 0)
+
+    @override_settings(SHARED_CACHE=True)
+    def test_profile_header_is_cached_until_it_changes(self):
+        url = reverse('users:user-detail', args=[self.other.pk])
+        self.client.force_authenticate(self.user)
+        self.client.get(url)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.data['username'], 'bob')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.force_authenticate(self.other)
+            self.client.patch(reverse('users:me'), {'bio': 'Chess player'})
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get(url).data['bio'], 'Chess player')
+
+    def test_profile_header_is_not_cached_without_a_shared_cache(self):
+        url = reverse('users:user-detail', args=[self.other.pk])
+        self.client.force_authenticate(self.user)
+        self.client.get(url)
+
+        # Another process would not see this process drop the entry.
+        User.objects.filter(pk=self.other.pk).update(bio='Chess player')
+        self.assertEqual(self.client.get(url).data['bio'], 'Chess player')
+
+    def test_rebuild_command_repairs_drift_and_missing_rows(self):
+        Post.objects.create(author=self.user, content='Imported')
+        UserStats.objects.filter(pk=self.user.pk).delete()
+        UserStats.objects.filter(pk=self.other.pk).update(likes_received=7)
+
+        out = StringIO()
+        call_command('rebuild_user_stats', stdout=out)
+
+        self.assertIn('Rebuilt stats for 2 users', out.getvalue())
+        self.assertEqual(self.stats(self.user)['posts_count'], 1)
+        self.assertEqual(self.stats(self.other)['likes_received'], 0)
+
+
+class UserBatchTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.users = [
+            User.objects.create_user(username=f'user{i}', email=f'user{i}@example.com', password='password123')
+            for i in range(3)
+        ]
+        self.client.force_authenticate(self.users[0])
+
+    @override_settings(SHARED_CACHE=True)
+    def test_profiles_come_back_in_input_order_from_one_query(self):
+        self.users[1].is_active = False
+        self.users[1].save()
+        ids = [self.users[2].pk, self.users[1].pk, self.users[0].pk, 999]
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('users:user-batch'), {'ids': ','.join(map(str, ids))})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([user['username'] for user in response.data['results']], ['user2', 'user0'])
+        self.assertEqual(response.data['missing'], [self.users[1].pk, 999])
+        self.assertIn('stats', response.data['results'][0])
+
+        with self.assertNumQueries(0):
+            self.client.get(reverse('users:user-batch'), {'ids': ','.join(map(str, ids))})
+
+
+class StatelessJWTAuthenticationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        user_cache.clear()
+        self.user = User.objects.create_user(
+            username='alice',
+            email='alice@example.com',
+            password='password123',
+        )
+        self.post = Post.objects.create(author=self.user, content='Hello')
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_loaded_user_is_reused(self):
+        Like.objects.create(user=self.user, post=self.post)
+        Post.objects.filter(pk=self.post.pk).update(likes_count=1)
+        url = reverse('posts:post-like-toggle', args=[self.post.pk])
+        self.client.get(reverse('users:me'))
+        # post, savepoint, existing like, delete like, decrement counter, outbox event, release, refresh counter
+        with self.assertNumQueries(8):
+            response = self.client.post(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data['liked'])
+
+    def test_profile_update_is_visible_immediately(self):
+        url = reverse('users:me')
+        self.client.get(url)
+        response = self.client.patch(url, {'bio': 'Updated'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get(url)
+        self.assertEqual(response.data['bio'], 'Updated')
+
+    def test_deactivated_user_is_rejected(self):
+        self.user.is_active = False
+        self.user.save()
+
+        response = self.client.get(reverse('posts:post-list-create'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivation_elsewhere_is_seen_once_the_cached_user_expires(self):
+        url = reverse('users:me')
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        # Another process deactivated the account and its revocation marker is gone.
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        cache.clear()
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+
+        user_cache.clear()
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class EmailLoginTests(APITestCase):
+    url = reverse('users:login')
+
+    @override_settings(PASSWORD_PBKDF2_ITERATIONS=1000)
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='alice',
+            email='alice@example.com',
+            password='password123',
+        )
+
+    @override_settings(PASSWORD_PBKDF2_ITERATIONS=2000)
+    def test_login_rehashes_outdated_password(self):
+        response = self.client.post(self.url, {'email': 'alice@example.com', 'password': 'password123'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$2000$'))
+        self.assertTrue(self.user.check_password('password123'))
+
+    @override_settings(PASSWORD_PBKDF2_ITERATIONS=1000)
+    def test_wrong_password_is_rejected_without_rehash(self):
+        original = self.user.password
+        response = self.client.post(self.url, {'email': 'alice@example.com', 'password': 'nope'})
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.password, original)
+
+    @override_settings(PASSWORD_CHECK_TIMEOUT=0)
+    def test_slow_password_check_is_throttled(self):
+        with patch('users.passwords.check_password', side_effect=lambda *args: time.sleep(0.2)):
+            response = self.client.post(self.url, {'email': 'alice@example.com', 'password': 'password123'})
+
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+
+class MeViewTests(APITestCase):
+    url = reverse('users:me')
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='alice',
+            email='alice@example.com',
+            password='password123',
+        )
+        self.friends = [
+            User.objects.create_user(
+                username=f'friend{i}',
+                email=f'friend{i}@example.com',
+                password='password123',
+            )
+            for i in range(3)
+        ]
+        for friend in self.friends:
+            self.user.add_friend(friend)
+        self.client.force_authenticate(self.user)
+
+    def test_profile_reports_friend_count_not_ids(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['friendsCount'], 3)
+        self.assertNotIn('friends', response.data)
+        self.friends[0].refresh_from_db()
+        self.assertEqual(self.friends[0].friends_count, 1)
+
+    def test_expand_friends_pages_by_id(self):
+        response = self.client.get(self.url, {'expand': 'friends', 'friendsAfter': self.friends[0].pk})
+
+        ids = [friend.pk for friend in self.friends[1:]]
+        self.assertEqual(response.data['friends'], {'ids': ids, 'next': None})
+
+    def test_unchanged_profile_returns_304(self):
+        etag = self.client.get(self.url)['ETag']
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.client.patch(self.url, {'bio': 'Updated'})
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class ProfilePictureRenditionTests(APITestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        override = self.settings(MEDIA_ROOT=media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.user = User.objects.create_user(
+            username='alice',
+            email='alice@example.com',
+            password='password123',
+        )
+        self.client.force_authenticate(self.user)
+
+    def upload(self, submit=process_profile_picture):
+        buffer = io.BytesIO()
+        Image.effect_noise((1600, 1200), 64).convert('RGB').save(buffer, 'JPEG', quality=95)
+        picture = SimpleUploadedFile('me.jpg', buffer.getvalue(), content_type='image/jpeg')
+        with patch('users.images.submit_profile_picture', side_effect=submit):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.patch(reverse('users:me'), {'profilePicture': picture}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+
+    def test_upload_builds_small_content_addressed_renditions(self):
+        self.upload()
+
+        original_size = self.user.profile_picture.size
+        self.assertLess(self.user.profile_picture_thumb.size, original_size / 10)
+        self.assertLess(self.user.profile_picture_medium.size, original_size / 10)
+        with default_storage.open(self.user.profile_picture_thumb.name) as thumb:
+            self.assertEqual(max(Image.open(thumb).size), 96)
+        self.assertRegex(self.user.profile_picture_thumb.name, r'renditions/[0-9a-f]{20}-thumb\.jpg$')
+
+    def test_serializers_emit_rendition_for_context(self):
+        self.upload()
+        Post.objects.create(author=self.user, content='Hello')
+
+        profile = self.client.get(reverse('users:me')).data
+        self.assertTrue(profile['profilePicture'].endswith('-medium.jpg'))
+        feed = self.client.get(reverse('posts:post-list-create')).data
+        self.assertTrue(feed[0]['author']['profilePicture'].endswith('-thumb.jpg'))
+
+    def test_command_builds_renditions_that_failed(self):
+        def fail(user_id):
+            raise OSError('disk full')
+
+        with self.assertRaises(OSError):
+            self.upload(submit=fail)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.profile_picture_thumb)
+
+        out = StringIO()
+        command = 'users.management.commands.build_profile_renditions'
+        with patch(f'{command}.process_profile_picture') as process:
+            call_command('build_profile_renditions', workers=1, stdout=out)
+
+        process.assert_called_once_with(self.user.pk)
+        self.assertIn('Built renditions for 1 users (0 failed)', out.getvalue())
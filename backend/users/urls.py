@@ -1,7 +1,7 @@
 from django.urls import path
 from rest_framework_simplejwt.views import TokenRefreshView
 
-from .views import EmailLoginView, MeView, RegisterView
+from .views import EmailLoginView, MeView, RegisterView, UserBatchView, UserDetailView
 
 
 app_name = 'users'
@@ -11,5 +11,7 @@ urlpatterns = [
     path('auth/login/', EmailLoginView.as_view(), name='login'),
     path('auth/token/refresh/', TokenRefreshView.as_view(), name='token-refresh'),
     path('users/me/', MeView.as_view(), name='me'),
+    path('users/batch/', UserBatchView.as_view(), name='user-batch'),
+    path('users/<int:pk>/', UserDetailView.as_view(), name='user-detail'),
 ]
 
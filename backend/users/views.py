@@ -1,10 +1,25 @@
+import hashlib
+import json
+
 from django.contrib.auth import get_user_model
+from django.http import Http404
+from django.utils.cache import get_conditional_response
 from rest_framework import generics, permissions, status
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
 
-from .serializers import EmailLoginSerializer, RegisterSerializer, UserProfileSerializer
+from backend.batch import batch_ids, batch_response
+
+from .deletion import schedule_user_deletion
+from .profiles import load_profile, load_profiles
+from .serializers import (
+    EmailLoginSerializer,
+    PublicProfileSerializer,
+    RegisterSerializer,
+    UserProfileSerializer,
+)
 
 
 User = get_user_model()
@@ -49,9 +64,81 @@ class EmailLoginView(APIView):
         )
 
 
-class MeView(generics.RetrieveUpdateAPIView):
+class MeView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = UserProfileSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    FRIENDS_PAGE_SIZE = 100
+
+    def get_object(self):
+        # Always read the profile fresh: request.user may come from the short-lived user cache.
+        return User.objects.select_related('stats').get(pk=self.request.user.pk)
+
+    def retrieve(self, request, *args, **kwargs):
+        data = self.get_serializer(self.get_object()).data
+        if request.query_params.get('expand') == 'friends':
+            data['friends'] = self.get_friends_page(request)
+
+        etag = '"%s"' % hashlib.md5(
+            json.dumps(data, sort_keys=True, default=str).encode()
+        ).hexdigest()
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+        response = Response(data)
+        response['ETag'] = etag
+        return response
+
+    def get_friends_page(self, request):
+        """One keyset page of friend ids, continued with ``?friendsAfter=<last id>``."""
+        friend_ids = User.friends.through.objects.filter(
+            from_user_id=request.user.pk,
+        ).order_by('to_user_id').values_list('to_user_id', flat=True)
+        after = request.query_params.get('friendsAfter')
+        if after is not None:
+            try:
+                friend_ids = friend_ids.filter(to_user_id__gt=int(after))
+            except ValueError:
+                raise ValidationError({'friendsAfter': 'Must be a user id.'})
+        ids = list(friend_ids[:self.FRIENDS_PAGE_SIZE + 1])
+        has_more = len(ids) > self.FRIENDS_PAGE_SIZE
+        ids = ids[:self.FRIENDS_PAGE_SIZE]
+        return {
+            'ids': ids,
+            'next': ids[-1] if has_more else None,
+        }
+
+    def destroy(self, request, *args, **kwargs):
+        schedule_user_deletion(request.user)
+        return Response(
+            {'detail': 'Your account has been deactivated and will be deleted shortly.'},
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+
+class UserDetailView(generics.RetrieveAPIView):
+    """Another user's profile header, served from the shared profile cache."""
+
+    serializer_class = PublicProfileSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
     def get_object(self):
-        return self.request.user
+        user = load_profile(self.kwargs['pk'])
+        if user is None:
+            raise Http404
+        return user
+
+
+class UserBatchView(APIView):
+    """``?ids=`` profile headers in one request, in the order asked for."""
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        ids = batch_ids(request)
+        profiles = load_profiles(ids)
+        found = {
+            user_id: PublicProfileSerializer(user, context={'request': request}).data
+            for user_id, user in profiles.items()
+        }
+        return Response(batch_response(ids, found))
@@ -7,6 +7,13 @@ export type AuthTokens = {
     refresh: string;
 };
 
+export type UserStats = {
+    postsCount: number;
+    likesReceived: number;
+    commentsCount: number;
+    groupsCount: number;
+};
+
 export type AuthUser = {
     id: number;
     username: string;
@@ -15,7 +22,8 @@ export type AuthUser = {
     lastName?: string | null;
     bio?: string | null;
     profilePicture?: string | null;
-    friends?: number[];
+    friendsCount?: number;
+    stats?: UserStats;
 };
 
 export type AuthState = {
@@ -1,17 +1,29 @@
 "use client";
 
 import React from "react";
-import { useMutation, useQuery, useQueryClient } from "@tanstack/react-query";
+import {
+  type InfiniteData,
+  useInfiniteQuery,
+  useMutation,
+  useQuery,
+  useQueryClient,
+} from "@tanstack/react-query";
 import CardComponent from "@/pages/homepage/CardComponent";
 import { Button } from "@/components/ui/button";
 import { ApiError, apiRequest } from "@/lib/apiClient";
 import { useAuthedRequest } from "@/hooks/useAuthedRequest";
-import type { FriendRequestSummary, UserSummary } from "@/types/users";
+import type { AuthUser } from "@/atom/authAtom";
+import type {
+  CursorPage,
+  FriendRequestSummary,
+  UserSummary,
+} from "@/types/users";
 import { cn } from "@/lib/utils";
 
 const FRIENDS_QUERY_KEY = ["friends", "list"];
 const INCOMING_QUERY_KEY = ["friends", "requests", "incoming"];
 const OUTGOING_QUERY_KEY = ["friends", "requests", "outgoing"];
+const PROFILE_QUERY_KEY = ["user-profile"];
 
 type TabKey = "friends" | "incoming" | "outgoing";
 
@@ -29,12 +41,32 @@ export default function FriendsPage() {
   const [actionError, setActionError] = React.useState<string | null>(null);
   const [activeTab, setActiveTab] = React.useState<TabKey>("friends");
 
-  const friendsQuery = useQuery({
+  const friendsQuery = useInfiniteQuery({
     queryKey: FRIENDS_QUERY_KEY,
     enabled: isAuthenticated,
+    initialPageParam: null as string | null,
+    queryFn: ({ pageParam }) =>
+      requestWithRefresh((accessToken) =>
+        apiRequest<CursorPage<UserSummary>>(
+          pageParam
+            ? `/friends/?cursor=${encodeURIComponent(pageParam)}`
+            : "/friends/",
+          { authToken: accessToken },
+        ),
+      ),
+    getNextPageParam: (lastPage) =>
+      lastPage.next
+        ? new URL(lastPage.next).searchParams.get("cursor")
+        : undefined,
+  });
+
+  // The friend list is paginated; the total comes from the profile.
+  const profileQuery = useQuery({
+    queryKey: PROFILE_QUERY_KEY,
+    enabled: isAuthenticated,
     queryFn: () =>
       requestWithRefresh((accessToken) =>
-        apiRequest<UserSummary[]>("/friends/", { authToken: accessToken }),
+        apiRequest<AuthUser>("/users/me/", { authToken: accessToken }),
       ),
   });
 
@@ -92,20 +124,28 @@ export default function FriendsPage() {
 
       if (variables.action === "accept") {
         const newFriend = data.sender;
-        queryClient.setQueryData<UserSummary[]>(
+        queryClient.setQueryData<InfiniteData<CursorPage<UserSummary>>>(
           FRIENDS_QUERY_KEY,
           (previous) => {
-            if (!previous) {
-              return [newFriend];
-            }
-            if (previous.some((friend) => friend.id === newFriend.id)) {
+            if (
+              !previous ||
+              previous.pages.some((page) =>
+                page.results.some((friend) => friend.id === newFriend.id),
+              )
+            ) {
               return previous;
             }
-            return [...previous, newFriend].sort((a, b) =>
-              a.username.localeCompare(b.username),
-            );
+            const [first, ...rest] = previous.pages;
+            return {
+              ...previous,
+              pages: [
+                { ...first, results: [newFriend, ...first.results] },
+                ...rest,
+              ],
+            };
           },
         );
+        queryClient.invalidateQueries({ queryKey: PROFILE_QUERY_KEY });
       }
     },
     onError: (error) => {
@@ -165,7 +205,9 @@ export default function FriendsPage() {
       ? cancelMutation.variables
       : null;
 
-  const friends = friendsQuery.data ?? [];
+  const friends =
+    friendsQuery.data?.pages.flatMap((page) => page.results) ?? [];
+  const friendsCount = profileQuery.data?.friendsCount ?? null;
   const incomingRequests = (incomingRequestsQuery.data ?? []).filter(
     (request) => request.status === "pending",
   );
@@ -197,8 +239,8 @@ export default function FriendsPage() {
       key: "friends",
       label: "Your friends",
       description: "People you’re connected with.",
-      count: friendsQuery.isLoading ? null : friends.length,
-      isLoading: friendsQuery.isLoading,
+      count: friendsCount,
+      isLoading: profileQuery.isLoading,
     },
     {
       key: "incoming",
@@ -234,12 +276,25 @@ export default function FriendsPage() {
         }
         return (
           <div className="space-y-3">
-            {friendsQuery.isFetching && !friendsQuery.isLoading && (
-              <p className="text-xs text-neutral-400">Refreshing…</p>
-            )}
+            {friendsQuery.isFetching &&
+              !friendsQuery.isLoading &&
+              !friendsQuery.isFetchingNextPage && (
+                <p className="text-xs text-neutral-400">Refreshing…</p>
+              )}
             {friends.map((friend) => (
               <FriendRow key={friend.id} friend={friend} />
             ))}
+            {friendsQuery.hasNextPage && (
+              <div className="flex justify-center pt-2">
+                <Button
+                  disabled={friendsQuery.isFetchingNextPage}
+                  onClick={() => friendsQuery.fetchNextPage()}
+                  variant="outline"
+                >
+                  {friendsQuery.isFetchingNextPage ? "Loading..." : "Load more"}
+                </Button>
+              </div>
+            )}
           </div>
         );
       case "incoming":
@@ -9,6 +9,7 @@ import { apiRequest } from "@/lib/apiClient";
 import { useAuthedRequest } from "@/hooks/useAuthedRequest";
 import type { Group } from "@/types/groups";
 import type { Post, PostComment } from "@/types/posts";
+import type { CursorPage } from "@/types/users";
 
 export default function GroupsPage() {
   const { authState, isAuthenticated, requestWithRefresh } = useAuthedRequest();
@@ -34,7 +35,7 @@ export default function GroupsPage() {
     enabled: isAuthenticated,
     queryFn: () =>
       requestWithRefresh((accessToken) =>
-        apiRequest<Group[]>(`/groups/?${searchQuery ? `search=${encodeURIComponent(searchQuery)}` : ""}`, {
+        apiRequest<CursorPage<Group>>(`/groups/?${searchQuery ? `search=${encodeURIComponent(searchQuery)}` : ""}`, {
           authToken: accessToken,
         }),
       ),
@@ -45,9 +46,7 @@ export default function GroupsPage() {
     enabled: isAuthenticated,
     queryFn: () =>
       requestWithRefresh((accessToken) =>
-        apiRequest<Group[]>("/groups/", { authToken: accessToken }).then((groups) =>
-          groups.filter((group) => group.isMember),
-        ),
+        apiRequest<CursorPage<Group>>("/groups/?member=1", { authToken: accessToken }),
       ),
   });
 
@@ -287,7 +286,7 @@ export default function GroupsPage() {
             <ExploreTab
               searchQuery={searchQuery}
               onSearchChange={setSearchQuery}
-              groups={groupsQuery.data ?? []}
+              groups={groupsQuery.data?.results ?? []}
               isLoading={groupsQuery.isLoading}
               loadError={groupsQuery.error ? "Failed to load groups" : null}
               onJoinGroup={(groupId) => joinGroupMutation.mutate(groupId)}
@@ -301,7 +300,7 @@ export default function GroupsPage() {
 
           {activeTab === "my-groups" && (
             <MyGroupsTab
-              groups={myGroupsQuery.data ?? []}
+              groups={myGroupsQuery.data?.results ?? []}
               isLoading={myGroupsQuery.isLoading}
               loadError={myGroupsQuery.error ? "Failed to load your groups" : null}
               onLeaveGroup={(groupId) => leaveGroupMutation.mutate(groupId)}
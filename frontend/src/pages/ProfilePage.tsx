@@ -19,6 +19,7 @@ import { useAuthedRequest } from "@/hooks/useAuthedRequest";
 import { apiRequest } from "@/lib/apiClient";
 import type { Post } from "@/types/posts";
 import type { Group } from "@/types/groups";
+import type { CursorPage } from "@/types/users";
 import { Button } from "@/components/ui/button";
 import { Input } from "@/components/ui/input";
 
@@ -61,7 +62,7 @@ export default function ProfilePage() {
     enabled: Boolean(user?.id),
     queryFn: () =>
       requestWithRefresh((accessToken) =>
-        apiRequest<Group[]>("/groups/", { authToken: accessToken })
+        apiRequest<CursorPage<Group>>("/groups/?member=1", { authToken: accessToken })
       ),
   });
 
@@ -156,7 +157,7 @@ export default function ProfilePage() {
   };
 
   const userPosts = postsQuery.data?.filter((post) => post.author.id === user?.id) ?? [];
-  const userGroups = groupsQuery.data?.filter((group) => group.isMember) ?? [];
+  const userGroups = groupsQuery.data?.results ?? [];
   const selectedGroup = userGroups.find((g) => g.id === selectedGroupId);
   const userGroupPosts = groupPostsQuery.data?.filter((post) => post.author.id === user?.id) ?? [];
 
@@ -12,6 +12,8 @@ export type Group = {
     description: string;
     owner: GroupOwner;
     membersCount: number;
+    lastPostAt: string;
+    friendsInGroup: number | null;
     isMember: boolean;
     isOwner: boolean;
     created_at: string;
@@ -8,19 +8,33 @@ export type PostAuthor = {
 
 export type PostComment = {
     id: number;
+    parentId?: number | null;
+    depth?: number;
+    replyCount?: number;
+    replies?: PostComment[] | null;
     content: string;
     createdAt: string;
     updatedAt: string;
     author: PostAuthor;
 };
 
+export type PostAttachment = {
+    id: number;
+    url: string;
+    contentType: string;
+    size: number;
+    metadata: { width?: number; height?: number; format?: string };
+};
+
 export type Post = {
     id: number;
     content: string;
     createdAt: string;
+    updatedAt: string;
     likesCount: number;
     commentsCount: number;
     author: PostAuthor;
     comments: PostComment[];
     viewerHasLiked: boolean;
+    attachments?: PostAttachment[];
 };
@@ -13,6 +13,11 @@ export type UserSummary = {
     profilePicture: string | null;
 };
 
+export type CursorPage<T> = {
+    next: string | null;
+    results: T[];
+};
+
 export type PeopleSearchResult = UserSummary & {
     relationshipStatus: RelationshipStatus;
 };